@@ -1,13 +1,41 @@
 """
 Rotaenot Python Backend
 A Python backend system for the Rotaeno-like rhythm game
+
+The public classes are imported on first access (PEP 562), so importing
+the package is nearly free and `from rotaenot.python_backend import
+ScoreCalculator` loads only the scoring module, without NumPy.
 """
 
+import importlib
+from typing import TYPE_CHECKING
+
 __version__ = "0.1.0"
 __author__ = "Rotaenot Team"
 
-from .chart_parser import ChartParser
-from .score_system import ScoreCalculator
-from .gyro_processor import GyroProcessor
+# Public name -> submodule that defines it
+_LAZY_ATTRIBUTES = {
+    "ChartParser": ".chart_parser",
+    "ScoreCalculator": ".score_system",
+    "GyroProcessor": ".gyro_processor",
+}
+
+__all__ = ["ChartParser", "ScoreCalculator", "GyroProcessor"]
+
+if TYPE_CHECKING:
+    from .chart_parser import ChartParser
+    from .score_system import ScoreCalculator
+    from .gyro_processor import GyroProcessor
+
+
+def __getattr__(name: str):
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value  # Later lookups skip __getattr__
+    return value
+
 
-__all__ = ["ChartParser", "ScoreCalculator", "GyroProcessor"]
\ No newline at end of file
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
@@ -0,0 +1,555 @@
+"""
+Audio Analysis for Rotaenot
+Onset and tempo detection for chart generation (Python counterpart of
+scripts/tools/audio_analyzer.gd)
+"""
+
+import wave
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+# Analysis parameters (FFT/hop sizes are in samples at ANALYSIS_RATE)
+ANALYSIS_RATE = 22050  # Input is decimated towards this rate before the STFT
+FFT_SIZE = 1024
+HOP_SIZE = 256
+MIN_BEAT_INTERVAL = 0.1  # Minimum time between onsets (seconds)
+THRESHOLD_WINDOW = 0.5  # Span of the adaptive threshold's moving mean (seconds)
+THRESHOLD_DELTA = 0.05  # Offset added to the moving mean, relative to the peak flux
+MIN_BPM = 60.0
+MAX_BPM = 200.0
+TEMPO_PRIOR_BPM = 120.0  # Centre of the log-normal tempo prior (one octave std)
+
+# Frequency bands weighted in the flux (sub-bass kicks count most)
+BAND_WEIGHTS = (
+    ((20, 60), 1.5),  # Sub-bass (kick drums)
+    ((60, 250), 1.0),  # Bass
+    ((250, 20000), 0.5),  # Everything above
+)
+
+_FRAME_BLOCK = 1024  # Frames transformed per FFT call to bound memory
+
+
+@dataclass
+class AudioAnalysis:
+    """Result of analyzing a track"""
+    onset_times: np.ndarray  # Seconds
+    onset_strengths: np.ndarray  # Flux at each onset
+    beat_times: np.ndarray  # Seconds, on the estimated tempo grid
+    bpm: float
+    duration: float  # Seconds
+    flux: np.ndarray  # Onset strength envelope, one value per frame
+    frame_rate: float  # Flux frames per second
+
+
+def read_wav(file_path: str) -> Tuple[np.ndarray, int]:
+    """
+    Read a PCM WAV file as mono float32 samples in [-1, 1]
+
+    Args:
+        file_path: Path to the WAV file
+
+    Returns:
+        Tuple of (samples, sample rate)
+    """
+    with wave.open(file_path, 'rb') as wav:
+        channels = wav.getnchannels()
+        width = wav.getsampwidth()
+        sample_rate = wav.getframerate()
+        raw = wav.readframes(wav.getnframes())
+
+    return pcm_to_float(raw, width, channels), sample_rate
+
+
+def pcm_to_float(raw: bytes, width: int, channels: int) -> np.ndarray:
+    """
+    Convert interleaved little-endian PCM bytes to mono float32
+
+    Args:
+        raw: PCM data
+        width: Bytes per sample (1, 2, 3 or 4)
+        channels: Number of interleaved channels
+
+    Returns:
+        Mono samples in [-1, 1]
+    """
+    if width == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif width == 2:
+        samples = np.frombuffer(raw, dtype='<i2').astype(np.float32) / 32768
+    elif width == 3:
+        # Sign-extend 24-bit samples into the top of an int32
+        packed = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3)
+        wide = np.zeros((len(packed), 4), dtype=np.uint8)
+        wide[:, 1:] = packed
+        samples = wide.view('<i4').ravel().astype(np.float32) / 2 ** 31
+    elif width == 4:
+        samples = np.frombuffer(raw, dtype='<i4').astype(np.float32) / 2 ** 31
+    else:
+        raise ValueError(f"Unsupported PCM sample width: {width}")
+
+    if channels > 1:
+        samples = samples[:len(samples) - len(samples) % channels]
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples
+
+
+def downsample(samples: np.ndarray, sample_rate: int) -> Tuple[np.ndarray, int]:
+    """
+    Decimate by the integer factor that brings sample_rate closest to ANALYSIS_RATE
+
+    Averages each group of samples, which doubles as a simple low-pass filter.
+
+    Returns:
+        Tuple of (samples, new sample rate)
+    """
+    factor = max(1, int(sample_rate // ANALYSIS_RATE))
+    if factor == 1:
+        return samples, sample_rate
+    usable = len(samples) - len(samples) % factor
+    return samples[:usable].reshape(-1, factor).mean(axis=1), sample_rate // factor
+
+
+class AudioAnalyzer:
+    """Detect onsets and tempo from decoded audio"""
+
+    def __init__(self, fft_size: int = FFT_SIZE, hop_size: int = HOP_SIZE,
+                 min_interval: float = MIN_BEAT_INTERVAL):
+        """
+        Args:
+            fft_size: STFT frame length in samples
+            hop_size: Samples between consecutive frames
+            min_interval: Minimum time between detected onsets (seconds)
+        """
+        self.fft_size = fft_size
+        self.hop_size = hop_size
+        self.min_interval = min_interval
+        self.window = np.hanning(fft_size).astype(np.float32)
+
+    def analyze(self, samples: np.ndarray, sample_rate: int) -> AudioAnalysis:
+        """
+        Run the full analysis pipeline
+
+        Args:
+            samples: Mono samples (float, roughly [-1, 1])
+            sample_rate: Samples per second
+
+        Returns:
+            AudioAnalysis with onsets, beat grid and tempo
+        """
+        samples, sample_rate = downsample(np.asarray(samples, dtype=np.float32),
+                                          sample_rate)
+        frame_rate = sample_rate / self.hop_size
+
+        flux = self.spectral_flux(self.stft_magnitude(samples), sample_rate)
+        onsets = self.pick_peaks(flux, frame_rate)
+        bpm = self.estimate_tempo(flux, frame_rate)
+        duration = len(samples) / sample_rate
+        beat_times = self.frame_times(self.beat_frames(flux, frame_rate, bpm), sample_rate)
+
+        return AudioAnalysis(
+            onset_times=self.frame_times(onsets, sample_rate),
+            onset_strengths=flux[onsets],
+            beat_times=beat_times[beat_times < duration],
+            bpm=bpm,
+            duration=duration,
+            flux=flux,
+            frame_rate=frame_rate
+        )
+
+    def frame_times(self, frames: np.ndarray, sample_rate: int) -> np.ndarray:
+        """Centre time in seconds of the given frame indices"""
+        return (frames * self.hop_size + self.fft_size / 2) / sample_rate
+
+    def stft_magnitude(self, samples: np.ndarray) -> np.ndarray:
+        """
+        Framed, windowed magnitude spectrum
+
+        Args:
+            samples: Mono samples
+
+        Returns:
+            Array of shape (frames, fft_size // 2 + 1)
+        """
+        if len(samples) < self.fft_size:
+            samples = np.pad(samples, (0, self.fft_size - len(samples)))
+
+        frames = np.lib.stride_tricks.sliding_window_view(
+            samples, self.fft_size)[::self.hop_size]
+        magnitude = np.empty((len(frames), self.fft_size // 2 + 1), dtype=np.float32)
+
+        for start in range(0, len(frames), _FRAME_BLOCK):
+            block = frames[start:start + _FRAME_BLOCK] * self.window
+            magnitude[start:start + _FRAME_BLOCK] = np.abs(np.fft.rfft(block, axis=1))
+        return magnitude
+
+    def band_weights(self, sample_rate: int) -> np.ndarray:
+        """Per-bin weights applied to the flux (see BAND_WEIGHTS)"""
+        freqs = np.fft.rfftfreq(self.fft_size, 1.0 / sample_rate)
+        weights = np.zeros(len(freqs), dtype=np.float32)
+        for (low, high), weight in BAND_WEIGHTS:
+            weights[(freqs >= low) & (freqs < high)] = weight
+        return weights
+
+    def spectral_flux(self, magnitude: np.ndarray, sample_rate: int,
+                      previous: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Half-wave rectified, band-weighted change in log magnitude
+
+        Args:
+            magnitude: STFT magnitudes, one row per frame
+            sample_rate: Samples per second
+            previous: Log magnitude of the frame before the first row
+                (defaults to the first row, giving zero flux there)
+
+        Returns:
+            Flux value per frame
+        """
+        log_mag = np.log1p(100 * magnitude)
+        if previous is None:
+            previous = log_mag[0]
+        change = np.diff(log_mag, axis=0, prepend=previous[np.newaxis])
+        np.maximum(change, 0, out=change)
+        return change @ self.band_weights(sample_rate)
+
+    def pick_peaks(self, flux: np.ndarray, frame_rate: float, start: int = 0,
+                   stop: Optional[int] = None,
+                   peak_flux: Optional[float] = None) -> np.ndarray:
+        """
+        Adaptive-threshold peak picking
+
+        A frame is an onset if it is the maximum within +-min_interval, rises
+        from the previous frame, and exceeds the local moving mean by delta.
+
+        Args:
+            flux: Onset strength per frame
+            frame_rate: Frames per second
+            start, stop: Range of frames to decide; frames outside it are
+                only used as context (defaults to the whole array)
+            peak_flux: Scale for the threshold delta (defaults to flux.max())
+
+        Returns:
+            Frame indices of the onsets
+        """
+        stop = len(flux) if stop is None else stop
+        if stop <= start or len(flux) < 3:
+            return np.zeros(0, dtype=np.int64)
+        if peak_flux is None:
+            peak_flux = flux.max()
+
+        index = np.arange(start, stop)
+        radius = max(1, int(round(self.min_interval * frame_rate)))
+        padded = np.pad(flux, radius, mode='constant', constant_values=-np.inf)
+        local_max = np.lib.stride_tricks.sliding_window_view(
+            padded[start:stop + 2 * radius], 2 * radius + 1).max(axis=1)
+
+        half = max(1, int(round(THRESHOLD_WINDOW * frame_rate / 2)))
+        cumulative = np.concatenate(([0.0], np.cumsum(flux, dtype=np.float64)))
+        low = np.maximum(index - half, 0)
+        high = np.minimum(index + half + 1, len(flux))
+        moving_mean = (cumulative[high] - cumulative[low]) / (high - low)
+
+        value = flux[start:stop]
+        threshold = moving_mean + THRESHOLD_DELTA * peak_flux
+        rising = (index > 0) & (value > flux[np.maximum(index - 1, 0)])
+        return index[(value == local_max) & rising & (value > threshold)]
+
+    def peak_context(self, frame_rate: float) -> int:
+        """Frames of context pick_peaks needs on each side of a frame"""
+        radius = max(1, int(round(self.min_interval * frame_rate)))
+        half = max(1, int(round(THRESHOLD_WINDOW * frame_rate / 2)))
+        return max(radius, half)
+
+    def tempo_lags(self, frame_rate: float, min_bpm: float = MIN_BPM,
+                   max_bpm: float = MAX_BPM) -> Tuple[int, int]:
+        """Range of autocorrelation lags (in frames) searched for the tempo"""
+        return (int(np.floor(60.0 * frame_rate / max_bpm)),
+                int(np.ceil(60.0 * frame_rate / min_bpm)))
+
+    def estimate_tempo(self, flux: np.ndarray, frame_rate: float,
+                       min_bpm: float = MIN_BPM, max_bpm: float = MAX_BPM) -> float:
+        """
+        Estimate tempo from the autocorrelation of the flux envelope
+
+        Args:
+            flux: Onset strength per frame
+            frame_rate: Frames per second
+            min_bpm, max_bpm: Tempo search range
+
+        Returns:
+            Tempo in beats per minute (120 if it cannot be estimated)
+        """
+        _, max_lag = self.tempo_lags(frame_rate, min_bpm, max_bpm)
+        if len(flux) <= max_lag + 2:
+            return 120.0
+
+        centered = flux - flux.mean()
+        spectrum = np.fft.rfft(centered, n=2 * len(flux))
+        autocorr = np.fft.irfft(spectrum * np.conj(spectrum))[:max_lag + 3]
+        return self.tempo_from_autocorr(autocorr, frame_rate, min_bpm, max_bpm)
+
+    def tempo_from_autocorr(self, autocorr: np.ndarray, frame_rate: float,
+                            min_bpm: float = MIN_BPM, max_bpm: float = MAX_BPM) -> float:
+        """
+        Pick the tempo from a centred flux autocorrelation
+
+        Args:
+            autocorr: Autocorrelation for lags 0 .. max_lag + 2
+            frame_rate: Frames per second
+            min_bpm, max_bpm: Tempo search range
+
+        Returns:
+            Tempo in beats per minute (120 if it cannot be estimated)
+        """
+        min_lag, max_lag = self.tempo_lags(frame_rate, min_bpm, max_bpm)
+        if min_lag < 2 or len(autocorr) < max_lag + 3 or autocorr[0] <= 0:
+            return 120.0
+
+        # Beat periods rarely fall on whole frames, so score each lag by
+        # the best autocorrelation within one frame of it
+        near = np.maximum(np.maximum(autocorr[:-2], autocorr[1:-1]), autocorr[2:])
+        near = np.concatenate(([autocorr[0]], near))
+
+        # Weight lags by a log-normal prior to avoid half/double tempo errors
+        lags = np.arange(min_lag, max_lag + 1)
+        prior = np.exp(-0.5 * np.log2(60.0 * frame_rate / lags / TEMPO_PRIOR_BPM) ** 2)
+        lag = min_lag + int(np.argmax(near[min_lag:max_lag + 1] * prior))
+
+        # Prefer the half period if it is nearly as periodic (a missed octave)
+        half = int(round(lag / 2))
+        if half >= min_lag and near[half] >= 0.5 * near[lag]:
+            lag = half
+        lag = lag - 1 + int(np.argmax(autocorr[lag - 1:lag + 2]))
+
+        # Parabolic interpolation around the peak for sub-frame precision
+        left, mid, right = autocorr[lag - 1], autocorr[lag], autocorr[lag + 1]
+        curvature = left - 2 * mid + right
+        offset = 0.5 * (left - right) / curvature if curvature < 0 else 0.0
+        return float(60.0 * frame_rate / (lag + offset))
+
+    def beat_frames(self, flux: np.ndarray, frame_rate: float, bpm: float) -> np.ndarray:
+        """
+        Place a beat grid at the phase that collects the most flux
+
+        Returns:
+            Fractional frame index of each beat
+        """
+        period = 60.0 * frame_rate / bpm
+        phases = np.arange(max(1, int(period)))
+        beats = np.arange(0, len(flux), period)
+
+        # Score every candidate phase at once: (phases, beats) index matrix
+        frames = np.rint(phases[:, np.newaxis] + beats[np.newaxis, :]).astype(np.int64)
+        valid = frames < len(flux)
+        scores = np.where(valid, flux[np.minimum(frames, len(flux) - 1)], 0).sum(axis=1)
+        phase = phases[int(np.argmax(scores))] if len(flux) else 0
+        return phase + beats
+
+
+@dataclass
+class StreamUpdate:
+    """Results decided since the previous update of a streaming analysis"""
+    onset_times: np.ndarray  # Seconds
+    onset_strengths: np.ndarray
+    beat_times: np.ndarray  # Seconds
+    bpm: Optional[float]  # Current tempo estimate, None until warmed up
+    analyzed_time: float  # Seconds of audio with final results so far
+
+
+class StreamingAudioAnalyzer:
+    """
+    Incremental onset and beat detection over blocks of audio
+
+    Carries the decimation remainder, the unframed sample tail, the last log
+    spectrum, a short flux history and running autocorrelation sums between
+    blocks, so memory stays bounded regardless of track length. Onsets match
+    AudioAnalyzer except that the threshold delta scales with the running
+    (rather than global) peak flux. Beats come from a causal tracker that
+    follows the current tempo estimate.
+    """
+
+    def __init__(self, sample_rate: int, analyzer: Optional[AudioAnalyzer] = None,
+                 tempo_warmup: float = 4.0):
+        """
+        Args:
+            sample_rate: Sample rate of the blocks passed to feed()
+            analyzer: Provides the STFT, flux and peak settings
+            tempo_warmup: Seconds of audio before tempo and beats are reported
+        """
+        self.analyzer = analyzer or AudioAnalyzer()
+        self._factor = max(1, int(sample_rate // ANALYSIS_RATE))
+        self.sample_rate = sample_rate // self._factor
+        self.frame_rate = self.sample_rate / self.analyzer.hop_size
+        self.bpm: Optional[float] = None
+
+        self._warmup_frames = int(tempo_warmup * self.frame_rate)
+        self._context = self.analyzer.peak_context(self.frame_rate)
+        _, max_lag = self.analyzer.tempo_lags(self.frame_rate)
+        self._lags = max_lag + 3
+        self._max_tolerance = int(round(0.1 * max_lag)) + 1
+
+        self._decimation_tail = np.zeros(0, dtype=np.float32)
+        self._samples = np.zeros(0, dtype=np.float32)  # Decimated, not yet framed
+        self._previous: Optional[np.ndarray] = None  # Last log magnitude row
+
+        self._history = np.zeros(0)  # Recent flux frames
+        self._history_start = 0  # Frame index of _history[0]
+        self._frames = 0  # Flux frames produced so far
+        self._decided = 0  # Frames with a final onset decision
+        self._peak_flux = 0.0
+
+        # Running sums for the centred autocorrelation of the whole envelope
+        self._products = np.zeros(self._lags)  # sum of f[t] * f[t - lag]
+        self._head = np.zeros(0)  # First _lags frames
+        self._total = 0.0
+        self._next_beat: Optional[float] = None  # Predicted beat frame
+
+    def feed(self, samples: np.ndarray) -> StreamUpdate:
+        """
+        Analyze the next block of mono samples
+
+        Args:
+            samples: Mono samples continuing the stream
+
+        Returns:
+            Onsets and beats that became final with this block
+        """
+        samples = np.asarray(samples, dtype=np.float32)
+        if self._factor > 1:
+            samples = np.concatenate((self._decimation_tail, samples))
+            usable = len(samples) - len(samples) % self._factor
+            self._decimation_tail = samples[usable:]
+            samples = samples[:usable].reshape(-1, self._factor).mean(axis=1)
+        self._samples = np.concatenate((self._samples, samples))
+
+        fft_size, hop_size = self.analyzer.fft_size, self.analyzer.hop_size
+        count = (len(self._samples) - fft_size) // hop_size + 1
+        if count > 0:
+            magnitude = self.analyzer.stft_magnitude(
+                self._samples[:(count - 1) * hop_size + fft_size])
+            flux = self.analyzer.spectral_flux(magnitude, self.sample_rate, self._previous)
+            self._previous = np.log1p(100 * magnitude[-1])
+            self._samples = self._samples[count * hop_size:]
+            self._append_flux(flux)
+
+        return self._update(final=False)
+
+    def finish(self) -> StreamUpdate:
+        """Decide the frames held back for lookahead at the end of the stream"""
+        return self._update(final=True)
+
+    def analyze_blocks(self, blocks: Iterable[np.ndarray]) -> Iterator[StreamUpdate]:
+        """
+        Feed every block and yield the updates, ending with finish()
+
+        Args:
+            blocks: Mono sample blocks in stream order
+
+        Returns:
+            Iterator of StreamUpdate, one per block plus a final one
+        """
+        for block in blocks:
+            yield self.feed(block)
+        yield self.finish()
+
+    def _append_flux(self, flux: np.ndarray):
+        # Products against the previous _lags - 1 frames (zeros before the start)
+        context = self._history[-(self._lags - 1):]
+        padded = np.concatenate((np.zeros(self._lags - 1 - len(context)), context, flux))
+        windows = np.lib.stride_tricks.sliding_window_view(padded, self._lags)
+        self._products += flux @ windows[:, ::-1]
+
+        if len(self._head) < self._lags:
+            self._head = np.concatenate((self._head, flux[:self._lags - len(self._head)]))
+        self._total += float(flux.sum())
+        self._frames += len(flux)
+        self._peak_flux = max(self._peak_flux, float(flux.max()))
+        self._history = np.concatenate((self._history, flux))
+
+    def _autocorrelation(self) -> np.ndarray:
+        """Centred autocorrelation of all flux so far, from the running sums"""
+        lags = np.arange(self._lags)
+        mean = self._total / self._frames
+        first = np.concatenate(([0.0], np.cumsum(self._head)))[lags]
+        last = np.concatenate(([0.0], np.cumsum(self._history[::-1][:self._lags - 1])))[lags]
+        return (self._products - mean * ((self._total - first) + (self._total - last))
+                + (self._frames - lags) * mean ** 2)
+
+    def _update(self, final: bool) -> StreamUpdate:
+        history, start = self._history, self._history_start
+        frontier = self._frames if final else max(self._frames - self._context, self._decided)
+
+        onsets = self.analyzer.pick_peaks(history, self.frame_rate,
+                                          self._decided - start, frontier - start,
+                                          self._peak_flux) + start
+        self._decided = frontier
+
+        if self._frames >= max(self._warmup_frames, self._lags):
+            self.bpm = self.analyzer.tempo_from_autocorr(self._autocorrelation(),
+                                                         self.frame_rate)
+        beats = self._track_beats(onsets, frontier)
+
+        # Keep enough history for lookahead, beat windows and the products
+        keep_from = min(self._decided - self._context - self._max_tolerance,
+                        self._frames - (self._lags - 1))
+        if keep_from > start:
+            self._history = history[keep_from - start:]
+            self._history_start = keep_from
+
+        return StreamUpdate(
+            onset_times=self.analyzer.frame_times(onsets, self.sample_rate),
+            onset_strengths=history[onsets - start],
+            beat_times=self.analyzer.frame_times(beats, self.sample_rate),
+            bpm=self.bpm,
+            analyzed_time=frontier / self.frame_rate
+        )
+
+    def _track_beats(self, onsets: np.ndarray, frontier: int) -> np.ndarray:
+        """Snap predicted beats to the strongest flux near each prediction"""
+        if self.bpm is None:
+            return np.zeros(0)
+        if self._next_beat is None:
+            if not len(onsets):
+                return np.zeros(0)
+            self._next_beat = float(onsets[0])
+
+        period = 60.0 * self.frame_rate / self.bpm
+        tolerance = max(1, int(round(0.1 * period)))
+        beats = []
+        while self._next_beat + tolerance < frontier:
+            center = int(round(self._next_beat))
+            low = max(center - tolerance, self._history_start)
+            window = self._history[low - self._history_start:
+                                   center + tolerance + 1 - self._history_start]
+            beat = low + int(np.argmax(window)) if window.max() > 0 else self._next_beat
+            beats.append(beat)
+            self._next_beat = beat + period
+        return np.array(beats, dtype=np.float64)
+
+
+def stream_wav(file_path: str, block_size: int = 65536,
+               analyzer: Optional[AudioAnalyzer] = None) -> Iterator[StreamUpdate]:
+    """
+    Analyze a PCM WAV file block by block
+
+    Args:
+        file_path: Path to the WAV file
+        block_size: Sample frames read per block
+        analyzer: Provides the STFT, flux and peak settings
+
+    Returns:
+        Iterator of StreamUpdate, one per block plus a final one
+    """
+    with wave.open(file_path, 'rb') as wav:
+        channels = wav.getnchannels()
+        width = wav.getsampwidth()
+        stream = StreamingAudioAnalyzer(wav.getframerate(), analyzer)
+
+        while True:
+            raw = wav.readframes(block_size)
+            if not raw:
+                break
+            yield stream.feed(pcm_to_float(raw, width, channels))
+
+    yield stream.finish()
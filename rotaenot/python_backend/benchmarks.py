@@ -0,0 +1,644 @@
+"""
+Benchmarks for Rotaenot
+Timings of the backend hot paths on fixed inputs, stored as JSON for comparison
+
+Run from the repository root:
+
+    python -m rotaenot.python_backend.benchmarks --output results.json
+    python -m rotaenot.python_backend.benchmarks --compare results.json
+    python -m rotaenot.python_backend.benchmarks --check-imports
+
+Every input is generated from BENCHMARK_SEED or read from the shipped
+charts, so two runs on the same machine time exactly the same work.
+"""
+
+import argparse
+import gc
+import itertools
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .chart_generator import ChartGenerator
+from .chart_binary import BINARY_EXTENSION
+from .chart_parser import ChartParser
+from .chart_types import Chart
+from .gyro_processor import FastGyroProcessor, GyroProcessor
+from .score_system import B40_SIZE, B40Calculator, ScoreCalculator
+
+BENCHMARK_SEED = 20240607
+RESULTS_VERSION = 1
+
+SHIPPED_CHART_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__),
+                                                  os.pardir, 'charts'))
+
+# Synthetic chart sizes (approximate note counts) and their generator settings
+SYNTHETIC_CHART_SIZES = (1_000, 10_000, 100_000)
+_SYNTHETIC_BPM = 150.0
+_SYNTHETIC_DIFFICULTY = 10
+_SYNTHETIC_NPS = 7.5  # Notes per second the generator produces for the above
+
+# Per-sample and per-hit benchmarks time this many calls at once
+SAMPLE_COUNT = 10_000
+HIT_COUNT = 10_000
+B40_HISTORY_SIZES = (100, 1_000, 10_000, 100_000)
+
+# Relative slowdown reported as a regression by compare_results
+REGRESSION_THRESHOLD = 0.10
+
+# Import-time budgets: (statement, milliseconds, whether NumPy may load).
+# Measured in a fresh interpreter as the best of IMPORT_RUNS; on the
+# reference machine (CPython 3.11, NumPy 2.4) the package takes about
+# 13 ms, ScoreCalculator 27 ms, GyroProcessor 90 ms and ChartParser
+# 140 ms; each budget leaves roughly twice that as headroom
+IMPORT_BUDGETS = (
+    ('import rotaenot.python_backend', 30.0, False),
+    ('from rotaenot.python_backend import ScoreCalculator', 60.0, False),
+    ('from rotaenot.python_backend import GyroProcessor', 250.0, True),
+    ('from rotaenot.python_backend import ChartParser', 300.0, True),
+)
+IMPORT_RUNS = 5
+
+_REPOSITORY_ROOT = os.path.normpath(os.path.join(os.path.dirname(__file__),
+                                                 os.pardir, os.pardir))
+_IMPORT_PROBE = '''
+import sys, time
+start = time.perf_counter()
+{statement}
+print(time.perf_counter() - start, 'numpy' in sys.modules)
+'''
+
+# Setup returns the function to time and how many units one call covers
+Setup = Callable[..., Tuple[Callable[[], Any], int]]
+
+
+class SkipBenchmark(Exception):
+    """Raised by a setup function when a parameter combination can't run"""
+
+
+@dataclass
+class Benchmark:
+    """A setup function and the parameter grid it runs over"""
+    name: str
+    setup: Setup
+    params: Union[Dict[str, Sequence[Any]], Callable[[], Dict[str, Sequence[Any]]]]
+    unit: str  # What one unit of unit_count is, such as 'note' or 'sample'
+
+    def cases(self) -> Iterator[Dict[str, Any]]:
+        """Every combination of parameter values"""
+        params = self.params() if callable(self.params) else self.params
+        names = list(params)
+        for values in itertools.product(*(params[name] for name in names)):
+            yield dict(zip(names, values))
+
+
+@dataclass
+class BenchmarkResult:
+    """Timings of one benchmark case"""
+    name: str
+    params: Dict[str, Any]
+    unit: str
+    unit_count: int  # Units processed per call
+    number: int  # Calls per timing
+    times: List[float] = field(default_factory=list)  # Seconds per call, one per repeat
+
+    @property
+    def key(self) -> str:
+        """Identifier of the case, stable across runs"""
+        if not self.params:
+            return self.name
+        params = ','.join(f'{name}={value}' for name, value in sorted(self.params.items()))
+        return f'{self.name}[{params}]'
+
+    @property
+    def best(self) -> float:
+        """Fastest call in seconds"""
+        return min(self.times)
+
+    @property
+    def median(self) -> float:
+        """Median call in seconds"""
+        return statistics.median(self.times)
+
+    @property
+    def ns_per_unit(self) -> float:
+        """Best time per unit in nanoseconds"""
+        return self.best * 1e9 / max(self.unit_count, 1)
+
+    def to_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'params': self.params,
+            'unit': self.unit,
+            'unit_count': self.unit_count,
+            'number': self.number,
+            'times': self.times,
+            'best': self.best,
+            'median': self.median,
+            'ns_per_unit': self.ns_per_unit,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'BenchmarkResult':
+        return cls(data['name'], data['params'], data['unit'], data['unit_count'],
+                   data['number'], list(data['times']))
+
+
+@dataclass
+class Comparison:
+    """Change of one case between two result sets"""
+    key: str
+    baseline_ns: float  # Per unit
+    current_ns: float  # Per unit
+
+    @property
+    def ratio(self) -> float:
+        """Current over baseline time (above 1 is slower)"""
+        return self.current_ns / self.baseline_ns if self.baseline_ns else float('inf')
+
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str, unit: str = 'call', **params):
+    """
+    Register a setup function as a benchmark
+
+    Args:
+        name: Benchmark name, grouped by the part before the first dot
+        unit: What the setup's unit count counts
+        **params: Parameter name to the values to run with; a single
+            callable returning such a dict may be passed as params
+    """
+    grid = params.pop('params', None) or params
+
+    def register(setup: Setup) -> Setup:
+        BENCHMARKS[name] = Benchmark(name, setup, grid, unit)
+        return setup
+    return register
+
+
+class BenchmarkContext:
+    """Shared inputs for one run: a scratch directory and cached charts"""
+
+    def __init__(self, workdir: str):
+        self.workdir = workdir
+        self.parser = ChartParser()
+        self._charts: Dict[int, Chart] = {}
+        self._files: Dict[Tuple[int, str], str] = {}
+
+    def synthetic_chart(self, size: int) -> Chart:
+        """Generated chart of about size notes (the same for every run)"""
+        chart = self._charts.get(size)
+        if chart is None:
+            chart = ChartGenerator().generate(size / _SYNTHETIC_NPS, _SYNTHETIC_DIFFICULTY,
+                                              seed=BENCHMARK_SEED + size,
+                                              bpm=_SYNTHETIC_BPM,
+                                              title=f"Benchmark {size}")
+            chart.notes = chart.notes.to_notes()
+            self._charts[size] = chart
+        return chart
+
+    def synthetic_file(self, size: int, chart_format: str) -> str:
+        """Path of the synthetic chart saved as 'json' or 'binary'"""
+        path = self._files.get((size, chart_format))
+        if path is None:
+            extension = '.json' if chart_format == 'json' else BINARY_EXTENSION
+            path = os.path.join(self.workdir, f'synthetic_{size}{extension}')
+            self.parser.save_chart(self.synthetic_chart(size), path,
+                                   binary=chart_format == 'binary')
+            self._files[(size, chart_format)] = path
+        return path
+
+    def chart_file(self, chart: str) -> str:
+        """Path for a 'shipped:<file>' or 'synthetic:<size>' chart parameter"""
+        kind, _, name = chart.partition(':')
+        if kind == 'shipped':
+            return os.path.join(SHIPPED_CHART_DIR, name)
+        return self.synthetic_file(int(name), 'json')
+
+    def load_chart(self, chart: str) -> Chart:
+        """Parsed chart for a chart parameter"""
+        kind, _, name = chart.partition(':')
+        if kind == 'synthetic':
+            return self.synthetic_chart(int(name))
+        try:
+            return self.parser.parse_chart(self.chart_file(chart))
+        except (ValueError, KeyError, TypeError) as e:
+            raise SkipBenchmark(f"{name} does not parse: {type(e).__name__}: {e}") from e
+
+
+def _shipped_charts() -> List[str]:
+    if not os.path.isdir(SHIPPED_CHART_DIR):
+        return []
+    parser = ChartParser()
+    return [f'shipped:{os.path.basename(path)}'
+            for path in parser.find_charts(SHIPPED_CHART_DIR)]
+
+
+def _chart_params() -> Dict[str, Sequence[Any]]:
+    return {'chart': _shipped_charts()
+            + [f'synthetic:{size}' for size in SYNTHETIC_CHART_SIZES]}
+
+
+# Chart parsing, saving and validation
+
+@benchmark('chart.parse_chart', unit='note', params=_chart_params)
+def _parse_chart(context: BenchmarkContext, chart: str):
+    note_count = len(context.load_chart(chart).notes)
+    path = context.chart_file(chart)
+    return (lambda: context.parser.parse_chart(path)), note_count
+
+
+@benchmark('chart.parse_chart_format', unit='note',
+           size=SYNTHETIC_CHART_SIZES, chart_format=('json', 'binary'),
+           columnar=(False, True))
+def _parse_chart_format(context: BenchmarkContext, size: int, chart_format: str,
+                        columnar: bool):
+    path = context.synthetic_file(size, chart_format)
+    return ((lambda: context.parser.parse_chart(path, columnar=columnar)),
+            len(context.synthetic_chart(size).notes))
+
+
+@benchmark('chart.save_chart', unit='note',
+           size=SYNTHETIC_CHART_SIZES, chart_format=('json', 'binary'))
+def _save_chart(context: BenchmarkContext, size: int, chart_format: str):
+    chart = context.synthetic_chart(size)
+    binary = chart_format == 'binary'
+    path = os.path.join(context.workdir, f"save_{size}{BINARY_EXTENSION if binary else '.json'}")
+    return (lambda: context.parser.save_chart(chart, path, binary=binary)), len(chart.notes)
+
+
+@benchmark('chart.validate_chart', unit='note', params=_chart_params)
+def _validate_chart(context: BenchmarkContext, chart: str):
+    loaded = context.load_chart(chart)
+    return (lambda: context.parser.validate_chart(loaded)), len(loaded.notes)
+
+
+# Sensor processing, one call per sample as the game feeds it
+
+_PROCESSORS = {'GyroProcessor': GyroProcessor, 'FastGyroProcessor': FastGyroProcessor}
+
+
+def _sensor_samples(count: int):
+    """Angular rates (rad/s), accelerometer readings and 120 Hz timestamps"""
+    rng = np.random.default_rng(BENCHMARK_SEED)
+    seconds = np.arange(count) / 120
+    # Back-and-forth turns of up to 180 deg/s plus sensor noise, as a player rotates
+    rates = np.radians(180 * np.sin(np.pi * seconds) + rng.normal(0, 5, count)).tolist()
+    accel_x = rng.normal(0, 0.3, count).tolist()
+    accel_y = (1 + rng.normal(0, 0.3, count)).tolist()
+    timestamps = (1 + seconds).tolist()
+    return rates, accel_x, accel_y, timestamps
+
+
+@benchmark('gyro.process_gyro_data', unit='sample', processor=tuple(_PROCESSORS))
+def _process_gyro_data(context: BenchmarkContext, processor: str):
+    gyro = _PROCESSORS[processor]()
+    rates, _, _, timestamps = _sensor_samples(SAMPLE_COUNT)
+
+    def run():
+        gyro.reset()
+        process = gyro.process_gyro_data
+        for rate, timestamp in zip(rates, timestamps):
+            process(0.0, 0.0, rate, timestamp)
+    return run, SAMPLE_COUNT
+
+
+@benchmark('gyro.process_accelerometer_data', unit='sample', processor=tuple(_PROCESSORS))
+def _process_accelerometer_data(context: BenchmarkContext, processor: str):
+    gyro = _PROCESSORS[processor]()
+    _, accel_x, accel_y, timestamps = _sensor_samples(SAMPLE_COUNT)
+
+    def run():
+        gyro.reset()
+        process = gyro.process_accelerometer_data
+        for x, y, timestamp in zip(accel_x, accel_y, timestamps):
+            process(x, y, timestamp)
+    return run, SAMPLE_COUNT
+
+
+@benchmark('gyro.process_gyro_batch', unit='sample')
+def _process_gyro_batch(context: BenchmarkContext):
+    gyro = GyroProcessor()
+    rates, _, _, timestamps = _sensor_samples(SAMPLE_COUNT)
+    rates, timestamps = np.array(rates), np.array(timestamps)
+
+    def run():
+        gyro.reset()
+        gyro.process_gyro_batch(rates, timestamps)
+    return run, SAMPLE_COUNT
+
+
+# Scoring
+
+def _hit_offsets(count: int) -> List[float]:
+    """Hit timing offsets in ms, mostly inside the judgment windows"""
+    rng = np.random.default_rng(BENCHMARK_SEED)
+    return rng.normal(0, 50, count).tolist()
+
+
+@benchmark('score.judge_note', unit='hit')
+def _judge_note(context: BenchmarkContext):
+    calculator = ScoreCalculator()
+    offsets = _hit_offsets(HIT_COUNT)
+
+    def run():
+        judge = calculator.judge_note
+        for offset in offsets:
+            judge(offset)
+    return run, HIT_COUNT
+
+
+@benchmark('score.process_note_hit', unit='hit')
+def _process_note_hit(context: BenchmarkContext):
+    calculator = ScoreCalculator()
+    judgments = [calculator.judge_note(offset) for offset in _hit_offsets(HIT_COUNT)]
+
+    def run():
+        calculator.reset()
+        process = calculator.process_note_hit
+        for judgment in judgments:
+            process(judgment)
+    return run, HIT_COUNT
+
+
+@benchmark('score.score_batch', unit='hit')
+def _score_batch(context: BenchmarkContext):
+    calculator = ScoreCalculator()
+    offsets = np.array(_hit_offsets(HIT_COUNT))
+
+    def run():
+        calculator.reset()
+        calculator.score_batch(offsets)
+    return run, HIT_COUNT
+
+
+@benchmark('score.calculate_b40', unit='play', history=B40_HISTORY_SIZES)
+def _calculate_b40(context: BenchmarkContext, history: int):
+    """One new play followed by calculate_b40, with history plays already stored"""
+    rng = np.random.default_rng(BENCHMARK_SEED + history)
+    songs = max(history // 4, 2 * B40_SIZE)
+    song_ids = [f'song_{i}' for i in range(songs)]
+
+    def plays(count):
+        return list(zip(rng.integers(songs, size=count).tolist(),
+                        rng.integers(1, 15, size=count).tolist(),
+                        rng.uniform(0, 16, size=count).tolist()))
+
+    calculator = B40Calculator()
+    for timestamp, (song, difficulty, rating) in enumerate(plays(history)):
+        calculator.add_score(song_ids[song], difficulty, rating, timestamp)
+    new_plays = itertools.cycle(plays(4096))
+    timestamps = itertools.count(history)
+
+    def run():
+        song, difficulty, rating = next(new_plays)
+        calculator.add_score(song_ids[song], difficulty, rating, next(timestamps))
+        calculator.calculate_b40()
+    return run, 1
+
+
+def _time(function: Callable[[], Any], repeat: int, min_time: float) -> Tuple[int, List[float]]:
+    """Calls per timing and seconds per call for each repeat (GC off, as timeit does)"""
+    timer = timeit.Timer(function)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2 if elapsed <= 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    times = [elapsed / number] + [timer.timeit(number) / number for _ in range(repeat - 1)]
+    return number, times
+
+
+def run_benchmarks(pattern: Optional[str] = None, repeat: int = 5,
+                   min_time: float = 0.1, workdir: Optional[str] = None,
+                   progress: Optional[Callable[[BenchmarkResult], None]] = None
+                   ) -> Tuple[List[BenchmarkResult], Dict[str, str]]:
+    """
+    Run the registered benchmarks
+
+    Args:
+        pattern: Only run cases whose key contains this substring
+        repeat: Timings per case; the best one is reported
+        min_time: Seconds each timing should last at least
+        workdir: Directory for generated chart files (defaults to a
+            temporary directory removed afterwards)
+        progress: Called with each result as it completes
+
+    Returns:
+        (results, skipped) where skipped maps case keys to the reason
+    """
+    own_workdir = workdir is None
+    workdir = workdir or tempfile.mkdtemp(prefix='rotaenot_bench_')
+    context = BenchmarkContext(workdir)
+    results: List[BenchmarkResult] = []
+    skipped: Dict[str, str] = {}
+    try:
+        for bench in BENCHMARKS.values():
+            for params in bench.cases():
+                result = BenchmarkResult(bench.name, params, bench.unit, 0, 0)
+                if pattern and pattern not in result.key:
+                    continue
+                try:
+                    function, result.unit_count = bench.setup(context, **params)
+                except SkipBenchmark as e:
+                    skipped[result.key] = str(e)
+                    continue
+                gc.collect()
+                result.number, result.times = _time(function, repeat, min_time)
+                results.append(result)
+                if progress is not None:
+                    progress(result)
+    finally:
+        if own_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return results, skipped
+
+
+def environment_info() -> Dict[str, Any]:
+    """Machine and revision details stored with every result file"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True,
+                                text=True, cwd=os.path.dirname(__file__),
+                                timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'system': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+    }
+
+
+def save_results(results: Sequence[BenchmarkResult], path: str,
+                 skipped: Optional[Dict[str, str]] = None,
+                 environment: Optional[Dict[str, Any]] = None):
+    """Write results (and the environment they ran in) as JSON"""
+    data = {
+        'version': RESULTS_VERSION,
+        'seed': BENCHMARK_SEED,
+        'environment': environment or environment_info(),
+        'results': [result.to_dict() for result in results],
+        'skipped': skipped or {},
+    }
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+
+def load_results(path: str) -> List[BenchmarkResult]:
+    """Read results written by save_results"""
+    with open(path, 'r') as f:
+        data = json.load(f)
+    if data.get('version') != RESULTS_VERSION:
+        raise ValueError(f"Unsupported benchmark results version: {data.get('version')}")
+    return [BenchmarkResult.from_dict(item) for item in data['results']]
+
+
+def compare_results(baseline: Sequence[BenchmarkResult],
+                    current: Sequence[BenchmarkResult]) -> List[Comparison]:
+    """
+    Pair up the cases present in both result sets
+
+    Returns:
+        Comparisons by key, slowest change first
+    """
+    base = {result.key: result for result in baseline}
+    comparisons = [Comparison(result.key, base[result.key].ns_per_unit, result.ns_per_unit)
+                   for result in current if result.key in base]
+    comparisons.sort(key=lambda comparison: comparison.ratio, reverse=True)
+    return comparisons
+
+
+def find_regressions(comparisons: Sequence[Comparison],
+                     threshold: float = REGRESSION_THRESHOLD) -> List[Comparison]:
+    """Comparisons more than threshold (a fraction) slower than the baseline"""
+    return [comparison for comparison in comparisons if comparison.ratio > 1 + threshold]
+
+
+def measure_import(statement: str, runs: int = IMPORT_RUNS) -> Tuple[float, bool]:
+    """
+    Time an import statement in fresh interpreters
+
+    Returns:
+        (best time in milliseconds, whether NumPy got imported)
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, (_REPOSITORY_ROOT,
+                                                      env.get('PYTHONPATH'))))
+    best = float('inf')
+    numpy_loaded = False
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', _IMPORT_PROBE.format(statement=statement)],
+                                capture_output=True, text=True, env=env, check=True).stdout
+        elapsed, loaded = output.split()
+        best = min(best, float(elapsed) * 1e3)
+        numpy_loaded = numpy_loaded or loaded == 'True'
+    return best, numpy_loaded
+
+
+def check_import_budgets(budgets=IMPORT_BUDGETS, runs: int = IMPORT_RUNS,
+                         progress: Optional[Callable[[str, float, bool], None]] = None
+                         ) -> List[str]:
+    """
+    Measure every import budget
+
+    Args:
+        budgets: (statement, milliseconds, NumPy allowed) triples
+        runs: Interpreters started per statement
+        progress: Called with each statement, its time and whether NumPy loaded
+
+    Returns:
+        One message per broken budget (empty if all are met)
+    """
+    failures = []
+    for statement, budget_ms, numpy_allowed in budgets:
+        elapsed_ms, numpy_loaded = measure_import(statement, runs)
+        if progress is not None:
+            progress(statement, elapsed_ms, numpy_loaded)
+        if elapsed_ms > budget_ms:
+            failures.append(f"{statement}: {elapsed_ms:.1f} ms (budget {budget_ms:.0f} ms)")
+        if numpy_loaded and not numpy_allowed:
+            failures.append(f"{statement}: imports NumPy")
+    return failures
+
+
+def _format_ns(ns: float) -> str:
+    for unit, scale in (('s', 1e9), ('ms', 1e6), ('us', 1e3)):
+        if ns >= scale:
+            return f'{ns / scale:.3g} {unit}'
+    return f'{ns:.3g} ns'
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Command line entry point; returns 1 if a comparison found regressions"""
+    arguments = argparse.ArgumentParser(description=__doc__.split('\n')[2])
+    arguments.add_argument('-k', '--filter', help="Only run cases containing this text")
+    arguments.add_argument('-o', '--output', help="Write results to this JSON file")
+    arguments.add_argument('-c', '--compare', help="Compare with a previous results file")
+    arguments.add_argument('--repeat', type=int, default=5, help="Timings per case")
+    arguments.add_argument('--min-time', type=float, default=0.1,
+                           help="Minimum seconds per timing")
+    arguments.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                           help="Slowdown fraction reported as a regression")
+    arguments.add_argument('--list', action='store_true', help="List benchmarks and exit")
+    arguments.add_argument('--check-imports', action='store_true',
+                           help="Check the import-time budgets and exit")
+    options = arguments.parse_args(argv)
+
+    if options.check_imports:
+        def report_import(statement: str, elapsed_ms: float, numpy_loaded: bool):
+            print(f'{statement:<70} {elapsed_ms:7.1f} ms'
+                  + (' (NumPy loaded)' if numpy_loaded else ''), flush=True)
+
+        failures = check_import_budgets(progress=report_import)
+        for failure in failures:
+            print(f'FAILED {failure}')
+        return 1 if failures else 0
+
+    if options.list:
+        for bench in BENCHMARKS.values():
+            print(f'{bench.name} ({bench.unit})')
+        return 0
+
+    def report(result: BenchmarkResult):
+        print(f'{result.key:<70} {_format_ns(result.ns_per_unit):>10}/{result.unit}', flush=True)
+
+    results, skipped = run_benchmarks(options.filter, options.repeat, options.min_time,
+                                      progress=report)
+    for key, reason in skipped.items():
+        print(f'{key:<70} skipped: {reason}')
+    if options.output:
+        save_results(results, options.output, skipped)
+
+    if options.compare:
+        comparisons = compare_results(load_results(options.compare), results)
+        regressions = find_regressions(comparisons, options.threshold)
+        print()
+        for comparison in comparisons:
+            marker = ' REGRESSION' if comparison in regressions else ''
+            print(f'{comparison.key:<70} {comparison.ratio:6.2f}x{marker}')
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,211 @@
+"""
+Chart Analysis for Rotaenot
+Density, movement and hold metrics with a derived difficulty estimate
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+
+from .chart_types import Chart, NoteArray, NoteType, NOTE_TYPES, NOTE_TYPE_CODES
+
+# Sliding window for peak metrics (seconds)
+PEAK_WINDOW = 1.0
+
+# Difficulty calibration: ChartParser's audio generators place
+# 2 + difficulty * 0.5 notes per second, so density alone maps back onto
+# the same scale; the other weights add levels for movement and holds
+BASE_NPS = 2.0
+NPS_PER_LEVEL = 0.5
+BURST_WEIGHT = 0.25  # Share of the peak-over-average density that counts
+TRAVEL_WEIGHT = 0.5  # Levels per full turn per second of angular travel
+HOLD_OVERLAP_WEIGHT = 1.0  # Levels for holds overlapping all the time
+SPECIAL_WEIGHT = 1.5  # Levels for a chart made only of flick/catch/rotation notes
+MIN_DIFFICULTY = 1
+MAX_DIFFICULTY = 14
+
+_SPECIAL_TYPES = (NoteType.FLICK, NoteType.CATCH, NoteType.ROTATION)
+
+
+@dataclass
+class ChartMetrics:
+    """Measured properties of one chart"""
+    note_count: int
+    duration: float  # Seconds from the first note to the last note's end
+    average_nps: float
+    peak_nps: float  # Most notes in any PEAK_WINDOW, per second
+    angular_travel: float  # Mean rotation between consecutive notes, degrees/s
+    peak_angular_travel: float  # Most rotation in any PEAK_WINDOW, degrees/s
+    hold_overlap: float  # Share of hold time with two or more holds active
+    max_simultaneous_holds: int
+    type_mix: Dict[str, float] = field(default_factory=dict)  # Share of each note type
+    estimated_difficulty: float = 0.0
+    declared_difficulty: Optional[int] = None
+    source: str = ''
+
+    @property
+    def difficulty_delta(self) -> Optional[float]:
+        """Estimated minus declared difficulty (None if nothing was declared)"""
+        if self.declared_difficulty is None:
+            return None
+        return self.estimated_difficulty - self.declared_difficulty
+
+
+class ChartAnalyzer:
+    """Compute ChartMetrics with a few vectorized passes over a NoteArray"""
+
+    def __init__(self, peak_window: float = PEAK_WINDOW):
+        """
+        Args:
+            peak_window: Sliding window for the peak metrics (seconds)
+        """
+        self.peak_window = peak_window
+
+    def analyze(self, chart: Union[Chart, NoteArray], source: str = '') -> ChartMetrics:
+        """
+        Measure a chart
+
+        Args:
+            chart: Chart (or bare notes) to analyze
+            source: Label stored in the metrics, such as the file path
+
+        Returns:
+            ChartMetrics including the difficulty estimate
+        """
+        declared = None
+        if isinstance(chart, Chart):
+            declared = chart.difficulty
+            notes = chart.note_array
+        else:
+            notes = chart
+
+        order = np.argsort(notes.time, kind='stable')
+        times = notes.time[order]
+        positions = notes.position[order]
+        count = len(times)
+        if not count:
+            return ChartMetrics(0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0,
+                                {note_type.value: 0.0 for note_type in NOTE_TYPES},
+                                float(MIN_DIFFICULTY), declared, source)
+
+        holds = notes.type_mask(NoteType.HOLD) & (notes.duration > 0)
+        ends = np.where(holds, notes.time + np.nan_to_num(notes.duration), notes.time)
+        duration = float(ends.max() - times[0])
+        span = max(duration, self.peak_window)
+
+        # Rotation needed to get from each note to the next, wrapped to 180°
+        step = np.abs(np.diff(positions)) % 360
+        travel = np.concatenate(([0.0], np.minimum(step, 360 - step)))
+        cumulative_travel = np.cumsum(travel)
+
+        # Notes (and travel) in the window starting at each note
+        window_end = np.searchsorted(times, times + self.peak_window, side='left')
+        window_counts = window_end - np.arange(count)
+        window_travel = cumulative_travel[window_end - 1] - cumulative_travel
+
+        overlap, max_holds = self._hold_overlap(notes.time[holds], ends[holds])
+        type_counts = np.bincount(notes.type_code, minlength=len(NOTE_TYPES))
+
+        metrics = ChartMetrics(
+            note_count=count,
+            duration=duration,
+            average_nps=count / span,
+            peak_nps=float(window_counts.max()) / self.peak_window,
+            angular_travel=float(cumulative_travel[-1]) / span,
+            peak_angular_travel=float(window_travel.max()) / self.peak_window,
+            hold_overlap=overlap,
+            max_simultaneous_holds=max_holds,
+            type_mix={note_type.value: float(type_counts[code]) / count
+                      for note_type, code in NOTE_TYPE_CODES.items()},
+            declared_difficulty=declared,
+            source=source
+        )
+        metrics.estimated_difficulty = self.estimate_difficulty(metrics)
+        return metrics
+
+    def analyze_many(self, charts: Iterable[Union[Chart, NoteArray]]) -> List[ChartMetrics]:
+        """Analyze several charts in order"""
+        return [self.analyze(chart) for chart in charts]
+
+    def analyze_directory(self, directory: str, parser=None,
+                          workers: Optional[int] = None,
+                          recursive: bool = False) -> List[ChartMetrics]:
+        """
+        Rate every chart in a directory
+
+        Files are parsed over the parser's process pool and analyzed here
+        as they arrive. Files that fail to parse are skipped.
+
+        Args:
+            directory: Directory to scan
+            parser: ChartParser to load with (defaults to a new one)
+            workers: Number of parsing processes (defaults to the CPU count)
+            recursive: Also scan subdirectories
+
+        Returns:
+            ChartMetrics sorted by file path, with source set to the path
+        """
+        if parser is None:
+            from .chart_parser import ChartParser
+            parser = ChartParser()
+
+        metrics = [self.analyze(result.chart, source=result.file_path)
+                   for result in parser.iter_directory(directory, workers=workers,
+                                                       validate=False,
+                                                       recursive=recursive)
+                   if result.ok]
+        metrics.sort(key=lambda item: item.source)
+        return metrics
+
+    def estimate_difficulty(self, metrics: ChartMetrics) -> float:
+        """
+        Map metrics onto the 1-14 difficulty scale
+
+        Density is scaled so that charts from ChartParser's audio generators
+        land on the level they were generated for. Bursts, rotation
+        between notes, overlapping holds and special note types add levels
+        on top.
+        """
+        if not metrics.note_count:
+            return float(MIN_DIFFICULTY)
+
+        effective_nps = (metrics.average_nps
+                         + BURST_WEIGHT * (metrics.peak_nps - metrics.average_nps))
+        special = sum(metrics.type_mix.get(note_type.value, 0.0)
+                      for note_type in _SPECIAL_TYPES)
+        level = ((effective_nps - BASE_NPS) / NPS_PER_LEVEL
+                 + TRAVEL_WEIGHT * metrics.angular_travel / 360
+                 + HOLD_OVERLAP_WEIGHT * metrics.hold_overlap
+                 + SPECIAL_WEIGHT * special)
+        return float(np.clip(level, MIN_DIFFICULTY, MAX_DIFFICULTY))
+
+    @staticmethod
+    def _hold_overlap(starts: np.ndarray, ends: np.ndarray):
+        """Share of hold time with 2+ holds active, and the most at once"""
+        if not len(starts):
+            return 0.0, 0
+
+        times = np.concatenate((starts, ends))
+        deltas = np.concatenate((np.ones(len(starts)), -np.ones(len(ends))))
+        # Ends sort before starts at the same time: back-to-back holds don't overlap
+        order = np.lexsort((deltas, times))
+        times = times[order]
+        active = np.cumsum(deltas[order])
+        spans = np.diff(times)
+
+        held = spans[active[:-1] >= 1].sum()
+        overlapped = spans[active[:-1] >= 2].sum()
+        return (float(overlapped / held) if held > 0 else 0.0), int(active.max())
+
+
+def check_difficulty(metrics: ChartMetrics, tolerance: float = 2.0) -> bool:
+    """
+    Whether a chart's declared level is plausible
+
+    Returns:
+        True if the estimate is within tolerance levels of the declared
+        difficulty (or nothing was declared)
+    """
+    delta = metrics.difficulty_delta
+    return delta is None or abs(delta) <= tolerance
@@ -0,0 +1,112 @@
+"""
+Binary Chart Format for Rotaenot
+Compact, versioned chart files that load through a memory map without copying
+
+Layout (little-endian):
+    header    32 bytes: magic, version, record size, note count,
+              metadata size, notes offset
+    metadata  UTF-8 JSON with the chart fields and the direction table
+    notes     packed NOTE_DTYPE records, 8-byte aligned
+"""
+
+import json
+import struct
+from typing import Dict, Any
+
+import numpy as np
+
+from .chart_types import NOTE_DTYPE, NoteArray, Chart
+
+BINARY_MAGIC = b'RTNC'
+BINARY_VERSION = 1
+BINARY_EXTENSION = '.rtnc'
+
+_HEADER = struct.Struct('<4sHHQQQ')
+_FILE_NOTE_DTYPE = NOTE_DTYPE.newbyteorder('<')
+
+
+def is_binary_chart(file_path: str) -> bool:
+    """Check whether a file starts with the binary chart magic"""
+    try:
+        with open(file_path, 'rb') as f:
+            return f.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+    except OSError:
+        return False
+
+
+def write_binary_chart(chart: Chart, file_path: str):
+    """
+    Write a chart in the binary format
+
+    Args:
+        chart: Chart to save
+        file_path: Destination path
+    """
+    notes = chart.note_array
+    metadata = json.dumps({
+        'title': chart.title,
+        'artist': chart.artist,
+        'bpm': chart.bpm,
+        'difficulty': chart.difficulty,
+        'audio_file': chart.audio_file,
+        'preview_time': chart.preview_time,
+        'offset': chart.offset,
+        'directions': notes.directions
+    }).encode('utf-8')
+
+    metadata_end = _HEADER.size + len(metadata)
+    notes_offset = (metadata_end + 7) & ~7
+    header = _HEADER.pack(BINARY_MAGIC, BINARY_VERSION, _FILE_NOTE_DTYPE.itemsize,
+                          len(notes), len(metadata), notes_offset)
+
+    with open(file_path, 'wb') as f:
+        f.write(header)
+        f.write(metadata)
+        f.write(b'\0' * (notes_offset - metadata_end))
+        f.write(notes.data.astype(_FILE_NOTE_DTYPE, copy=False).tobytes())
+
+
+def read_binary_chart(file_path: str) -> Chart:
+    """
+    Load a binary chart, memory-mapping the note records
+
+    Args:
+        file_path: Path to the binary chart
+
+    Returns:
+        Chart whose notes are a NoteArray backed by the file
+    """
+    with open(file_path, 'rb') as f:
+        header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise ValueError(f"Truncated binary chart: {file_path}")
+
+        magic, version, record_size, count, metadata_size, notes_offset = \
+            _HEADER.unpack(header)
+        if magic != BINARY_MAGIC:
+            raise ValueError(f"Not a binary chart file: {file_path}")
+        if version != BINARY_VERSION:
+            raise ValueError(f"Unsupported binary chart version {version}: {file_path}")
+        if record_size != _FILE_NOTE_DTYPE.itemsize:
+            raise ValueError(f"Unexpected note record size {record_size}: {file_path}")
+
+        metadata: Dict[str, Any] = json.loads(f.read(metadata_size).decode('utf-8'))
+
+    if count:
+        data = np.memmap(file_path, dtype=_FILE_NOTE_DTYPE, mode='r',
+                         offset=notes_offset, shape=(count,))
+        if data.dtype != NOTE_DTYPE:
+            data = data.astype(NOTE_DTYPE)  # Big-endian hosts need a copy
+    else:
+        data = np.zeros(0, dtype=NOTE_DTYPE)
+
+    return Chart(
+        title=metadata['title'],
+        artist=metadata['artist'],
+        bpm=metadata['bpm'],
+        difficulty=metadata['difficulty'],
+        notes=NoteArray(data, metadata.get('directions', [])),
+        audio_file=metadata['audio_file'],
+        preview_time=metadata.get('preview_time', 0.0),
+        offset=metadata.get('offset', 0.0)
+    )
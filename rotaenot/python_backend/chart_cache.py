@@ -0,0 +1,191 @@
+"""
+Parsed Chart Cache for Rotaenot
+LRU memory cache of parsed charts with an optional on-disk binary layer
+"""
+
+import hashlib
+import os
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Callable, List, Optional, Tuple
+
+from .chart_types import Chart, Note, NoteArray
+from .chart_binary import BINARY_EXTENSION, read_binary_chart, write_binary_chart
+
+# Approximate memory of one materialized Note object (instance plus fields)
+_NOTE_OBJECT_BYTES = 200
+
+
+@dataclass
+class CacheStats:
+    """Counters for cache activity"""
+    hits: int = 0  # Served from memory after a stat call
+    disk_hits: int = 0  # Loaded from the on-disk layer
+    misses: int = 0  # Parsed from the source file
+    evictions: int = 0  # Entries dropped to respect max_bytes
+
+
+@dataclass
+class _CacheEntry:
+    mtime_ns: int
+    size: int
+    digest: str
+    chart: Chart
+    nbytes: int
+    note_list: Optional[List[Note]] = None  # Built on the first list-of-Note load
+
+
+class ChartCache:
+    """
+    Cache of parsed charts keyed by path, modification time, size and content hash
+
+    A memory hit costs one os.stat call. When the file changed on disk (or
+    is not in memory) its content hash is used to look up a pre-parsed
+    binary copy in the disk layer before falling back to a full parse.
+    Cached charts hold read-only NoteArrays and are shared between callers.
+    Charts loaded as lists of Note are materialized once per entry; every
+    caller gets its own list, but the Note objects in it are shared and
+    must not be modified.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024,
+                 disk_dir: Optional[str] = None):
+        """
+        Args:
+            max_bytes: Memory budget for cached charts
+            disk_dir: Directory for pre-parsed binary charts (None disables it)
+        """
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.stats = CacheStats()
+        self.current_bytes = 0
+        self._entries: 'OrderedDict[str, _CacheEntry]' = OrderedDict()
+
+        if disk_dir is not None:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def load(self, file_path: str, parse: Callable[[str], Chart],
+             columnar: bool = True) -> Chart:
+        """
+        Return the cached chart for a file, parsing it on a miss
+
+        Args:
+            file_path: Path to the chart file
+            parse: Function that parses the file into a columnar Chart
+            columnar: Return notes as the cached NoteArray instead of a
+                list of Note
+
+        Returns:
+            Chart sharing the cached (read-only) notes
+        """
+        key = os.path.abspath(file_path)
+        stat = os.stat(key)
+
+        entry = self._entries.get(key)
+        if entry is not None and (entry.mtime_ns, entry.size) == (stat.st_mtime_ns,
+                                                                 stat.st_size):
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+        else:
+            digest = self._hash_file(key)
+            if entry is not None and entry.digest == digest:
+                # Touched but unchanged: refresh the stat key and keep the chart
+                chart, note_list = entry.chart, entry.note_list
+                self.stats.hits += 1
+            else:
+                chart, from_disk = self._load_uncached(key, digest, parse)
+                note_list = None
+                if from_disk:
+                    self.stats.disk_hits += 1
+                else:
+                    self.stats.misses += 1
+
+            entry = _CacheEntry(stat.st_mtime_ns, stat.st_size, digest, chart,
+                                _chart_nbytes(chart, note_list), note_list)
+            self._store(key, entry)
+
+        if columnar:
+            return replace(entry.chart)
+        if entry.note_list is None:
+            entry.note_list = entry.chart.notes.to_notes()
+            extra = len(entry.note_list) * _NOTE_OBJECT_BYTES
+            entry.nbytes += extra
+            self.current_bytes += extra
+            self._evict()
+        return replace(entry.chart, notes=list(entry.note_list))
+
+    def invalidate(self, file_path: str):
+        """Drop a file from the memory layer"""
+        entry = self._entries.pop(os.path.abspath(file_path), None)
+        if entry is not None:
+            self.current_bytes -= entry.nbytes
+
+    def clear(self):
+        """Drop every entry from the memory layer"""
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, file_path: str) -> bool:
+        return os.path.abspath(file_path) in self._entries
+
+    def _load_uncached(self, file_path: str, digest: str,
+                       parse: Callable[[str], Chart]) -> Tuple[Chart, bool]:
+        """Load from the disk layer if possible, otherwise parse the source"""
+        disk_path = self._disk_path(digest)
+        if disk_path is not None and os.path.exists(disk_path):
+            try:
+                return read_binary_chart(disk_path), True
+            except ValueError:
+                pass  # Stale or foreign file; re-parse and overwrite it
+
+        chart = parse(file_path)
+        chart.notes = NoteArray.from_notes(chart.notes)
+        chart.notes.data.flags.writeable = False
+
+        if disk_path is not None:
+            # Write then rename so readers never see a partial file
+            temp_path = f"{disk_path}.{os.getpid()}.tmp"
+            write_binary_chart(chart, temp_path)
+            os.replace(temp_path, disk_path)
+        return chart, False
+
+    def _store(self, key: str, entry: _CacheEntry):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.current_bytes -= old.nbytes
+
+        self._entries[key] = entry
+        self.current_bytes += entry.nbytes
+        self._evict()
+
+    def _evict(self):
+        """Evict least recently used entries, but always keep the newest one"""
+        while self.current_bytes > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self.current_bytes -= evicted.nbytes
+            self.stats.evictions += 1
+
+    def _disk_path(self, digest: str) -> Optional[str]:
+        if self.disk_dir is None:
+            return None
+        return os.path.join(self.disk_dir, digest + BINARY_EXTENSION)
+
+    @staticmethod
+    def _hash_file(file_path: str) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+
+def _chart_nbytes(chart: Chart, note_list: Optional[List[Note]] = None) -> int:
+    """Approximate memory held by a cached chart and its materialized notes"""
+    notes = chart.notes
+    text = (len(chart.title) + len(chart.artist) + len(chart.audio_file)
+            + sum(len(direction) for direction in notes.directions))
+    materialized = len(note_list) * _NOTE_OBJECT_BYTES if note_list is not None else 0
+    return notes.data.nbytes + text + materialized + 256
@@ -0,0 +1,310 @@
+"""
+Procedural Chart Generator for Rotaenot
+Seeded composition of note patterns into charts, one column block per pattern
+"""
+
+import math
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, Optional, Sequence, Union
+
+import numpy as np
+
+from .chart_types import Chart, NoteArray, NoteType, NOTE_TYPE_CODES
+from .timing import TimingMap
+
+TRACK_COUNT = 6
+TRACK_WIDTH = 360.0 / TRACK_COUNT
+
+# Direction table of generated NoteArrays (flick direction codes index it)
+DIRECTIONS = ('cw', 'ccw')
+
+_TAP = NOTE_TYPE_CODES[NoteType.TAP]
+_HOLD = NOTE_TYPE_CODES[NoteType.HOLD]
+_CATCH = NOTE_TYPE_CODES[NoteType.CATCH]
+_FLICK = NOTE_TYPE_CODES[NoteType.FLICK]
+_ROTATION = NOTE_TYPE_CODES[NoteType.ROTATION]
+
+
+@dataclass
+class PatternBlock:
+    """
+    Notes of one pattern instance, timed in beats from the block start
+
+    Optional columns are left as None when no note in the block uses them.
+    """
+    beat: np.ndarray
+    position: np.ndarray  # Degrees; NaN for catches placed by a rotation section
+    type_code: int  # Type of every note in the block, unless overridden
+    duration: Optional[np.ndarray] = None  # In beats, NaN if not a hold
+    direction: Optional[np.ndarray] = None  # Index into DIRECTIONS, -1 if missing
+    rotation_speed: Optional[np.ndarray] = None  # Degrees per second
+    type_codes: Optional[np.ndarray] = None  # Per-note types for mixed blocks
+
+
+# A pattern fills length beats with notes spaced step beats apart
+Pattern = Callable[[np.random.Generator, float, float], PatternBlock]
+
+_STREAM_MOVES = np.array([-2, -1, 1, 2])
+
+
+def _steps(length: float, step: float) -> np.ndarray:
+    return np.arange(0.0, length - 1e-9, step)
+
+
+def _tracks_to_positions(tracks: np.ndarray) -> np.ndarray:
+    return (tracks % TRACK_COUNT) * TRACK_WIDTH
+
+
+def _sign(rng: np.random.Generator) -> float:
+    return 1.0 if rng.random() < 0.5 else -1.0
+
+
+def stream_pattern(rng: np.random.Generator, length: float, step: float) -> PatternBlock:
+    """Taps on every step, walking one or two tracks at a time"""
+    beat = _steps(length, step)
+    moves = _STREAM_MOVES[rng.integers(4, size=len(beat))]
+    moves[:1] = rng.integers(TRACK_COUNT)
+    return PatternBlock(beat, _tracks_to_positions(np.cumsum(moves)), _TAP)
+
+
+def jack_pattern(rng: np.random.Generator, length: float, step: float) -> PatternBlock:
+    """Repeated taps on one track, jumping to a new track every few notes"""
+    beat = _steps(length, step)
+    group = np.arange(len(beat)) // int(rng.integers(2, 5))
+    tracks = rng.integers(TRACK_COUNT, size=len(beat))[group]
+    return PatternBlock(beat, _tracks_to_positions(tracks), _TAP)
+
+
+def sweep_pattern(rng: np.random.Generator, length: float, step: float) -> PatternBlock:
+    """Catch notes following a steady rotation around the ring"""
+    beat = _steps(length, step)
+    start = rng.uniform(0, 360)
+    rate = rng.uniform(45, 180) * _sign(rng)  # Degrees per beat
+    return PatternBlock(beat, start + rate * beat, _CATCH)
+
+
+def rotation_pattern(rng: np.random.Generator, length: float, step: float) -> PatternBlock:
+    """A rotation section spanning the block, with catch notes along its path"""
+    beat = _steps(length, max(step, 1.0))
+    count = len(beat)
+    position = np.full(count, np.nan)  # Placed once beats are converted to seconds
+    position[0] = rng.uniform(0, 360)
+    type_codes = np.full(count, _CATCH, dtype=np.uint8)
+    type_codes[0] = _ROTATION
+    duration = np.full(count, np.nan)
+    duration[0] = length
+    rotation_speed = np.full(count, np.nan)
+    rotation_speed[0] = rng.uniform(90, 360) * _sign(rng)
+    return PatternBlock(beat, position, _CATCH, duration=duration,
+                        rotation_speed=rotation_speed, type_codes=type_codes)
+
+
+def hold_chord_pattern(rng: np.random.Generator, length: float, step: float) -> PatternBlock:
+    """
+    Rolled chords of two or three holds on distinct tracks
+
+    The holds of a chord start one step apart (so no two notes share a
+    time) and are all released together.
+    """
+    size = int(rng.integers(2, 4))
+    span = min(max(2.0, 2 * size * step), length)
+    chord_starts = np.arange(max(int(length / span + 1e-9), 1)) * span
+    # Every hold of a chord must start before the chord is released
+    size = min(size, math.ceil(0.75 * span / step))
+    tracks = np.argsort(rng.random((len(chord_starts), TRACK_COUNT)), axis=1)[:, :size]
+    roll = np.tile(np.arange(size) * step, len(chord_starts))
+    return PatternBlock(beat=np.repeat(chord_starts, size) + roll,
+                        position=_tracks_to_positions(tracks.ravel()),
+                        type_code=_HOLD,
+                        duration=0.75 * span - roll)
+
+
+def flick_pattern(rng: np.random.Generator, length: float, step: float) -> PatternBlock:
+    """Flicks on every other step, alternating direction"""
+    beat = _steps(length, 2 * step)
+    tracks = rng.integers(TRACK_COUNT, size=len(beat))
+    direction = (np.arange(len(beat)) + int(rng.integers(2))) % 2
+    return PatternBlock(beat, _tracks_to_positions(tracks), _FLICK, direction=direction)
+
+
+PATTERNS: Dict[str, Pattern] = {
+    'stream': stream_pattern,
+    'jack': jack_pattern,
+    'sweep': sweep_pattern,
+    'rotation': rotation_pattern,
+    'hold_chord': hold_chord_pattern,
+    'flick': flick_pattern,
+}
+
+# Relative frequency of each pattern
+DEFAULT_WEIGHTS = {
+    'stream': 4.0,
+    'jack': 1.5,
+    'sweep': 1.5,
+    'rotation': 0.5,
+    'hold_chord': 1.0,
+    'flick': 1.0,
+}
+
+
+class ChartGenerator:
+    """
+    Build charts by composing patterns drawn from a seeded RNG
+
+    A chart is a run of one- or two-bar blocks; each block is one pattern
+    generated as NumPy columns in beats, and the concatenated columns are
+    converted to seconds through a TimingMap in one vectorized pass. The
+    same seed always produces the same chart.
+    """
+
+    def __init__(self, patterns: Optional[Dict[str, Pattern]] = None,
+                 weights: Optional[Dict[str, float]] = None,
+                 beats_per_block: Sequence[int] = (4, 8)):
+        """
+        Args:
+            patterns: Pattern library (defaults to PATTERNS)
+            weights: Relative frequency per pattern name (defaults to
+                DEFAULT_WEIGHTS, or equal weights for a custom library)
+            beats_per_block: Block lengths to choose from, in beats
+        """
+        self.patterns = dict(PATTERNS if patterns is None else patterns)
+        if weights is None:
+            weights = DEFAULT_WEIGHTS if patterns is None else {}
+        self.names = list(self.patterns)
+        probabilities = np.array([weights.get(name, 1.0) for name in self.names])
+        if not len(self.names) or probabilities.sum() <= 0:
+            raise ValueError("Need at least one pattern with a positive weight")
+        self.probabilities = probabilities / probabilities.sum()
+        self._cumulative = np.cumsum(self.probabilities)
+        self._cumulative[-1] = 1.0
+        self.beats_per_block = np.array(beats_per_block, dtype=np.float64)
+
+    def generate(self, duration: float, difficulty: int = 5,
+                 seed: Union[int, np.random.SeedSequence, None] = None,
+                 bpm: float = 120.0, timing: Optional[TimingMap] = None,
+                 title: str = "Generated Chart") -> Chart:
+        """
+        Generate one chart
+
+        Args:
+            duration: Approximate chart length in seconds
+            difficulty: Level (1-14); sets the note spacing
+            seed: RNG seed; equal seeds give equal charts
+            bpm: Tempo when no timing map is given
+            timing: Tempo map to place beats with
+            title: Chart title
+
+        Returns:
+            Chart with columnar notes sorted by time
+        """
+        rng = np.random.default_rng(seed)
+        timing = timing or TimingMap.constant(bpm)
+        total_beats = float(timing.seconds_to_beats(timing.start_times[0] + duration))
+        step = self._step(difficulty, float(timing.bpms[0]))
+
+        # Choose every block up front
+        count = int(np.ceil(total_beats / self.beats_per_block.min())) + 1
+        lengths = self.beats_per_block[rng.integers(len(self.beats_per_block), size=count)]
+        starts = np.concatenate(([0.0], np.cumsum(lengths)[:-1]))
+        used = starts < total_beats
+        lengths = np.minimum(lengths[used], total_beats - starts[used])
+        starts = starts[used]
+        kinds = np.searchsorted(self._cumulative, rng.random(len(starts)), side='right')
+
+        patterns = [self.patterns[name] for name in self.names]
+        blocks = [patterns[kind](rng, length, step)
+                  for kind, length in zip(kinds.tolist(), lengths.tolist())]
+
+        return Chart(
+            title=title,
+            artist="Procedural",
+            bpm=float(timing.bpms[0]),
+            difficulty=difficulty,
+            notes=self._to_notes(blocks, starts, timing),
+            audio_file=""
+        )
+
+    def generate_many(self, count: int, duration: float, difficulty: int = 5,
+                      seed: Optional[int] = None, **options) -> Iterator[Chart]:
+        """
+        Generate a series of distinct, reproducible charts
+
+        Each chart gets an independent child seed of seed, so chart i is
+        the same no matter how many charts are generated.
+
+        Args:
+            count: Number of charts
+            duration: Approximate chart length in seconds
+            difficulty: Level (1-14)
+            seed: Root seed
+            **options: Passed through to generate
+
+        Yields:
+            Charts titled "Generated Chart <i>"
+        """
+        for index, child in enumerate(np.random.SeedSequence(seed).spawn(count)):
+            yield self.generate(duration, difficulty, seed=child,
+                                title=f"Generated Chart {index}", **options)
+
+    @staticmethod
+    def _step(difficulty: int, bpm: float) -> float:
+        """
+        Beats between notes for a difficulty
+
+        Aims for the 2 + difficulty * 0.5 notes per second of ChartParser's
+        audio generators, rounded to a whole beat count or a 1/n beat.
+        """
+        notes_per_beat = (2 + difficulty * 0.5) * 60 / bpm
+        if notes_per_beat >= 1:
+            return 1.0 / round(notes_per_beat)
+        return float(round(1 / notes_per_beat))
+
+    @staticmethod
+    def _to_notes(blocks: Sequence[PatternBlock], block_starts: np.ndarray,
+                  timing: TimingMap) -> NoteArray:
+        """Concatenate pattern blocks and convert beats to seconds"""
+        sizes = [len(block.beat) for block in blocks]
+        total = sum(sizes)
+        beat = np.repeat(block_starts, sizes)
+        if total:
+            beat += np.concatenate([block.beat for block in blocks])
+        position = np.concatenate([block.position for block in blocks] or [np.zeros(0)])
+        type_code = np.repeat(np.array([block.type_code for block in blocks], dtype=np.uint8),
+                              sizes)
+        duration = np.full(total, np.nan)
+        direction = np.full(total, -1, dtype=np.int32)
+        rotation_speed = np.full(total, np.nan)
+
+        # Optional columns are only present on a few blocks
+        offset = 0
+        for block, size in zip(blocks, sizes):
+            part = slice(offset, offset + size)
+            if block.type_codes is not None:
+                type_code[part] = block.type_codes
+            if block.duration is not None:
+                duration[part] = block.duration
+            if block.direction is not None:
+                direction[part] = block.direction
+            if block.rotation_speed is not None:
+                rotation_speed[part] = block.rotation_speed
+            offset += size
+
+        time = timing.beats_to_seconds(beat)
+        held = ~np.isnan(duration)
+        duration[held] = timing.beats_to_seconds(beat[held] + duration[held]) - time[held]
+
+        # Catch notes inside a rotation section sit where the rotation is
+        pending = np.flatnonzero(np.isnan(position))
+        if len(pending):
+            rotations = np.flatnonzero(type_code == _ROTATION)
+            owner = rotations[np.searchsorted(rotations, pending, side='right') - 1]
+            position[pending] = position[owner] + rotation_speed[owner] * (time[pending]
+                                                                            - time[owner])
+        position = np.mod(position, 360.0)
+        position[position >= 360.0] = 0.0  # mod of tiny negatives rounds up to 360
+
+        order = np.argsort(time, kind='stable')
+        return NoteArray.from_columns(time[order], position[order], type_code[order],
+                                      duration=duration[order], direction=direction[order],
+                                      rotation_speed=rotation_speed[order],
+                                      directions=DIRECTIONS)
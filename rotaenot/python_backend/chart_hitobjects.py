@@ -0,0 +1,164 @@
+"""
+Hit Object Chart Formats for Rotaenot
+Line-oriented osu!-style charts (.osu files and bare CSV hit object lists)
+
+Each hit object line is "x,y,time,type,hitSound[,params...]" with x in
+osu! playfield pixels (0-512) and time in milliseconds. The columns are
+split in bulk with np.loadtxt; only hold/spinner end times are read per line.
+"""
+
+import os
+import re
+from typing import Dict, List
+
+import numpy as np
+
+from .chart_types import NoteType, NoteArray, Chart, NOTE_TYPE_CODES
+
+OSU_PLAYFIELD_WIDTH = 512.0
+
+# Hit object type bits (same priority order as universal_chart_loader.gd)
+_TYPE_CIRCLE = 1
+_TYPE_SLIDER = 2
+_TYPE_SPINNER = 8
+_TYPE_HOLD = 128
+
+_SECTION_PATTERN = re.compile(r'^\[(\w+)\]\s*$', re.MULTILINE)
+
+
+def read_osu_chart(file_path: str) -> Chart:
+    """
+    Parse an osu! beatmap file
+
+    Args:
+        file_path: Path to the .osu file
+
+    Returns:
+        Chart with a NoteArray of the [HitObjects] section
+    """
+    with open(file_path, 'r', encoding='utf-8-sig') as f:
+        text = f.read()
+
+    # re.split yields [preamble, name, body, name, body, ...]
+    parts = _SECTION_PATTERN.split(text)
+    sections = dict(zip(parts[1::2], parts[2::2]))
+
+    general = _key_values(sections.get('General', ''))
+    metadata = _key_values(sections.get('Metadata', ''))
+    difficulty = _key_values(sections.get('Difficulty', ''))
+    preview_ms = float(general.get('PreviewTime', -1))
+
+    return Chart(
+        title=metadata.get('Title', os.path.splitext(os.path.basename(file_path))[0]),
+        artist=metadata.get('Artist', 'Unknown'),
+        bpm=_first_bpm(sections.get('TimingPoints', '')),
+        difficulty=max(1, round(float(difficulty.get('OverallDifficulty', 1)))),
+        notes=parse_hitobjects(sections.get('HitObjects', '').splitlines()),
+        audio_file=general.get('AudioFilename', ''),
+        preview_time=preview_ms / 1000 if preview_ms >= 0 else 0.0
+    )
+
+
+def read_csv_chart(file_path: str) -> Chart:
+    """
+    Parse a bare list of hit object lines (.chart/.csv/.txt)
+
+    Args:
+        file_path: Path to the chart file
+
+    Returns:
+        Chart with default metadata, titled after the file name
+    """
+    with open(file_path, 'r', encoding='utf-8-sig') as f:
+        lines = f.read().splitlines()
+
+    return Chart(
+        title=os.path.splitext(os.path.basename(file_path))[0],
+        artist='Unknown',
+        bpm=120,
+        difficulty=1,
+        notes=parse_hitobjects(lines),
+        audio_file=''
+    )
+
+
+def parse_hitobjects(lines: List[str]) -> NoteArray:
+    """
+    Convert hit object lines to a time-sorted NoteArray
+
+    Circles become taps, mania holds become holds, sliders become flicks
+    and spinners become rotation sections; holds and spinners take their
+    duration from the end time field.
+
+    Args:
+        lines: Raw hit object lines (blank or short lines are skipped)
+
+    Returns:
+        NoteArray with positions in degrees and times in seconds
+    """
+    rows = [line for line in lines if line.count(',') >= 4]
+    if not rows:
+        return NoteArray()
+
+    x, time_ms, kind = np.loadtxt(rows, delimiter=',', usecols=(0, 2, 3),
+                                  dtype=np.float64, ndmin=2).T
+    kind = kind.astype(np.int64)
+
+    is_tap = (kind & _TYPE_CIRCLE) != 0
+    is_hold = ~is_tap & ((kind & _TYPE_HOLD) != 0)
+    is_flick = ~is_tap & ~is_hold & ((kind & _TYPE_SLIDER) != 0)
+    is_rotation = ~is_tap & ~is_hold & ~is_flick & ((kind & _TYPE_SPINNER) != 0)
+
+    type_code = np.full(len(rows), NOTE_TYPE_CODES[NoteType.TAP], dtype=np.uint8)
+    type_code[is_hold] = NOTE_TYPE_CODES[NoteType.HOLD]
+    type_code[is_flick] = NOTE_TYPE_CODES[NoteType.FLICK]
+    type_code[is_rotation] = NOTE_TYPE_CODES[NoteType.ROTATION]
+
+    # End times live in the sixth field ("endTime:hitSample" for holds)
+    duration = np.full(len(rows), np.nan)
+    timed = np.flatnonzero(is_hold | is_rotation)
+    if len(timed):
+        end_ms = np.array([_end_time(rows[i]) for i in timed.tolist()])
+        duration[timed] = (end_ms - time_ms[timed]) / 1000
+
+    order = np.argsort(time_ms, kind='stable')
+    return NoteArray.from_columns(
+        time=time_ms[order] / 1000,
+        position=(x[order] * (360.0 / OSU_PLAYFIELD_WIDTH)) % 360,
+        type_code=type_code[order],
+        duration=duration[order]
+    )
+
+
+def _end_time(line: str) -> float:
+    """Read the end time of a hold or spinner line (NaN if missing)"""
+    fields = line.split(',', 6)
+    if len(fields) < 6 or not fields[5]:
+        return np.nan
+    return float(fields[5].partition(':')[0])
+
+
+def _key_values(section: str) -> Dict[str, str]:
+    """Parse "Key: Value" lines of an .osu section"""
+    values = {}
+    for line in section.splitlines():
+        key, sep, value = line.partition(':')
+        if sep and not line.startswith('//'):
+            values[key.strip()] = value.strip()
+    return values
+
+
+def _first_bpm(section: str) -> float:
+    """BPM of the first uninherited timing point (120 if there is none)"""
+    for line in section.splitlines():
+        line = line.strip()
+        if not line or line.startswith('//'):
+            continue
+        fields = line.split(',')
+        try:
+            beat_length = float(fields[1])
+        except (IndexError, ValueError):
+            continue  # Not a timing point
+        if beat_length > 0:
+            return 60000.0 / beat_length
+    return 120
@@ -4,82 +4,199 @@ Handles beatmap/chart file parsing and generation
 """
 
 import json
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
-from enum import Enum
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from functools import partial
+from typing import List, Dict, Any, Optional, Iterator, Union
 import numpy as np
 
+from .chart_types import NoteType, Note, NoteArray, Chart, NOTE_TYPE_CODES
+from .chart_stream import ChartStream
+from .chart_binary import (BINARY_EXTENSION, is_binary_chart,
+                           read_binary_chart, write_binary_chart)
+from .chart_hitobjects import read_osu_chart, read_csv_chart
+from .chart_validation import ChartValidator, ValidationReport
+from .chart_cache import ChartCache
+from .audio_analysis import AudioAnalyzer, StreamingAudioAnalyzer, read_wav, stream_wav
 
-class NoteType(Enum):
-    TAP = "tap"
-    HOLD = "hold"
-    CATCH = "catch"
-    FLICK = "flick"
-    ROTATION = "rotation"
+# Bare hit object lists in the layout used by universal_chart_loader.gd
+CSV_FORMATS = ('.txt', '.chart', '.csv')
 
-
-@dataclass
-class Note:
-    """Represents a single note in the chart"""
-    time: float  # Time in seconds
-    position: float  # Angular position (0-360 degrees)
-    note_type: NoteType
-    duration: Optional[float] = None  # For hold notes
-    direction: Optional[str] = None  # For flick notes
-    rotation_speed: Optional[float] = None  # For rotation sections
+# Track orders used for generated charts (zigzag, linear, outside-in, middle-out)
+_TRACK_PATTERNS = np.array([
+    [0, 3, 1, 4, 2, 5],
+    [0, 1, 2, 3, 4, 5],
+    [0, 5, 1, 4, 2, 3],
+    [2, 3, 1, 4, 0, 5],
+])
 
 
 @dataclass
-class Chart:
-    """Represents a complete chart/beatmap"""
-    title: str
-    artist: str
-    bpm: float
-    difficulty: int
-    notes: List[Note]
-    audio_file: str
-    preview_time: float = 0.0
-    offset: float = 0.0  # Audio offset in ms
+class ChartLoadResult:
+    """Outcome of loading one chart file in a batch"""
+    file_path: str
+    chart: Optional[Chart] = None  # None if parsing failed or charts were dropped
+    validation_errors: List[str] = field(default_factory=list)
+    error: Optional[str] = None  # Parse failure message
+    parse_time: float = 0.0  # Seconds
+    validate_time: float = 0.0  # Seconds
+
+    @property
+    def ok(self) -> bool:
+        """True if the chart parsed and passed validation"""
+        return self.error is None and not self.validation_errors
+
+
+def _load_chart_file(file_path: str, validator: Optional[ChartValidator],
+                     keep_chart: bool, columnar: bool) -> ChartLoadResult:
+    """Parse and validate one chart (runs inside batch worker processes)"""
+    parser = ChartParser(validator or ChartValidator())
+    result = ChartLoadResult(file_path)
+
+    start = time.perf_counter()
+    try:
+        chart = parser.parse_chart(file_path, columnar=columnar)
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+        return result
+    finally:
+        result.parse_time = time.perf_counter() - start
+
+    if validator is not None:
+        start = time.perf_counter()
+        result.validation_errors = parser.validate_chart(chart)
+        result.validate_time = time.perf_counter() - start
+
+    if keep_chart:
+        if isinstance(chart.notes, NoteArray):
+            # Detach memory-mapped notes so the chart can be sent back
+            chart.notes = NoteArray(np.array(chart.notes.data), chart.notes.directions)
+        result.chart = chart
+    return result
 
 
 class ChartParser:
     """Parse and generate chart files for the rhythm game"""
 
-    def __init__(self):
-        self.supported_formats = ['.json', '.txt', '.osu']
+    def __init__(self, validator: Optional[ChartValidator] = None,
+                 cache: Optional[ChartCache] = None):
+        """
+        Args:
+            validator: Rules used by validate_chart (defaults to the built-in set)
+            cache: Opt-in cache of parsed charts used by parse_chart
+        """
+        self.validator = validator or ChartValidator()
+        self.cache = cache
+        self.supported_formats = ['.json', '.txt', '.osu', '.chart', '.csv',
+                                  BINARY_EXTENSION]
 
-    def parse_chart(self, file_path: str) -> Chart:
+    def parse_chart(self, file_path: str, columnar: bool = False) -> Chart:
         """
         Parse a chart file and return a Chart object
 
         Args:
             file_path: Path to the chart file
+            columnar: Store notes as a NoteArray instead of a list of Note
+                (binary charts always load as a memory-mapped NoteArray)
 
         Returns:
             Chart object containing all beatmap data
         """
+        if self.cache is not None:
+            return self.cache.load(file_path, partial(self._parse_chart_file, columnar=True),
+                                   columnar)
+        return self._parse_chart_file(file_path, columnar)
+
+    def _parse_chart_file(self, file_path: str, columnar: bool) -> Chart:
+        """Parse a chart file by format, bypassing the cache"""
         if file_path.endswith('.json'):
-            return self._parse_json_chart(file_path)
+            return self._parse_json_chart(file_path, columnar)
+        elif file_path.endswith('.osu'):
+            return self._columns_to_chart(read_osu_chart(file_path), columnar)
+        elif file_path.endswith(CSV_FORMATS):
+            return self._columns_to_chart(read_csv_chart(file_path), columnar)
+        elif file_path.endswith(BINARY_EXTENSION) or is_binary_chart(file_path):
+            return read_binary_chart(file_path)
         else:
             raise ValueError(f"Unsupported chart format: {file_path}")
 
-    def _parse_json_chart(self, file_path: str) -> Chart:
+    def parse_note_array(self, file_path: str) -> NoteArray:
+        """
+        Parse only the notes of a chart file into columnar form
+
+        Args:
+            file_path: Path to the chart file
+
+        Returns:
+            NoteArray with the chart's notes
+        """
+        return self.parse_chart(file_path, columnar=True).notes
+
+    def open_chart_stream(self, file_path: str, chunk_size: int = 65536) -> ChartStream:
+        """
+        Open a JSON chart for incremental reading
+
+        Args:
+            file_path: Path to the chart file
+            chunk_size: Number of characters read from disk at a time
+
+        Returns:
+            ChartStream whose header() is available before the notes are read
+        """
+        if not file_path.endswith('.json'):
+            raise ValueError(f"Unsupported chart format: {file_path}")
+        return ChartStream(file_path, chunk_size)
+
+    def iter_notes(self, file_path: str,
+                   batch_size: Optional[int] = None) -> Iterator[Union[Note, NoteArray]]:
+        """
+        Stream the notes of a chart file while it is being read
+
+        Args:
+            file_path: Path to the chart file
+            batch_size: Yield NoteArray batches of this size instead of Notes
+
+        Returns:
+            Iterator of Note objects, or NoteArray batches if batch_size is set
+        """
+        with self.open_chart_stream(file_path) as stream:
+            if batch_size is None:
+                yield from stream.iter_notes()
+            else:
+                yield from stream.iter_batches(batch_size)
+
+    def _parse_json_chart(self, file_path: str, columnar: bool = False) -> Chart:
         """Parse JSON format chart"""
         with open(file_path, 'r') as f:
             data = json.load(f)
 
-        notes = []
-        for note_data in data.get('notes', []):
-            note = Note(
-                time=note_data['time'],
-                position=note_data['position'],
-                note_type=NoteType(note_data['type']),
-                duration=note_data.get('duration'),
-                direction=note_data.get('direction'),
-                rotation_speed=note_data.get('rotation_speed')
-            )
-            notes.append(note)
-
+        if columnar:
+            notes = NoteArray.from_dicts(data.get('notes', []))
+        else:
+            notes = []
+            for note_data in data.get('notes', []):
+                note = Note(
+                    time=note_data['time'],
+                    position=note_data['position'],
+                    note_type=NoteType(note_data['type']),
+                    duration=note_data.get('duration'),
+                    direction=note_data.get('direction'),
+                    rotation_speed=note_data.get('rotation_speed')
+                )
+                notes.append(note)
+
+        return self._chart_from_metadata(data, notes)
+
+    def _columns_to_chart(self, chart: Chart, columnar: bool) -> Chart:
+        """Convert a chart parsed into columns to a list of Notes unless columnar"""
+        if not columnar:
+            chart.notes = chart.notes.to_notes()
+        return chart
+
+    def _chart_from_metadata(self, data: Dict[str, Any], notes) -> Chart:
+        """Build a Chart from a chart file's top-level fields"""
         return Chart(
             title=data['title'],
             artist=data['artist'],
@@ -91,30 +208,195 @@ class ChartParser:
             offset=data.get('offset', 0.0)
         )
 
-    def generate_chart_from_audio(self, audio_file: str, difficulty: int = 1) -> Chart:
+    def find_charts(self, directory: str, recursive: bool = False) -> List[str]:
+        """
+        List the chart files in a directory
+
+        Args:
+            directory: Directory to scan
+            recursive: Also scan subdirectories
+
+        Returns:
+            Sorted paths of files with a supported extension
+        """
+        extensions = tuple(self.supported_formats)
+        if recursive:
+            paths = [os.path.join(root, name)
+                     for root, _, names in os.walk(directory) for name in names]
+        else:
+            paths = [os.path.join(directory, name) for name in os.listdir(directory)]
+
+        return sorted(path for path in paths
+                      if path.endswith(extensions) and os.path.isfile(path))
+
+    def iter_directory(self, directory: str, workers: Optional[int] = None,
+                       validate: bool = True, keep_charts: bool = True,
+                       columnar: bool = True,
+                       recursive: bool = False) -> Iterator[ChartLoadResult]:
+        """
+        Parse (and validate) every chart in a directory over a process pool
+
+        Results are yielded as soon as each file finishes, so the order
+        follows completion rather than file names.
+
+        Args:
+            directory: Directory to scan
+            workers: Number of worker processes (defaults to the CPU count;
+                1 runs everything in this process)
+            validate: Run validate_chart on each parsed chart
+            keep_charts: Return parsed charts; disable for validation-only scans
+            columnar: Parse notes into NoteArrays (much cheaper to transfer)
+            recursive: Also scan subdirectories
+
+        Returns:
+            Iterator of ChartLoadResult, one per file
+        """
+        paths = self.find_charts(directory, recursive)
+        workers = min(workers or os.cpu_count() or 1, max(len(paths), 1))
+        validator = self.validator if validate else None
+
+        if workers <= 1:
+            for path in paths:
+                yield _load_chart_file(path, validator, keep_charts, columnar)
+            return
+
+        # Custom validation rules must be picklable to reach the workers
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_load_chart_file, path, validator, keep_charts, columnar)
+                       for path in paths]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def load_directory(self, directory: str, workers: Optional[int] = None,
+                       **options) -> List[ChartLoadResult]:
+        """
+        Parse and validate every chart in a directory
+
+        Args:
+            directory: Directory to scan
+            workers: Number of worker processes (defaults to the CPU count)
+            **options: Passed through to iter_directory
+
+        Returns:
+            List of ChartLoadResult sorted by file path
+        """
+        results = list(self.iter_directory(directory, workers, **options))
+        return sorted(results, key=lambda result: result.file_path)
+
+    def validate_directory(self, directory: str, workers: Optional[int] = None,
+                           recursive: bool = False) -> List[ChartLoadResult]:
+        """
+        Validate every chart in a directory without returning the charts
+
+        Returns:
+            List of ChartLoadResult sorted by file path
+        """
+        return self.load_directory(directory, workers, keep_charts=False,
+                                   recursive=recursive)
+
+    def generate_chart_from_audio(self, audio_file: str, difficulty: int = 1,
+                                  samples: Optional[np.ndarray] = None,
+                                  sample_rate: Optional[int] = None,
+                                  columnar: bool = False) -> Chart:
         """
         Generate a basic chart from audio analysis
 
         Args:
-            audio_file: Path to audio file
+            audio_file: Path to audio file (PCM WAV unless samples are given)
             difficulty: Difficulty level (1-14)
+            samples: Pre-decoded mono samples, for formats we cannot decode
+            sample_rate: Sample rate of samples
+            columnar: Store notes as a NoteArray instead of a list of Note
 
         Returns:
             Generated Chart object
         """
-        # This is a placeholder for audio analysis
-        # In a real implementation, you'd analyze the audio for beats
-        notes = self._generate_test_pattern(duration=180, difficulty=difficulty)
+        if samples is None:
+            if not audio_file.lower().endswith('.wav'):
+                raise ValueError(f"Unsupported audio format: {audio_file} "
+                                 f"(decode it to WAV or pass samples)")
+            samples, sample_rate = read_wav(audio_file)
+        elif sample_rate is None:
+            raise ValueError("sample_rate is required when passing samples")
+
+        analysis = AudioAnalyzer().analyze(samples, sample_rate)
+        max_notes = int(analysis.duration * self._generated_note_density(difficulty))
+        notes = self._notes_from_onsets(analysis.onset_times, analysis.onset_strengths,
+                                        max_notes)
 
         return Chart(
             title="Generated Chart",
             artist="Unknown",
-            bpm=120,
+            bpm=round(analysis.bpm, 2),
             difficulty=difficulty,
-            notes=notes,
+            notes=notes if columnar else notes.to_notes(),
             audio_file=audio_file
         )
 
+    def stream_chart_from_audio(self, audio_file: str, difficulty: int = 1,
+                                samples: Optional[np.ndarray] = None,
+                                sample_rate: Optional[int] = None,
+                                block_size: int = 65536) -> Iterator[NoteArray]:
+        """
+        Generate a chart incrementally while the audio is analyzed
+
+        Audio is read in blocks, so memory stays bounded for long tracks and
+        each batch of notes can be used before the analysis finishes.
+
+        Args:
+            audio_file: Path to audio file (PCM WAV unless samples are given)
+            difficulty: Difficulty level (1-14)
+            samples: Pre-decoded mono samples, for formats we cannot decode
+            sample_rate: Sample rate of samples
+            block_size: Samples analyzed per step
+
+        Returns:
+            Iterator of NoteArray batches in time order
+        """
+        if samples is None:
+            if not audio_file.lower().endswith('.wav'):
+                raise ValueError(f"Unsupported audio format: {audio_file} "
+                                 f"(decode it to WAV or pass samples)")
+            updates = stream_wav(audio_file, block_size)
+        elif sample_rate is None:
+            raise ValueError("sample_rate is required when passing samples")
+        else:
+            updates = StreamingAudioAnalyzer(sample_rate).analyze_blocks(
+                samples[start:start + block_size]
+                for start in range(0, len(samples), block_size))
+
+        note_density = self._generated_note_density(difficulty)
+        emitted = 0
+        for update in updates:
+            # Spend the note budget accumulated so far on the strongest new onsets
+            budget = int(update.analyzed_time * note_density) - emitted
+            notes = self._notes_from_onsets(update.onset_times, update.onset_strengths,
+                                            max(budget, 0), emitted)
+            emitted += len(notes)
+            if len(notes):
+                yield notes
+
+    def _generated_note_density(self, difficulty: int) -> float:
+        """Notes per second placed by the audio-based generators"""
+        return 2 + (difficulty * 0.5)
+
+    def _notes_from_onsets(self, onset_times: np.ndarray, onset_strengths: np.ndarray,
+                           max_notes: int, first_index: int = 0) -> NoteArray:
+        """Place tap notes on the strongest onsets, at most max_notes of them"""
+        keep = np.sort(np.argsort(onset_strengths, kind='stable')[::-1][:max_notes])
+        times = onset_times[keep]
+        order = np.arange(first_index, first_index + len(times))
+
+        # Rotate through the track patterns of audio_analyzer.gd every 16 seconds
+        pattern = _TRACK_PATTERNS[(times // 16).astype(np.int64) % len(_TRACK_PATTERNS),
+                                  order % _TRACK_PATTERNS.shape[1]]
+
+        return NoteArray.from_columns(
+            time=times,
+            position=pattern * (360.0 / _TRACK_PATTERNS.shape[1]),
+            type_code=np.full(len(times), NOTE_TYPE_CODES[NoteType.TAP])
+        )
+
     def _generate_test_pattern(self, duration: float, difficulty: int) -> List[Note]:
         """Generate a test pattern of notes"""
         notes = []
@@ -144,8 +426,22 @@ class ChartParser:
 
         return notes
 
-    def save_chart(self, chart: Chart, file_path: str):
-        """Save a chart to a file"""
+    def save_chart(self, chart: Chart, file_path: str, binary: Optional[bool] = None):
+        """
+        Save a chart to a file
+
+        Args:
+            chart: Chart to save
+            file_path: Destination path
+            binary: Write the binary format (defaults to True for BINARY_EXTENSION
+                paths and JSON otherwise)
+        """
+        if binary is None:
+            binary = file_path.endswith(BINARY_EXTENSION)
+        if binary:
+            write_binary_chart(chart, file_path)
+            return
+
         chart_data = {
             'title': chart.title,
             'artist': chart.artist,
@@ -154,17 +450,7 @@ class ChartParser:
             'audio_file': chart.audio_file,
             'preview_time': chart.preview_time,
             'offset': chart.offset,
-            'notes': [
-                {
-                    'time': note.time,
-                    'position': note.position,
-                    'type': note.note_type.value,
-                    'duration': note.duration,
-                    'direction': note.direction,
-                    'rotation_speed': note.rotation_speed
-                }
-                for note in chart.notes
-            ]
+            'notes': chart.note_array.to_dicts()
         }
 
         with open(file_path, 'w') as f:
@@ -177,17 +463,16 @@ class ChartParser:
         Returns:
             List of validation errors (empty if valid)
         """
-        errors = []
+        return self.validate_chart_report(chart).messages()
 
-        # Check for notes too close together
-        for i in range(1, len(chart.notes)):
-            time_diff = chart.notes[i].time - chart.notes[i-1].time
-            if time_diff < 0.05:  # Less than 50ms apart
-                errors.append(f"Notes too close at {chart.notes[i].time}s")
+    def validate_chart_report(self, chart: Chart) -> ValidationReport:
+        """
+        Validate a chart and return the violating note indices per rule
 
-        # Check for invalid positions
-        for note in chart.notes:
-            if not 0 <= note.position < 360:
-                errors.append(f"Invalid position {note.position} at {note.time}s")
+        Messages are only formatted when requested from the report, which
+        keeps validation of badly broken charts cheap.
 
-        return errors
\ No newline at end of file
+        Returns:
+            ValidationReport for the chart's notes
+        """
+        return self.validator.validate(chart.note_array)
@@ -0,0 +1,188 @@
+"""
+Streaming Chart Reader for Rotaenot
+Incrementally parses JSON charts so notes can be consumed while the file is read
+"""
+
+import json
+from typing import Dict, Any, Iterator, Optional
+
+from .chart_types import Note, NoteType, NoteArray
+
+_WHITESPACE = ' \t\n\r'
+_DELIMITERS = _WHITESPACE + ',]}'
+
+
+class ChartStream:
+    """
+    Incremental reader for JSON chart files
+
+    Top-level fields that appear before the notes array are available from
+    header() as soon as the reader reaches the notes, so metadata can be used
+    before the notes finish loading. Memory use is bounded by the read chunk
+    and the batch size rather than the size of the file.
+    """
+
+    def __init__(self, file_path: str, chunk_size: int = 65536):
+        """
+        Args:
+            file_path: Path to a JSON chart file
+            chunk_size: Number of characters read from disk at a time
+        """
+        self.file_path = file_path
+        self.chunk_size = chunk_size
+        self.metadata: Dict[str, Any] = {}
+
+        self._file = open(file_path, 'r')
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+        self._state = 'start'  # start -> notes -> done
+
+    def __enter__(self) -> 'ChartStream':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Close the underlying file"""
+        self._file.close()
+
+    def header(self) -> Dict[str, Any]:
+        """
+        Read up to the start of the notes array
+
+        Returns:
+            Top-level chart fields seen so far (all fields if the notes
+            array comes last, as in files written by ChartParser.save_chart)
+        """
+        if self._state == 'start':
+            self._expect('{')
+            self._read_fields()
+        return self.metadata
+
+    def iter_note_dicts(self) -> Iterator[Dict[str, Any]]:
+        """Yield raw note dictionaries in file order"""
+        self.header()
+        while self._state == 'notes':
+            if self._peek() == ']':
+                self._pos += 1
+                self._read_separator()
+                self._read_fields()
+                break
+
+            yield self._decode_value()
+
+            if self._peek() == ',':
+                self._pos += 1
+
+    def iter_notes(self) -> Iterator[Note]:
+        """Yield Note objects in file order"""
+        for note_data in self.iter_note_dicts():
+            yield Note(
+                time=note_data['time'],
+                position=note_data['position'],
+                note_type=NoteType(note_data['type']),
+                duration=note_data.get('duration'),
+                direction=note_data.get('direction'),
+                rotation_speed=note_data.get('rotation_speed')
+            )
+
+    def iter_batches(self, batch_size: int = 4096) -> Iterator[NoteArray]:
+        """
+        Yield notes as fixed-size columnar batches
+
+        Args:
+            batch_size: Maximum number of notes per batch
+
+        Returns:
+            Iterator of NoteArray batches (the last one may be shorter)
+        """
+        batch = []
+        for note_data in self.iter_note_dicts():
+            batch.append(note_data)
+            if len(batch) >= batch_size:
+                yield NoteArray.from_dicts(batch)
+                batch = []
+
+        if batch:
+            yield NoteArray.from_dicts(batch)
+
+    def _read_fields(self):
+        """Read object members until the notes array or the end of the object"""
+        while True:
+            if self._peek() == '}':
+                self._pos += 1
+                self._state = 'done'
+                return
+
+            key = self._decode_value()
+            self._expect(':')
+
+            if key == 'notes' and self._peek() == '[':
+                self._pos += 1
+                self._state = 'notes'
+                return
+
+            self.metadata[key] = self._decode_value()
+            self._read_separator()
+
+    def _read_separator(self):
+        """Consume a comma between object members, if present"""
+        if self._peek() == ',':
+            self._pos += 1
+
+    def _fill(self) -> bool:
+        """Read another chunk into the buffer, discarding consumed text"""
+        if self._eof:
+            return False
+
+        chunk = self._file.read(self.chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _peek(self) -> Optional[str]:
+        """Return the next non-whitespace character without consuming it"""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                raise ValueError(f"Unexpected end of chart file: {self.file_path}")
+
+    def _ends_value(self, end: int) -> bool:
+        """Check that a scalar decoded up to end is followed by a delimiter"""
+        return end < len(self._buffer) and self._buffer[end] in _DELIMITERS
+
+    def _expect(self, char: str):
+        found = self._peek()
+        if found != char:
+            raise ValueError(f"Expected '{char}' but found '{found}' "
+                             f"in chart file: {self.file_path}")
+        self._pos += 1
+
+    def _decode_value(self) -> Any:
+        """Decode one JSON value, reading more data until it is complete"""
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+
+            # A number cut off by the end of the buffer decodes as a shorter one
+            if (isinstance(value, (int, float)) and not isinstance(value, bool)
+                    and not self._ends_value(end) and self._fill()):
+                continue
+
+            self._pos = end
+            return value
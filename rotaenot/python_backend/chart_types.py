@@ -0,0 +1,307 @@
+"""
+Chart Data Types for Rotaenot
+Note and chart structures shared by the parser and analysis tools
+"""
+
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Sequence, Union
+from dataclasses import dataclass
+from enum import Enum
+import numpy as np
+
+
+class NoteType(Enum):
+    TAP = "tap"
+    HOLD = "hold"
+    CATCH = "catch"
+    FLICK = "flick"
+    ROTATION = "rotation"
+
+
+# Compact integer codes used by the columnar representation
+NOTE_TYPES = tuple(NoteType)
+NOTE_TYPE_CODES = {note_type: code for code, note_type in enumerate(NOTE_TYPES)}
+_TYPE_CODES_BY_VALUE = {note_type.value: code for note_type, code in NOTE_TYPE_CODES.items()}
+
+# One record per note; optional fields carry an explicit presence mask
+NOTE_DTYPE = np.dtype([
+    ('time', np.float64),
+    ('position', np.float64),
+    ('type', np.uint8),
+    ('duration', np.float64),
+    ('direction', np.int32),  # Index into NoteArray.directions, -1 if missing
+    ('rotation_speed', np.float64),
+    ('has_duration', np.bool_),
+    ('has_direction', np.bool_),
+    ('has_rotation_speed', np.bool_),
+])
+
+
+@dataclass
+class Note:
+    """Represents a single note in the chart"""
+    time: float  # Time in seconds
+    position: float  # Angular position (0-360 degrees)
+    note_type: NoteType
+    duration: Optional[float] = None  # For hold notes
+    direction: Optional[str] = None  # For flick notes
+    rotation_speed: Optional[float] = None  # For rotation sections
+
+
+class NoteArray:
+    """
+    Columnar note storage backed by a structured NumPy array
+
+    Behaves like a read-only sequence of Note objects so it can be used
+    wherever a List[Note] was expected, while exposing whole columns for
+    vectorized validation, scoring and export.
+    """
+
+    def __init__(self, data: Optional[np.ndarray] = None,
+                 directions: Sequence[str] = ()):
+        """
+        Args:
+            data: Structured array with NOTE_DTYPE records
+            directions: Lookup table for the direction codes in data
+        """
+        if data is None:
+            data = np.zeros(0, dtype=NOTE_DTYPE)
+        elif data.dtype != NOTE_DTYPE:
+            raise ValueError(f"Expected note dtype {NOTE_DTYPE}, got {data.dtype}")
+        self.data = data
+        self.directions = list(directions)
+
+    @classmethod
+    def from_columns(cls, time, position, type_code,
+                     duration=None, direction=None, rotation_speed=None,
+                     directions: Sequence[str] = ()) -> 'NoteArray':
+        """
+        Build a NoteArray from column arrays
+
+        Optional columns use NaN (or -1 for direction codes) for missing values.
+
+        Returns:
+            NoteArray holding a copy of the columns
+        """
+        time = np.asarray(time, dtype=np.float64)
+        data = np.zeros(len(time), dtype=NOTE_DTYPE)
+        data['time'] = time
+        data['position'] = position
+        data['type'] = type_code
+        data['direction'] = -1
+
+        if duration is not None:
+            data['duration'] = duration
+            data['has_duration'] = ~np.isnan(data['duration'])
+        if direction is not None:
+            data['direction'] = direction
+            data['has_direction'] = data['direction'] >= 0
+        if rotation_speed is not None:
+            data['rotation_speed'] = rotation_speed
+            data['has_rotation_speed'] = ~np.isnan(data['rotation_speed'])
+
+        data['duration'][~data['has_duration']] = np.nan
+        data['rotation_speed'][~data['has_rotation_speed']] = np.nan
+        return cls(data, directions)
+
+    @classmethod
+    def from_dicts(cls, note_dicts: Sequence[Dict[str, Any]]) -> 'NoteArray':
+        """
+        Build a NoteArray from chart-file note dictionaries
+
+        Args:
+            note_dicts: Notes as stored in JSON charts
+
+        Returns:
+            NoteArray with one record per note
+        """
+        count = len(note_dicts)
+        time = np.fromiter((n['time'] for n in note_dicts), np.float64, count)
+        position = np.fromiter((n['position'] for n in note_dicts), np.float64, count)
+        type_code = np.fromiter((_type_code(n['type']) for n in note_dicts), np.uint8, count)
+
+        # None becomes NaN when converted to a float column
+        duration = np.array([n.get('duration') for n in note_dicts], dtype=np.float64)
+        rotation_speed = np.array([n.get('rotation_speed') for n in note_dicts],
+                                  dtype=np.float64)
+
+        directions: Dict[str, int] = {}
+        direction = np.fromiter(
+            (_intern(directions, n.get('direction')) for n in note_dicts),
+            np.int32, count)
+
+        return cls.from_columns(time, position, type_code, duration,
+                                direction, rotation_speed, list(directions))
+
+    @classmethod
+    def from_notes(cls, notes: Iterable[Note]) -> 'NoteArray':
+        """Build a NoteArray from Note objects"""
+        if isinstance(notes, NoteArray):
+            return notes
+        notes = list(notes)
+        directions: Dict[str, int] = {}
+        return cls.from_columns(
+            [n.time for n in notes],
+            [n.position for n in notes],
+            [NOTE_TYPE_CODES[n.note_type] for n in notes],
+            np.array([n.duration for n in notes], dtype=np.float64),
+            [_intern(directions, n.direction) for n in notes],
+            np.array([n.rotation_speed for n in notes], dtype=np.float64),
+            list(directions)
+        )
+
+    @classmethod
+    def concatenate(cls, arrays: Sequence['NoteArray']) -> 'NoteArray':
+        """Join several NoteArrays, merging their direction tables"""
+        if not arrays:
+            return cls()
+
+        directions: Dict[str, int] = {}
+        parts = []
+        for array in arrays:
+            part = array.data.copy()
+            if array.directions:
+                remap = np.array([_intern(directions, d) for d in array.directions],
+                                 dtype=np.int32)
+                mask = part['has_direction']
+                part['direction'][mask] = remap[part['direction'][mask]]
+            parts.append(part)
+
+        return cls(np.concatenate(parts), list(directions))
+
+    # Column accessors
+    @property
+    def time(self) -> np.ndarray:
+        return self.data['time']
+
+    @property
+    def position(self) -> np.ndarray:
+        return self.data['position']
+
+    @property
+    def type_code(self) -> np.ndarray:
+        return self.data['type']
+
+    @property
+    def duration(self) -> np.ndarray:
+        return self.data['duration']
+
+    @property
+    def direction(self) -> np.ndarray:
+        return self.data['direction']
+
+    @property
+    def rotation_speed(self) -> np.ndarray:
+        return self.data['rotation_speed']
+
+    @property
+    def has_duration(self) -> np.ndarray:
+        return self.data['has_duration']
+
+    @property
+    def has_direction(self) -> np.ndarray:
+        return self.data['has_direction']
+
+    @property
+    def has_rotation_speed(self) -> np.ndarray:
+        return self.data['has_rotation_speed']
+
+    def type_mask(self, note_type: NoteType) -> np.ndarray:
+        """Boolean mask of notes with the given type"""
+        return self.data['type'] == NOTE_TYPE_CODES[note_type]
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __getitem__(self, index: Union[int, slice, np.ndarray]) -> Union[Note, 'NoteArray']:
+        if isinstance(index, (int, np.integer)):
+            return self._make_note(self.data[index])
+        return NoteArray(np.atleast_1d(self.data[index]), self.directions)
+
+    def __iter__(self) -> Iterator[Note]:
+        for record in self.data:
+            yield self._make_note(record)
+
+    def __repr__(self) -> str:
+        return f"NoteArray({len(self)} notes)"
+
+    def _make_note(self, record) -> Note:
+        return Note(
+            time=float(record['time']),
+            position=float(record['position']),
+            note_type=NOTE_TYPES[record['type']],
+            duration=float(record['duration']) if record['has_duration'] else None,
+            direction=self.directions[record['direction']] if record['has_direction'] else None,
+            rotation_speed=(float(record['rotation_speed'])
+                            if record['has_rotation_speed'] else None)
+        )
+
+    def to_notes(self) -> List[Note]:
+        """Materialize the array as a list of Note objects"""
+        return list(self)
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """
+        Convert to chart-file note dictionaries
+
+        Returns:
+            List of note dicts in the layout written by ChartParser.save_chart
+        """
+        data = self.data
+        types = [t.value for t in NOTE_TYPES]
+        directions = self.directions
+
+        duration = np.where(data['has_duration'], data['duration'], None).tolist()
+        rotation_speed = np.where(data['has_rotation_speed'],
+                                  data['rotation_speed'], None).tolist()
+        direction = [directions[code] if code >= 0 else None
+                     for code in data['direction'].tolist()]
+
+        return [
+            {
+                'time': time,
+                'position': position,
+                'type': types[code],
+                'duration': dur,
+                'direction': dirn,
+                'rotation_speed': speed
+            }
+            for time, position, code, dur, dirn, speed in zip(
+                data['time'].tolist(), data['position'].tolist(),
+                data['type'].tolist(), duration, direction, rotation_speed)
+        ]
+
+
+def _type_code(value: str) -> int:
+    """Look up the type code for a note type string"""
+    code = _TYPE_CODES_BY_VALUE.get(value)
+    if code is None:
+        return NOTE_TYPE_CODES[NoteType(value)]  # Raises ValueError
+    return code
+
+
+def _intern(table: Dict[str, int], value: Optional[str]) -> int:
+    """Return the code for value in table, adding it if needed (-1 for None)"""
+    if value is None:
+        return -1
+    code = table.get(value)
+    if code is None:
+        code = table[value] = len(table)
+    return code
+
+
+@dataclass
+class Chart:
+    """Represents a complete chart/beatmap"""
+    title: str
+    artist: str
+    bpm: float
+    difficulty: int
+    notes: Union[List[Note], NoteArray]
+    audio_file: str
+    preview_time: float = 0.0
+    offset: float = 0.0  # Audio offset in ms
+
+    @property
+    def note_array(self) -> NoteArray:
+        """Columnar view of the notes (converted from a list if needed)"""
+        return NoteArray.from_notes(self.notes)
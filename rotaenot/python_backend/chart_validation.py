@@ -0,0 +1,259 @@
+"""
+Chart Validation Rules for Rotaenot
+Vectorized checks over NoteArray columns with a pluggable rule registry
+"""
+
+from functools import partial
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .chart_types import NoteType, NoteArray
+
+if TYPE_CHECKING:
+    from .timing import TimingMap
+
+# One row per violation: which rule fired and on which note
+VIOLATION_DTYPE = np.dtype([('rule', np.uint16), ('index', np.int64)])
+
+
+class ValidationRule:
+    """A named chart check that returns the indices of offending notes"""
+
+    def __init__(self, name: str, check: Callable[[NoteArray], np.ndarray],
+                 message: str):
+        """
+        Args:
+            name: Unique rule name
+            check: Function mapping a NoteArray to an array of note indices
+            message: Format string for each violation; may use {time},
+                {position} and {index}
+        """
+        self.name = name
+        self.check = check
+        self.message = message
+
+    def find(self, notes: NoteArray) -> np.ndarray:
+        """Run the check and return the offending note indices"""
+        return np.asarray(self.check(notes), dtype=np.int64)
+
+    def format(self, notes: NoteArray, indices: np.ndarray) -> List[str]:
+        """Format one message per violating note"""
+        return [
+            self.message.format(time=time, position=position, index=index)
+            for index, time, position in zip(indices.tolist(),
+                                             notes.time[indices].tolist(),
+                                             notes.position[indices].tolist())
+        ]
+
+    def __repr__(self) -> str:
+        return f"ValidationRule({self.name!r})"
+
+
+class ValidationReport:
+    """Violations found by a ChartValidator; messages are built on demand"""
+
+    def __init__(self, notes: NoteArray, rules: Sequence[ValidationRule],
+                 results: Sequence[np.ndarray]):
+        self.notes = notes
+        self.rules = list(rules)
+        self._results = list(results)
+
+    @property
+    def violations(self) -> np.ndarray:
+        """Structured array of (rule, index) rows in rule order"""
+        sizes = [len(indices) for indices in self._results]
+        violations = np.empty(sum(sizes), dtype=VIOLATION_DTYPE)
+        violations['rule'] = np.repeat(np.arange(len(self.rules)), sizes)
+        violations['index'] = (np.concatenate(self._results)
+                               if self._results else np.zeros(0, dtype=np.int64))
+        return violations
+
+    def indices(self, rule_name: str) -> np.ndarray:
+        """Indices of the notes that failed the named rule"""
+        for rule, indices in zip(self.rules, self._results):
+            if rule.name == rule_name:
+                return indices
+        raise KeyError(rule_name)
+
+    def counts(self) -> Dict[str, int]:
+        """Number of violations per rule"""
+        return {rule.name: len(indices)
+                for rule, indices in zip(self.rules, self._results)}
+
+    def messages(self, limit: Optional[int] = None) -> List[str]:
+        """
+        Format violation messages
+
+        Args:
+            limit: Stop after this many messages
+
+        Returns:
+            Messages in rule order, then note order
+        """
+        messages = []
+        for rule, indices in zip(self.rules, self._results):
+            if limit is not None:
+                indices = indices[:limit - len(messages)]
+            messages.extend(rule.format(self.notes, indices))
+            if limit is not None and len(messages) >= limit:
+                break
+        return messages
+
+    def __len__(self) -> int:
+        return sum(len(indices) for indices in self._results)
+
+    def __bool__(self) -> bool:
+        """True if the chart has any violation"""
+        return len(self) > 0
+
+
+class ChartValidator:
+    """Runs a registry of vectorized validation rules over a chart's notes"""
+
+    def __init__(self, rules: Optional[Sequence[ValidationRule]] = None):
+        """
+        Args:
+            rules: Rules to run (defaults to default_rules())
+        """
+        self.rules: List[ValidationRule] = list(default_rules() if rules is None else rules)
+
+    def register(self, rule: ValidationRule):
+        """Add a rule, replacing any existing rule with the same name"""
+        self.unregister(rule.name)
+        self.rules.append(rule)
+
+    def unregister(self, name: str):
+        """Remove the named rule if present"""
+        self.rules = [rule for rule in self.rules if rule.name != name]
+
+    def validate(self, notes: NoteArray) -> ValidationReport:
+        """
+        Run every registered rule
+
+        Args:
+            notes: Notes to check
+
+        Returns:
+            ValidationReport with the violation indices of each rule
+        """
+        return ValidationReport(notes, self.rules,
+                                [rule.find(notes) for rule in self.rules])
+
+
+def _check_min_gap(notes: NoteArray, min_gap: float) -> np.ndarray:
+    return np.flatnonzero(np.diff(notes.time) < min_gap) + 1
+
+
+def _check_position_range(notes: NoteArray) -> np.ndarray:
+    positions = notes.position
+    return np.flatnonzero(~((positions >= 0) & (positions < 360)))
+
+
+def _check_unsorted(notes: NoteArray) -> np.ndarray:
+    return np.flatnonzero(np.diff(notes.time) < 0) + 1
+
+
+def _check_duplicates(notes: NoteArray) -> np.ndarray:
+    # Stable sort is near-linear on the mostly sorted times of real charts
+    order = np.argsort(notes.time, kind='stable')
+    time = notes.time[order]
+    shared = np.flatnonzero(time[1:] == time[:-1])
+    if not len(shared):
+        return shared
+
+    # Only notes that share a time with another note can be duplicates
+    candidates = order[np.union1d(shared, shared + 1)]
+    order = candidates[np.lexsort((notes.position[candidates], notes.time[candidates]))]
+    time = notes.time[order]
+    position = notes.position[order]
+    repeated = (time[1:] == time[:-1]) & (position[1:] == position[:-1])
+    return np.sort(order[1:][repeated])
+
+
+def _check_hold_duration(notes: NoteArray) -> np.ndarray:
+    holds = notes.type_mask(NoteType.HOLD)
+    # NaN durations (missing) compare False, so test the positive case
+    return np.flatnonzero(holds & ~(notes.duration > 0))
+
+
+def _check_hold_overlap(notes: NoteArray) -> np.ndarray:
+    holds = np.flatnonzero(notes.type_mask(NoteType.HOLD) & (notes.duration > 0))
+    order = holds[np.lexsort((notes.time[holds], notes.position[holds]))]
+    count = len(order)
+    if count < 2:
+        return order[:0]
+    time = notes.time[order]
+    position = notes.position[order]
+    end = time + notes.duration[order]
+
+    # Latest end among the earlier holds of each position group: a running
+    # maximum over the integer keys group * count + rank of end, so a group
+    # never sees the ends of the groups before it
+    group = np.concatenate(([0], np.cumsum(position[1:] != position[:-1])))
+    ends = np.sort(end)
+    latest = np.maximum.accumulate(group * count + ends.searchsorted(end))[:-1]
+    same_group = latest >= group[1:] * count
+    overlapping = same_group & (time[1:] < ends[latest % count])
+    return np.sort(order[1:][overlapping])
+
+
+def _check_off_grid(notes: NoteArray, timing: 'TimingMap', divisor: int,
+                    tolerance: float) -> np.ndarray:
+    return np.flatnonzero(timing.snap_error(notes.time, divisor) > tolerance)
+
+
+def min_gap_rule(min_gap: float = 0.05) -> ValidationRule:
+    """Notes closer than min_gap seconds to the previous note"""
+    return ValidationRule('min_gap', partial(_check_min_gap, min_gap=min_gap),
+                          "Notes too close at {time}s")
+
+
+def position_range_rule() -> ValidationRule:
+    """Positions outside 0-360 degrees"""
+    return ValidationRule('position_range', _check_position_range,
+                          "Invalid position {position} at {time}s")
+
+
+def unsorted_rule() -> ValidationRule:
+    """Notes earlier than the note before them"""
+    return ValidationRule('unsorted', _check_unsorted,
+                          "Note out of order at {time}s")
+
+
+def duplicate_rule() -> ValidationRule:
+    """Notes sharing both time and position with another note"""
+    return ValidationRule('duplicate', _check_duplicates,
+                          "Duplicate note at {time}s, position {position}")
+
+
+def hold_duration_rule() -> ValidationRule:
+    """Hold notes without a positive duration"""
+    return ValidationRule('hold_duration', _check_hold_duration,
+                          "Hold without duration at {time}s")
+
+
+def hold_overlap_rule() -> ValidationRule:
+    """Holds starting before an earlier hold at the same position ends"""
+    return ValidationRule('hold_overlap', _check_hold_overlap,
+                          "Overlapping hold at {time}s, position {position}")
+
+
+def off_grid_rule(timing: 'TimingMap', divisor: int = 4,
+                  tolerance: float = 0.005) -> ValidationRule:
+    """Notes more than tolerance seconds from the 1/divisor beat grid"""
+    return ValidationRule('off_grid', partial(_check_off_grid, timing=timing,
+                                              divisor=divisor, tolerance=tolerance),
+                          "Note off the beat grid at {time}s")
+
+
+def default_rules() -> List[ValidationRule]:
+    """The rule set used by ChartParser.validate_chart"""
+    return [
+        min_gap_rule(),
+        position_range_rule(),
+        unsorted_rule(),
+        duplicate_rule(),
+        hold_duration_rule(),
+        hold_overlap_rule(),
+    ]
@@ -4,11 +4,22 @@ Handles rotation input processing and smoothing
 """
 
 import math
-from typing import Tuple, Optional, List
+from operator import mul
+from typing import Tuple, Optional, List, Sequence, Union
 from dataclasses import dataclass
 import numpy as np
 from collections import deque
 
+# Samples averaged by the smoothing window
+HISTORY_SIZE = 10
+VELOCITY_HISTORY_SIZE = 5
+
+# math.degrees multiplies by this constant
+_DEGREES_PER_RADIAN = 180.0 / math.pi
+
+# Rows of smoothing windows evaluated at once by the batch methods
+_BATCH_CHUNK = 65536
+
 
 @dataclass
 class RotationData:
@@ -19,29 +30,78 @@ class RotationData:
     timestamp: float  # Time in seconds
 
 
+class RotationSample:
+    """Slotted RotationData returned by FastGyroProcessor"""
+
+    __slots__ = ('angle', 'angular_velocity', 'angular_acceleration', 'timestamp')
+
+    def __init__(self, angle: float, angular_velocity: float,
+                 angular_acceleration: float, timestamp: float):
+        self.angle = angle
+        self.angular_velocity = angular_velocity
+        self.angular_acceleration = angular_acceleration
+        self.timestamp = timestamp
+
+    def __repr__(self) -> str:
+        return (f"RotationSample(angle={self.angle}, angular_velocity={self.angular_velocity}, "
+                f"angular_acceleration={self.angular_acceleration}, timestamp={self.timestamp})")
+
+
+@dataclass
+class RotationBatch:
+    """RotationData for a run of samples, one array per field"""
+    angle: np.ndarray
+    angular_velocity: np.ndarray
+    angular_acceleration: np.ndarray
+    timestamp: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def __getitem__(self, index: int) -> RotationData:
+        return RotationData(
+            angle=float(self.angle[index]),
+            angular_velocity=float(self.angular_velocity[index]),
+            angular_acceleration=float(self.angular_acceleration[index]),
+            timestamp=float(self.timestamp[index])
+        )
+
+
+@dataclass
+class FusionGains:
+    """Gains of the complementary filter used by process_fused_data"""
+    accel_gain: float = 5.0  # Pull toward the accelerometer tilt (1/s)
+    bias_gain: float = 0.5  # Gyro bias learning rate (1/s²)
+    max_bias: float = 10.0  # Clamp on the learned bias (degrees per second)
+
+
 class GyroProcessor:
     """Process gyroscope/accelerometer data for rotation control"""
 
     def __init__(self, smoothing_factor: float = 0.15,
-                 dead_zone: float = 2.0):
+                 dead_zone: float = 2.0,
+                 fusion_gains: Optional[FusionGains] = None):
         """
         Initialize the gyro processor
 
         Args:
             smoothing_factor: Smoothing factor for rotation (0-1)
             dead_zone: Minimum rotation angle to register (degrees)
+            fusion_gains: Complementary filter gains for process_fused_data
         """
         self.smoothing_factor = smoothing_factor
         self.dead_zone = dead_zone
+        self.fusion_gains = fusion_gains or FusionGains()
         self.calibration_offset = 0.0
         self.current_angle = 0.0
         self.previous_angle = 0.0
         self.angular_velocity = 0.0
+        self.gyro_bias = 0.0
         self.previous_timestamp = None
 
         # History for smoothing
-        self.angle_history = deque(maxlen=10)
-        self.velocity_history = deque(maxlen=5)
+        self.angle_history = deque(maxlen=HISTORY_SIZE)
+        self.velocity_history = deque(maxlen=VELOCITY_HISTORY_SIZE)
 
     def calibrate(self, initial_angle: float = 0.0):
         """
@@ -171,6 +231,68 @@ class GyroProcessor:
             timestamp=timestamp
         )
 
+    def process_fused_data(self, x: float, y: float, z: float,
+                           accel_x: float, accel_y: float,
+                           timestamp: float) -> RotationData:
+        """
+        Process a gyroscope and accelerometer sample pair
+
+        A complementary filter: the angle follows the integrated gyro rate,
+        which is responsive but drifts, and is pulled toward the
+        accelerometer tilt, which is drift-free but noisy, at accel_gain per
+        second. The tilt error also trains a gyro bias estimate at bias_gain.
+        No smoothing window is applied, so the output has no smoothing lag.
+
+        Args:
+            x, y, z: Gyroscope readings (rad/s)
+            accel_x, accel_y: Accelerometer readings (m/s²)
+            timestamp: Current timestamp in seconds
+
+        Returns:
+            Processed RotationData
+        """
+        gains = self.fusion_gains
+        tilt = (math.degrees(math.atan2(accel_y, accel_x)) - self.calibration_offset) % 360
+
+        if self.previous_timestamp is None:
+            # Nothing to integrate yet; start from the absolute tilt
+            self.current_angle = tilt
+            angular_velocity = 0.0
+            dt = 0.016
+        else:
+            dt = timestamp - self.previous_timestamp
+            angular_velocity = math.degrees(z) - self.gyro_bias
+            if abs(angular_velocity) < self.dead_zone:
+                angular_velocity = 0.0
+
+            predicted = self.current_angle + angular_velocity * dt
+            error = self._angle_difference(tilt, predicted)
+            correction = min(1.0, gains.accel_gain * dt) if dt > 0 else 0.0
+            self.current_angle = (predicted + error * correction) % 360
+
+            bias = self.gyro_bias - gains.bias_gain * error * max(dt, 0.0)
+            self.gyro_bias = max(-gains.max_bias, min(gains.max_bias, bias))
+
+        # Calculate angular acceleration
+        if len(self.velocity_history) > 0 and dt > 0:
+            angular_acceleration = (angular_velocity - self.velocity_history[-1]) / dt
+        else:
+            angular_acceleration = 0
+
+        self.velocity_history.append(angular_velocity)
+
+        # Update state
+        self.previous_angle = self.current_angle
+        self.previous_timestamp = timestamp
+        self.angular_velocity = angular_velocity
+
+        return RotationData(
+            angle=self.current_angle,
+            angular_velocity=angular_velocity,
+            angular_acceleration=angular_acceleration,
+            timestamp=timestamp
+        )
+
     def simulate_rotation(self, target_angle: float,
                         timestamp: float) -> RotationData:
         """
@@ -218,6 +340,196 @@ class GyroProcessor:
             timestamp=timestamp
         )
 
+    def process_gyro_batch(self, z: Union[Sequence[float], np.ndarray],
+                           timestamps: Union[Sequence[float], np.ndarray]) -> RotationBatch:
+        """
+        Process a run of gyroscope samples
+
+        Same results and state changes as calling process_gyro_data on each
+        sample in order, so batches can be mixed freely with live samples.
+
+        Args:
+            z: Z-axis gyroscope readings (rad/s)
+            timestamps: Timestamp of each reading in seconds
+
+        Returns:
+            RotationBatch with one entry per sample
+        """
+        angular_velocity, timestamps = self._batch_columns(z, timestamps)
+        if not len(timestamps):
+            return self._empty_batch()
+
+        angular_velocity = angular_velocity * _DEGREES_PER_RADIAN
+        angular_velocity[np.abs(angular_velocity) < self.dead_zone] = 0
+        dt = self._batch_dt(timestamps)
+        angular_acceleration = self._batch_acceleration(angular_velocity, dt)
+
+        # cumsum adds left to right, like the running += of the scalar path
+        angles = np.cumsum(np.concatenate(([self.current_angle],
+                                           angular_velocity * dt)))[1:]
+        smoothed = self._smooth_batch(angles)
+
+        self.current_angle = float(angles[-1])
+        self.previous_angle = float(smoothed[-1])
+        self._finish_batch(angles, angular_velocity, timestamps)
+        return RotationBatch(smoothed % 360, angular_velocity,
+                             angular_acceleration, timestamps)
+
+    def process_accelerometer_batch(self, x: Union[Sequence[float], np.ndarray],
+                                    y: Union[Sequence[float], np.ndarray],
+                                    timestamps: Union[Sequence[float], np.ndarray]
+                                    ) -> RotationBatch:
+        """
+        Process a run of accelerometer samples
+
+        Same results and state changes as calling process_accelerometer_data
+        on each sample in order. Each sample's dead zone depends on the
+        previous smoothed angle, so the smoothing runs as a tight loop over
+        precomputed tilt angles; everything else is vectorized.
+
+        Args:
+            x, y: Accelerometer readings (m/s²)
+            timestamps: Timestamp of each reading in seconds
+
+        Returns:
+            RotationBatch with one entry per sample
+        """
+        x, timestamps = self._batch_columns(x, timestamps)
+        y = np.asarray(y, dtype=np.float64)
+        if len(y) != len(x):
+            raise ValueError("x and y must have the same length")
+        if not len(timestamps):
+            return self._empty_batch()
+
+        angle_raw = (np.arctan2(y, x) * _DEGREES_PER_RADIAN + 360) % 360
+        angle_calibrated = ((angle_raw - self.calibration_offset) % 360).tolist()
+
+        window = list(self.angle_history)
+        weights = [()] + [tuple(self._smoothing_weights(fill).tolist())
+                          for fill in range(1, HISTORY_SIZE + 1)]
+        full_weights = weights[HISTORY_SIZE]
+        current = self.current_angle
+        dead_zone = self.dead_zone
+        angle_diff = []
+        smoothed = []
+        for angle in angle_calibrated:
+            diff = (angle - current) % 360
+            if diff > 180:
+                diff -= 360
+            angle_diff.append(diff)
+            if -dead_zone < diff < dead_zone:
+                angle = current
+
+            window.append(angle)
+            if len(window) > HISTORY_SIZE:
+                del window[0]
+                current = sum(map(mul, window, full_weights))
+            else:
+                current = sum(map(mul, window, weights[len(window)]))
+            smoothed.append(current)
+
+        dt = self._batch_dt(timestamps)
+        positive = dt > 0
+        angular_velocity = np.zeros(len(timestamps))
+        angular_velocity[positive] = np.array(angle_diff)[positive] / dt[positive]
+        if self.previous_timestamp is None:
+            angular_velocity[0] = 0
+        angular_acceleration = self._batch_acceleration(angular_velocity, dt)
+
+        smoothed = np.array(smoothed)
+        self.current_angle = current
+        self.previous_angle = current
+        self.angle_history = deque(window, maxlen=HISTORY_SIZE)
+        self._finish_batch(None, angular_velocity, timestamps)
+        return RotationBatch(smoothed, angular_velocity,
+                             angular_acceleration, timestamps)
+
+    def _batch_columns(self, values, timestamps) -> Tuple[np.ndarray, np.ndarray]:
+        values = np.asarray(values, dtype=np.float64)
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        if values.shape != timestamps.shape or values.ndim != 1:
+            raise ValueError("Sample and timestamp arrays must be 1-D and the same length")
+        return values, timestamps
+
+    def _batch_dt(self, timestamps: np.ndarray) -> np.ndarray:
+        """Time step of each sample (0.016 for the very first sample)"""
+        dt = np.empty(len(timestamps))
+        dt[0] = (0.016 if self.previous_timestamp is None
+                 else timestamps[0] - self.previous_timestamp)
+        dt[1:] = np.diff(timestamps)
+        return dt
+
+    def _batch_acceleration(self, angular_velocity: np.ndarray,
+                            dt: np.ndarray) -> np.ndarray:
+        """Finite-difference acceleration against the previous velocity"""
+        previous = np.empty(len(angular_velocity))
+        previous[1:] = angular_velocity[:-1]
+        has_previous = np.ones(len(angular_velocity), dtype=bool)
+        if self.velocity_history:
+            previous[0] = self.velocity_history[-1]
+        else:
+            has_previous[0] = False
+            previous[0] = 0.0
+
+        if (dt[has_previous] == 0).any():
+            raise ZeroDivisionError("float division by zero")
+        angular_acceleration = np.zeros(len(angular_velocity))
+        angular_acceleration[has_previous] = ((angular_velocity - previous)[has_previous]
+                                              / dt[has_previous])
+        return angular_acceleration
+
+    def _smooth_batch(self, angles: np.ndarray) -> np.ndarray:
+        """_apply_smoothing over the history window ending at each angle"""
+        history = np.array(list(self.angle_history), dtype=np.float64)
+        values = np.concatenate((history, angles))
+        smoothed = np.empty(len(angles))
+
+        # Windows that still include fewer than HISTORY_SIZE values
+        partial = min(len(angles), HISTORY_SIZE - 1 - len(history)) if \
+            len(history) < HISTORY_SIZE else 0
+        for k in range(max(partial, 0)):
+            end = len(history) + k + 1
+            weights = self._smoothing_weights(end)
+            smoothed[k] = np.multiply(values[:end], weights).sum() / weights.sum()
+
+        first = max(partial, 0)
+        if first == len(angles):
+            return smoothed
+
+        # Full windows, evaluated like np.average one row at a time
+        weights = self._smoothing_weights(HISTORY_SIZE)
+        scale = weights.sum()
+        windows = np.lib.stride_tricks.sliding_window_view(values, HISTORY_SIZE)
+        offset = len(history) - HISTORY_SIZE + 1
+        for start in range(first, len(angles), _BATCH_CHUNK):
+            stop = min(start + _BATCH_CHUNK, len(angles))
+            rows = windows[start + offset:stop + offset]
+            smoothed[start:stop] = np.multiply(rows, weights).sum(axis=1) / scale
+        return smoothed
+
+    def _smoothing_weights(self, count: int) -> np.ndarray:
+        """The normalized weights _apply_smoothing uses for count values"""
+        weights = np.array([self.smoothing_factor ** i
+                            for i in range(count - 1, -1, -1)])
+        weights /= weights.sum()
+        return weights
+
+    def _finish_batch(self, angles: Optional[np.ndarray],
+                      angular_velocity: np.ndarray, timestamps: np.ndarray):
+        """Carry history and timing state over to the next sample"""
+        if angles is not None:
+            self.angle_history = deque(
+                list(self.angle_history) + angles[-HISTORY_SIZE:].tolist(),
+                maxlen=HISTORY_SIZE)
+        self.velocity_history.extend(angular_velocity[-VELOCITY_HISTORY_SIZE:].tolist())
+        self.previous_timestamp = float(timestamps[-1])
+        self.angular_velocity = float(angular_velocity[-1])
+
+    @staticmethod
+    def _empty_batch() -> RotationBatch:
+        empty = np.zeros(0)
+        return RotationBatch(empty, empty.copy(), empty.copy(), empty.copy())
+
     def _angle_difference(self, angle1: float, angle2: float) -> float:
         """
         Calculate shortest angular difference between two angles
@@ -253,6 +565,21 @@ class GyroProcessor:
 
         return np.average(values, weights=weights)
 
+    def smoothing_lag(self) -> float:
+        """
+        Delay added by the smoothing window, in samples
+
+        The smoothed angle is a weighted mean of the last HISTORY_SIZE
+        angles, so it trails the newest one by their weighted mean age.
+        """
+        return self._smoothing_moments()[0]
+
+    def _smoothing_moments(self) -> Tuple[float, float]:
+        """Weighted mean and mean square age (in samples) of the smoothing window"""
+        weights = self._smoothing_weights(HISTORY_SIZE)
+        ages = np.arange(HISTORY_SIZE - 1, -1, -1)
+        return float(np.dot(weights, ages)), float(np.dot(weights, ages * ages))
+
     def get_basket_position(self, angle: float,
                            basket_width: float = 45.0) -> Optional[str]:
         """
@@ -265,14 +592,12 @@ class GyroProcessor:
         Returns:
             'left', 'right', or None if not in a basket
         """
-        # Left basket: 225-315 degrees (270 ± 45)
-        # Right basket: 45-135 degrees (90 ± 45)
+        # Left basket: 270 ± basket_width degrees
+        # Right basket: 90 ± basket_width degrees
 
-        normalized_angle = angle % 360
-
-        if 225 <= normalized_angle <= 315:
+        if abs(self._angle_difference(angle, 270)) <= basket_width:
             return 'left'
-        elif 45 <= normalized_angle <= 135:
+        elif abs(self._angle_difference(angle, 90)) <= basket_width:
             return 'right'
         else:
             return None
@@ -282,6 +607,329 @@ class GyroProcessor:
         self.current_angle = 0.0
         self.previous_angle = 0.0
         self.angular_velocity = 0.0
+        self.gyro_bias = 0.0
         self.previous_timestamp = None
         self.angle_history.clear()
-        self.velocity_history.clear()
\ No newline at end of file
+        self.velocity_history.clear()
+
+
+@dataclass
+class AnglePrediction:
+    """Extrapolated rotation at a future time"""
+    angle: float  # Predicted angle in degrees (0-360)
+    error_bound: float  # Worst-case angle error in degrees
+    timestamp: float  # Time the prediction is for
+    horizon: float  # Seconds extrapolated past the newest sample
+
+
+class RotationPredictor:
+    """
+    Predict the rotation angle ahead of the newest sensor sample
+
+    Feed it the RotationData returned by a GyroProcessor and ask for the
+    angle at a later time, such as when the current frame reaches the
+    screen. The angle is extrapolated with the tracked velocity and
+    acceleration over the horizon h. The error bound assumes that over the
+    next h seconds the acceleration changes no faster than it has over the
+    last few samples (max_jerk) and that its current value is known to
+    within the recent spread:
+
+        error <= max_jerk * h³ / 6 + 0.5 * (max_accel - min_accel) * h²
+                 + dead_zone * h
+
+    The dead zone term covers slow rotations reported as zero velocity.
+    A further term covers the half-sample delay of finite-difference
+    velocities and accelerations. Sensor noise makes the finite-difference
+    jerk large, so with noisy input the bound is conservative rather than
+    tight.
+
+    With a processor attached, the lag of its smoothing window is undone
+    too: a weighted mean of past angles trails the newest by the weights'
+    mean age times the velocity, less half their mean square age times the
+    acceleration.
+    """
+
+    def __init__(self, processor: Optional[GyroProcessor] = None,
+                 look_ahead: float = 0.05, max_horizon: float = 0.25,
+                 history_size: int = 8):
+        """
+        Args:
+            processor: Processor producing the smoothed samples; its
+                smoothing lag is compensated and its dead zone added to the
+                error bound
+            look_ahead: Default prediction distance past the newest sample (s)
+            max_horizon: Longest extrapolation; predictions further out are
+                clamped to it and get a correspondingly larger error bound
+            history_size: Samples used for the acceleration and jerk ranges
+        """
+        self.processor = processor
+        self.look_ahead = look_ahead
+        self.max_horizon = max_horizon
+        self.accelerations = deque(maxlen=history_size)
+        self.jerks = deque(maxlen=history_size)
+        self.last: Optional[RotationData] = None
+        self.sample_interval = 0.0
+
+    def update(self, rotation: RotationData):
+        """Record the newest processed sample"""
+        last = self.last
+        if last is not None and rotation.timestamp > last.timestamp:
+            self.sample_interval = rotation.timestamp - last.timestamp
+            self.jerks.append(abs(rotation.angular_acceleration - last.angular_acceleration)
+                              / self.sample_interval)
+        self.last = RotationData(rotation.angle, rotation.angular_velocity,
+                                 rotation.angular_acceleration, rotation.timestamp)
+        self.accelerations.append(rotation.angular_acceleration)
+
+    def predict(self, timestamp: Optional[float] = None) -> AnglePrediction:
+        """
+        Predict the angle at a time
+
+        Args:
+            timestamp: Target time (defaults to the newest sample's time
+                plus look_ahead)
+
+        Returns:
+            AnglePrediction for the target time
+        """
+        last = self.last
+        if last is None:
+            raise ValueError("No samples to predict from")
+        if timestamp is None:
+            timestamp = last.timestamp + self.look_ahead
+
+        requested = max(0.0, timestamp - last.timestamp)
+        horizon = min(requested, self.max_horizon)
+        interval = self.sample_interval
+        velocity = last.angular_velocity
+        acceleration = last.angular_acceleration
+        angle = velocity * horizon + 0.5 * acceleration * horizon * horizon + last.angle
+
+        dead_zone = 0.0
+        if self.processor is not None:
+            mean_age, mean_square_age = self.processor._smoothing_moments()
+            angle += (velocity * mean_age * interval
+                      - 0.5 * acceleration * mean_square_age * interval * interval)
+            dead_zone = self.processor.dead_zone
+
+        max_jerk = max(self.jerks, default=0.0)
+        acceleration_range = max(self.accelerations) - min(self.accelerations)
+        error_bound = (max_jerk * horizon ** 3 / 6
+                       + 0.5 * acceleration_range * horizon * horizon
+                       + 0.5 * interval * (abs(acceleration) * horizon
+                                           + 0.5 * max_jerk * horizon * horizon)
+                       + dead_zone * horizon)
+
+        # Motion past max_horizon is not extrapolated at all
+        beyond = requested - horizon
+        if beyond > 0:
+            max_acceleration = max(abs(value) for value in self.accelerations)
+            error_bound += ((abs(velocity + acceleration * horizon) + dead_zone) * beyond
+                            + 0.5 * max_acceleration * beyond * beyond)
+
+        return AnglePrediction(
+            angle=float(angle % 360),
+            error_bound=float(min(error_bound, 180.0)),
+            timestamp=float(timestamp),
+            horizon=horizon
+        )
+
+    def reset(self):
+        """Forget all samples"""
+        self.accelerations.clear()
+        self.jerks.clear()
+        self.last = None
+        self.sample_interval = 0.0
+
+
+class FastGyroProcessor(GyroProcessor):
+    """
+    GyroProcessor for high sensor rates (500 Hz and up)
+
+    Gives the same results as GyroProcessor, up to float rounding of the
+    weighted average, with less work per sample: angles go into a
+    preallocated ring buffer, and the smoothing weights for every fill level
+    and ring position are computed once, already rotated to line up with
+    the ring slots, so smoothing is one dot product. Results are slotted
+    RotationSample objects; with reuse_result one object is updated in place
+    and returned from every call.
+    """
+
+    def __init__(self, smoothing_factor: float = 0.15,
+                 dead_zone: float = 2.0, reuse_result: bool = False,
+                 fusion_gains: Optional[FusionGains] = None):
+        """
+        Args:
+            smoothing_factor: Smoothing factor for rotation (0-1)
+            dead_zone: Minimum rotation angle to register (degrees)
+            reuse_result: Return the same RotationSample from every call
+            fusion_gains: Complementary filter gains for process_fused_data
+        """
+        self._ring = [0.0] * HISTORY_SIZE
+        self._ring_head = 0
+        self._ring_fill = 0
+        super().__init__(smoothing_factor, dead_zone, fusion_gains)
+        self._result = RotationSample(0.0, 0.0, 0.0, 0.0) if reuse_result else None
+
+    @property
+    def smoothing_factor(self) -> float:
+        return self._smoothing_factor
+
+    @smoothing_factor.setter
+    def smoothing_factor(self, value: float):
+        self._smoothing_factor = value
+        self._partial_weights, self._full_weights = _ring_weights(value, HISTORY_SIZE)
+
+    @property
+    def angle_history(self) -> List[float]:
+        """Smoothing window contents, oldest first (a copy)"""
+        if self._ring_fill < HISTORY_SIZE:
+            return self._ring[:self._ring_fill]
+        return self._ring[self._ring_head:] + self._ring[:self._ring_head]
+
+    @angle_history.setter
+    def angle_history(self, values):
+        values = list(values)[-HISTORY_SIZE:]
+        self._ring[:] = [0.0] * HISTORY_SIZE
+        self._ring[:len(values)] = values
+        self._ring_fill = len(values)
+        self._ring_head = len(values) % HISTORY_SIZE
+
+    def calibrate(self, initial_angle: float = 0.0):
+        """
+        Calibrate the sensor with initial position
+
+        Args:
+            initial_angle: Initial angle to set as zero point
+        """
+        self.calibration_offset = initial_angle
+        self.current_angle = 0.0
+        self.previous_angle = 0.0
+        self.angular_velocity = 0.0
+        self.angle_history = ()
+        self.velocity_history.clear()
+
+    def reset(self):
+        """Reset the processor state"""
+        self.current_angle = 0.0
+        self.previous_angle = 0.0
+        self.angular_velocity = 0.0
+        self.gyro_bias = 0.0
+        self.previous_timestamp = None
+        self.angle_history = ()
+        self.velocity_history.clear()
+
+    def process_gyro_data(self, x: float, y: float, z: float,
+                         timestamp: float) -> RotationSample:
+        """
+        Process raw gyroscope data (see GyroProcessor.process_gyro_data)
+        """
+        angular_velocity = z * _DEGREES_PER_RADIAN
+        if abs(angular_velocity) < self.dead_zone:
+            angular_velocity = 0
+
+        previous_timestamp = self.previous_timestamp
+        dt = 0.016 if previous_timestamp is None else timestamp - previous_timestamp
+
+        self.current_angle += angular_velocity * dt
+        smoothed_angle = self._smooth(self.current_angle)
+
+        velocity_history = self.velocity_history
+        if velocity_history:
+            angular_acceleration = (angular_velocity - velocity_history[-1]) / dt
+        else:
+            angular_acceleration = 0
+        velocity_history.append(angular_velocity)
+
+        self.previous_angle = smoothed_angle
+        self.previous_timestamp = timestamp
+        self.angular_velocity = angular_velocity
+        return self._output(smoothed_angle % 360, angular_velocity,
+                            angular_acceleration, timestamp)
+
+    def process_accelerometer_data(self, x: float, y: float,
+                                 timestamp: float) -> RotationSample:
+        """
+        Process accelerometer data (see GyroProcessor.process_accelerometer_data)
+        """
+        angle_raw = (math.atan2(y, x) * _DEGREES_PER_RADIAN + 360) % 360
+        angle_calibrated = (angle_raw - self.calibration_offset) % 360
+
+        angle_diff = (angle_calibrated - self.current_angle) % 360
+        if angle_diff > 180:
+            angle_diff -= 360
+        if abs(angle_diff) < self.dead_zone:
+            angle_calibrated = self.current_angle
+
+        previous_timestamp = self.previous_timestamp
+        if previous_timestamp is not None:
+            dt = timestamp - previous_timestamp
+            angular_velocity = angle_diff / dt if dt > 0 else 0
+        else:
+            angular_velocity = 0
+            dt = 0.016
+
+        smoothed_angle = self._smooth(angle_calibrated)
+
+        velocity_history = self.velocity_history
+        if velocity_history:
+            angular_acceleration = (angular_velocity - velocity_history[-1]) / dt
+        else:
+            angular_acceleration = 0
+        velocity_history.append(angular_velocity)
+
+        self.current_angle = smoothed_angle
+        self.previous_angle = smoothed_angle
+        self.previous_timestamp = timestamp
+        self.angular_velocity = angular_velocity
+        return self._output(smoothed_angle, angular_velocity,
+                            angular_acceleration, timestamp)
+
+    def _smooth(self, value: float) -> float:
+        """Push a value into the ring and return the weighted average"""
+        ring = self._ring
+        head = self._ring_head
+        ring[head] = value
+        head += 1
+        if head == HISTORY_SIZE:
+            head = 0
+        self._ring_head = head
+
+        if self._ring_fill < HISTORY_SIZE:
+            self._ring_fill += 1
+            weights = self._partial_weights[self._ring_fill]
+        else:
+            weights = self._full_weights[head]
+        return sum(map(mul, ring, weights))
+
+    def _output(self, angle: float, angular_velocity: float,
+                angular_acceleration: float, timestamp: float) -> RotationSample:
+        result = self._result
+        if result is None:
+            return RotationSample(angle, angular_velocity, angular_acceleration, timestamp)
+        result.angle = angle
+        result.angular_velocity = angular_velocity
+        result.angular_acceleration = angular_acceleration
+        result.timestamp = timestamp
+        return result
+
+
+def _ring_weights(smoothing_factor: float,
+                  size: int) -> Tuple[List[Tuple[float, ...]], List[Tuple[float, ...]]]:
+    """
+    Normalized smoothing weights aligned to ring buffer slots
+
+    Returns:
+        (partial, full): partial[fill] for a ring holding fill values in
+        slots 0..fill-1, full[head] for a full ring whose oldest value is
+        in slot head
+    """
+    partial = [()]
+    for fill in range(1, size + 1):
+        weights = np.zeros(size)
+        weights[:fill] = smoothing_factor ** np.arange(fill - 1, -1, -1, dtype=np.float64)
+        partial.append(tuple((weights / weights.sum()).tolist()))
+
+    # A full ring is the fill == size weights rotated so slot head is oldest
+    full = [tuple(np.roll(partial[size], head).tolist()) for head in range(size)]
+    return partial, full
@@ -0,0 +1,389 @@
+"""
+Instrumentation for Rotaenot
+Opt-in call counters and latency histograms for the backend hot paths
+
+Nothing is measured until instrumentation is enabled. Enabling swaps each
+hooked method on its class for a timing wrapper, and disabling puts the
+original function back, so a disabled build runs exactly the original
+code with no flag checks on any call path:
+
+    with instrumented() as metrics:
+        play_song()
+    print(metrics.to_prometheus())
+
+Calls made through bound methods fetched before enabling (or in worker
+processes, such as ChartParser.iter_directory's pool) are not measured.
+"""
+
+import functools
+import json
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .chart_parser import ChartParser
+from .gyro_processor import FastGyroProcessor, GyroProcessor
+from .score_system import B40Calculator, ScoreCalculator
+
+# Latencies are bucketed log-linearly: exact below 2 * SUB_BUCKETS ns, then
+# SUB_BUCKETS buckets per power of two (at most 1/SUB_BUCKETS relative error)
+SUB_BUCKET_BITS = 4
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+_BUCKET_COUNT = (64 - SUB_BUCKET_BITS) * SUB_BUCKETS
+
+# Latencies buffered per histogram before they are bucketed
+PENDING_LIMIT = 4096
+
+# Quantiles exported by summaries and the Prometheus text format
+QUANTILES = (0.5, 0.9, 0.99)
+
+METRIC_PREFIX = 'rotaenot'
+
+# Hot paths hooked by default: (class, method)
+DEFAULT_HOOKS = (
+    (GyroProcessor, 'process_gyro_data'),
+    (GyroProcessor, 'process_accelerometer_data'),
+    (GyroProcessor, 'process_fused_data'),
+    (GyroProcessor, 'process_gyro_batch'),
+    (GyroProcessor, 'process_accelerometer_batch'),
+    (FastGyroProcessor, 'process_gyro_data'),
+    (FastGyroProcessor, 'process_accelerometer_data'),
+    (ScoreCalculator, 'judge_note'),
+    (ScoreCalculator, 'process_note_hit'),
+    (ScoreCalculator, 'score_batch'),
+    (B40Calculator, 'add_score'),
+    (B40Calculator, 'calculate_b40'),
+    (ChartParser, 'parse_chart'),
+    (ChartParser, 'save_chart'),
+    (ChartParser, 'validate_chart'),
+)
+
+
+def _bucket_bounds(index: int) -> Tuple[int, int]:
+    """Smallest latency in a bucket and the first one past it"""
+    if index < 2 * SUB_BUCKETS:
+        return index, index + 1
+    shift = index // SUB_BUCKETS - 1
+    mantissa = index - shift * SUB_BUCKETS
+    return mantissa << shift, (mantissa + 1) << shift
+
+
+@dataclass
+class LatencySummary:
+    """Counts and latency quantiles of one hooked function (times in ns)"""
+    calls: int
+    errors: int  # Calls that raised
+    total_ns: int
+    mean_ns: float
+    min_ns: int
+    max_ns: int
+    p50_ns: float
+    p90_ns: float
+    p99_ns: float
+
+
+class LatencyHistogram:
+    """
+    Fixed-size log-linear histogram of call latencies in nanoseconds
+
+    Hooked calls only append their latency to a pending list; pending
+    latencies are folded into the buckets with a few NumPy operations once
+    PENDING_LIMIT of them pile up, or when the histogram is read.
+    """
+
+    def __init__(self):
+        self.counts = np.zeros(_BUCKET_COUNT, dtype=np.int64)
+        self.pending: List[int] = []
+        self.reset()
+
+    def reset(self):
+        """Drop every recorded call"""
+        self.counts[:] = 0
+        self.pending.clear()  # Cleared in place: wrappers hold its append
+        self.errors = 0
+        self._calls = 0
+        self._total_ns = 0
+        self._min_ns = 0
+        self._max_ns = 0
+
+    def record(self, elapsed_ns: int):
+        """Add one call's latency"""
+        self.pending.append(elapsed_ns)
+        if len(self.pending) >= PENDING_LIMIT:
+            self.flush()
+
+    def flush(self):
+        """Fold pending latencies into the buckets"""
+        if not self.pending:
+            return
+        values = np.maximum(np.array(self.pending, dtype=np.int64), 0)
+        self.pending.clear()
+        # Float exponents give bit lengths exactly below 2 ** 53 ns (104 days)
+        shift = np.maximum(np.frexp(values.astype(np.float64))[1] - SUB_BUCKET_BITS - 1, 0)
+        buckets = np.where(values < 2 * SUB_BUCKETS, values,
+                           shift * SUB_BUCKETS + (values >> shift))
+        self.counts += np.bincount(buckets, minlength=_BUCKET_COUNT)
+        low, high = int(values.min()), int(values.max())
+        self._min_ns = min(self._min_ns, low) if self._calls else low
+        self._max_ns = max(self._max_ns, high)
+        self._calls += len(values)
+        self._total_ns += int(values.sum())
+
+    @property
+    def calls(self) -> int:
+        self.flush()
+        return self._calls
+
+    @property
+    def total_ns(self) -> int:
+        self.flush()
+        return self._total_ns
+
+    @property
+    def min_ns(self) -> int:
+        self.flush()
+        return self._min_ns
+
+    @property
+    def max_ns(self) -> int:
+        self.flush()
+        return self._max_ns
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a latency quantile
+
+        Args:
+            q: Quantile between 0 and 1
+
+        Returns:
+            Latency in ns, interpolated inside its bucket and clamped to the
+            recorded min and max (0 if nothing was recorded)
+        """
+        if not self.calls:
+            return 0.0
+        cumulative = np.cumsum(self.counts)
+        index = min(int(np.searchsorted(cumulative, q * self._calls)), _BUCKET_COUNT - 1)
+        count = int(self.counts[index])
+        seen = int(cumulative[index]) - count
+        low, high = _bucket_bounds(index)
+        value = low + (high - low) * max(q * self._calls - seen, 0) / max(count, 1)
+        return float(min(max(value, self._min_ns), self._max_ns))
+
+    def summary(self) -> LatencySummary:
+        p50, p90, p99 = (self.quantile(q) for q in QUANTILES)
+        return LatencySummary(
+            calls=self.calls,
+            errors=self.errors,
+            total_ns=self.total_ns,
+            mean_ns=self.total_ns / self.calls if self.calls else 0.0,
+            min_ns=self.min_ns,
+            max_ns=self.max_ns,
+            p50_ns=p50,
+            p90_ns=p90,
+            p99_ns=p99
+        )
+
+
+def _timed(function: Callable, histogram: LatencyHistogram) -> Callable:
+    """Wrap function so every call is recorded in histogram"""
+    clock = time.perf_counter_ns
+    pending = histogram.pending
+    append = pending.append
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = clock()
+        try:
+            return function(*args, **kwargs)
+        except BaseException:
+            histogram.errors += 1
+            raise
+        finally:
+            append(clock() - start)
+            if len(pending) >= PENDING_LIMIT:
+                histogram.flush()
+    return wrapper
+
+
+class Instrumentation:
+    """
+    Set of hooked methods and their latency histograms
+
+    Each hook is a method defined on a class; its metric is named
+    "Class.method". Metrics persist across enable/disable cycles until
+    reset is called.
+    """
+
+    def __init__(self, hooks=DEFAULT_HOOKS):
+        """
+        Args:
+            hooks: (class, method name) pairs to instrument
+        """
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self._hooks: List[Tuple[type, str, str]] = []
+        self._originals: Dict[Tuple[type, str], Callable] = {}
+        self._enabled = False
+        for owner, attribute in hooks:
+            self.add_hook(owner, attribute)
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    def add_hook(self, owner: type, attribute: str, metric: Optional[str] = None):
+        """
+        Instrument another method
+
+        Args:
+            owner: Class that defines the method
+            attribute: Method name
+            metric: Metric name (defaults to "Class.method")
+        """
+        if attribute not in vars(owner):
+            raise ValueError(f"{owner.__name__} does not define {attribute}")
+        metric = metric or f'{owner.__name__}.{attribute}'
+        self._hooks.append((owner, attribute, metric))
+        self.histograms.setdefault(metric, LatencyHistogram())
+        if self.enabled:
+            self._wrap(owner, attribute, metric)
+
+    def enable(self):
+        """Swap every hooked method for its timing wrapper"""
+        self._enabled = True
+        for owner, attribute, metric in self._hooks:
+            if (owner, attribute) not in self._originals:
+                self._wrap(owner, attribute, metric)
+
+    def disable(self):
+        """Restore the original methods"""
+        for (owner, attribute), original in self._originals.items():
+            setattr(owner, attribute, original)
+        self._originals.clear()
+        self._enabled = False
+
+    def reset(self):
+        """Clear every histogram"""
+        for histogram in self.histograms.values():
+            histogram.reset()
+
+    @contextmanager
+    def session(self, reset: bool = True) -> Iterator['Instrumentation']:
+        """
+        Measure everything run inside a with block
+
+        Args:
+            reset: Clear earlier measurements first
+
+        Yields:
+            This instrumentation; it goes back to its previous state
+            (enabled or not) on exit, keeping the measurements
+        """
+        was_enabled = self.enabled
+        if reset:
+            self.reset()
+        self.enable()
+        try:
+            yield self
+        finally:
+            if not was_enabled:
+                self.disable()
+
+    def summary(self, include_idle: bool = False) -> Dict[str, LatencySummary]:
+        """
+        Per-metric summaries
+
+        Args:
+            include_idle: Also list metrics that recorded no calls
+        """
+        return {metric: histogram.summary()
+                for metric, histogram in sorted(self.histograms.items())
+                if include_idle or histogram.calls}
+
+    def to_json(self, **kwargs) -> str:
+        """Summaries as a JSON object keyed by metric name"""
+        data = {metric: asdict(summary) for metric, summary in self.summary().items()}
+        return json.dumps(data, **kwargs)
+
+    def to_prometheus(self) -> str:
+        """
+        Summaries in the Prometheus text exposition format
+
+        Latencies are exported as one summary family in seconds, labelled
+        by function, with a separate counter family for calls that raised.
+        """
+        duration = f'{METRIC_PREFIX}_call_duration_seconds'
+        errors = f'{METRIC_PREFIX}_call_errors_total'
+        summaries = self.summary()
+        lines = [f'# HELP {duration} Latency of instrumented backend calls.',
+                 f'# TYPE {duration} summary']
+        for metric, summary in summaries.items():
+            label = f'function="{_escape_label(metric)}"'
+            histogram = self.histograms[metric]
+            for q in QUANTILES:
+                lines.append(f'{duration}{{{label},quantile="{q}"}} '
+                             f'{_format_value(histogram.quantile(q) / 1e9)}')
+            lines.append(f'{duration}_sum{{{label}}} {_format_value(summary.total_ns / 1e9)}')
+            lines.append(f'{duration}_count{{{label}}} {summary.calls}')
+        lines += [f'# HELP {errors} Instrumented backend calls that raised.',
+                  f'# TYPE {errors} counter']
+        for metric, summary in summaries.items():
+            lines.append(f'{errors}{{function="{_escape_label(metric)}"}} {summary.errors}')
+        return '\n'.join(lines) + '\n'
+
+    def export(self, path: str, format: str = 'json'):
+        """
+        Write the summaries to a file
+
+        Args:
+            path: Destination path
+            format: 'json' or 'prometheus'
+        """
+        if format == 'json':
+            text = self.to_json(indent=2)
+        elif format == 'prometheus':
+            text = self.to_prometheus()
+        else:
+            raise ValueError(f"Unsupported export format: {format}")
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def _wrap(self, owner: type, attribute: str, metric: str):
+        original = vars(owner)[attribute]
+        self._originals[(owner, attribute)] = original
+        setattr(owner, attribute, _timed(original, self.histograms[metric]))
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value))
+
+
+# Shared instance covering DEFAULT_HOOKS
+instrumentation = Instrumentation()
+
+
+def instrumented(reset: bool = True):
+    """Context manager measuring the default hot paths; see Instrumentation.session"""
+    return instrumentation.session(reset)
+
+
+def enable():
+    """Start measuring the default hot paths until disable is called"""
+    instrumentation.enable()
+
+
+def disable():
+    """Stop measuring and restore the original methods"""
+    instrumentation.disable()
+
+
+def summary(include_idle: bool = False) -> Dict[str, LatencySummary]:
+    """Summaries of the shared instance"""
+    return instrumentation.summary(include_idle)
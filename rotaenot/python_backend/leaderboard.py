@@ -0,0 +1,296 @@
+"""
+Leaderboard for Rotaenot
+Columnar multi-player score store with bulk B40 recomputation and ranking
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .score_system import B40_SIZE, calculate_ratings
+
+# One row per submitted play; players and songs are interned to integer ids
+SCORE_DTYPE = np.dtype([
+    ('player', np.int32),
+    ('song', np.int32),
+    ('difficulty', np.int16),
+    ('accuracy', np.float64),
+    ('rating', np.float64),
+    ('timestamp', np.int64),
+])
+
+# Maps (chart difficulties, accuracies) to ratings; see calculate_ratings
+RatingRule = Callable[[np.ndarray, np.ndarray], np.ndarray]
+
+
+@dataclass
+class PlayerB40:
+    """A player's B40 as stored by the leaderboard"""
+    player: str
+    total: float
+    rank: int
+    plays: np.ndarray  # SCORE_DTYPE rows of the best plays, best first
+    song_ids: List[str]
+
+
+class _Standings:
+    """B40 results of every player, rebuilt in bulk after any change"""
+
+    def __init__(self, scores: np.ndarray, player_count: int):
+        best = _best_plays(scores)
+        self.rows = best[best['rank'] < B40_SIZE]
+        self.row_starts = np.searchsorted(self.rows['player'], np.arange(player_count + 1))
+
+        # Rows are in (player, rank) order; add rank by rank so each total is
+        # summed in the same order as B40Calculator.calculate_b40
+        self.totals = np.zeros(player_count)
+        starts = self.row_starts[:-1]
+        lengths = np.diff(self.row_starts)
+        ratings = np.ascontiguousarray(self.rows['rating'])
+        for rank in range(int(lengths.max(initial=0))):
+            players = np.flatnonzero(lengths > rank)
+            self.totals[players] += ratings[starts[players] + rank]
+
+        self.sorted_totals = np.sort(self.totals)
+
+
+class Leaderboard:
+    """
+    B40 ratings for many players
+
+    Plays are appended to a growable structured array. Ratings are derived
+    from difficulty and accuracy by a vectorized rating rule, so a rule
+    change re-rates every stored play in one call. B40 standings for all
+    players are recomputed lazily with a few sorts over the whole table,
+    using the same best-play and tie rules as B40Calculator.
+    """
+
+    def __init__(self, rating_rule: Optional[RatingRule] = None,
+                 initial_capacity: int = 1024):
+        """
+        Args:
+            rating_rule: Vectorized rating function (defaults to calculate_ratings)
+            initial_capacity: Rows to preallocate
+        """
+        self.rating_rule = rating_rule or calculate_ratings
+        self._scores = np.zeros(initial_capacity, dtype=SCORE_DTYPE)
+        self._size = 0
+        self.player_names: List[str] = []
+        self.song_ids: List[str] = []
+        self._player_index: Dict[str, int] = {}
+        self._song_index: Dict[str, int] = {}
+        self._standings: Optional[_Standings] = None
+
+    @property
+    def scores(self) -> np.ndarray:
+        """Every stored play in submission order (read-only view)"""
+        view = self._scores[:self._size]
+        view.flags.writeable = False
+        return view
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add_score(self, player: str, song_id: str, difficulty: int,
+                  accuracy: float, timestamp: int):
+        """Add a single play"""
+        self.add_scores([player], [song_id], [difficulty], [accuracy], [timestamp])
+
+    def add_scores(self, players: Sequence[str], song_ids: Sequence[str],
+                   difficulties: Union[Sequence[int], np.ndarray],
+                   accuracies: Union[Sequence[float], np.ndarray],
+                   timestamps: Union[Sequence[int], np.ndarray]):
+        """
+        Add many plays at once
+
+        Args:
+            players: Player name of each play
+            song_ids: Song of each play
+            difficulties: Chart difficulty of each play
+            accuracies: Accuracy percentage of each play
+            timestamps: Time of each play
+
+        Plays are treated as submitted in the given order.
+        """
+        player_ids = self._intern(players, self._player_index, self.player_names)
+        song_codes = self._intern(song_ids, self._song_index, self.song_ids)
+        count = len(player_ids)
+        if not (len(song_codes) == len(difficulties) == len(accuracies)
+                == len(timestamps) == count):
+            raise ValueError("Score columns must have the same length")
+
+        self._reserve(self._size + count)
+        rows = self._scores[self._size:self._size + count]
+        rows['player'] = player_ids
+        rows['song'] = song_codes
+        rows['difficulty'] = difficulties
+        rows['accuracy'] = accuracies
+        rows['rating'] = self.rating_rule(rows['difficulty'], rows['accuracy'])
+        rows['timestamp'] = timestamps
+        self._size += count
+        self._standings = None
+
+    def recompute_ratings(self, rating_rule: Optional[RatingRule] = None):
+        """
+        Re-rate every stored play
+
+        Args:
+            rating_rule: New rating function (defaults to the current one)
+        """
+        if rating_rule is not None:
+            self.rating_rule = rating_rule
+        rows = self._scores[:self._size]
+        rows['rating'] = self.rating_rule(rows['difficulty'], rows['accuracy'])
+        self._standings = None
+
+    def b40_totals(self) -> Dict[str, float]:
+        """B40 total of every player"""
+        return dict(zip(self.player_names, self._get_standings().totals.tolist()))
+
+    def player_b40(self, player: str) -> PlayerB40:
+        """
+        B40 of one player
+
+        Returns:
+            PlayerB40 with the best plays in B40Calculator order
+        """
+        player_id = self._player_id(player)
+        standings = self._get_standings()
+        start, end = standings.row_starts[player_id:player_id + 2]
+        rows = standings.rows[start:end]
+
+        plays = np.empty(len(rows), dtype=SCORE_DTYPE)
+        for name in SCORE_DTYPE.names:
+            plays[name] = rows[name]
+        return PlayerB40(player=player,
+                         total=float(standings.totals[player_id]),
+                         rank=self._rank(standings, player_id),
+                         plays=plays,
+                         song_ids=[self.song_ids[song] for song in plays['song'].tolist()])
+
+    def rank(self, player: str) -> int:
+        """
+        Leaderboard position of a player (1 is best, ties share a rank)
+        """
+        return self._rank(self._get_standings(), self._player_id(player))
+
+    def top(self, count: int = 100) -> List[Tuple[str, float]]:
+        """
+        Best players by B40 total
+
+        Args:
+            count: Number of players to return
+
+        Returns:
+            (player, total) pairs, best first; ties keep registration order
+        """
+        totals = self._get_standings().totals
+        count = min(count, len(totals))
+        if count <= 0:
+            return []
+
+        candidates = np.arange(len(totals))
+        if count < len(totals):
+            # Keep every player tied with the count-th best so the final
+            # stable sort decides ties the same way for any count
+            kth = -np.partition(-totals, count - 1)[count - 1]
+            candidates = np.flatnonzero(totals >= kth)
+        order = candidates[np.argsort(-totals[candidates], kind='stable')][:count]
+        return [(self.player_names[i], float(totals[i])) for i in order.tolist()]
+
+    def _rank(self, standings: _Standings, player_id: int) -> int:
+        total = standings.totals[player_id]
+        better = len(standings.sorted_totals) - np.searchsorted(
+            standings.sorted_totals, total, side='right')
+        return int(better) + 1
+
+    def _get_standings(self) -> _Standings:
+        if self._standings is None:
+            self._standings = _Standings(self._scores[:self._size], len(self.player_names))
+        return self._standings
+
+    def _player_id(self, player: str) -> int:
+        try:
+            return self._player_index[player]
+        except KeyError:
+            raise ValueError(f"Unknown player: {player}") from None
+
+    def _reserve(self, size: int):
+        if size <= len(self._scores):
+            return
+        grown = np.zeros(max(size, 2 * len(self._scores)), dtype=SCORE_DTYPE)
+        grown[:self._size] = self._scores[:self._size]
+        self._scores = grown
+
+    @staticmethod
+    def _intern(names: Sequence[str], index: Dict[str, int], table: List[str]) -> np.ndarray:
+        """Map names to integer ids, registering new names in first-seen order"""
+        codes = []
+        for name in names:
+            code = index.get(name)
+            if code is None:
+                code = index[name] = len(table)
+                table.append(name)
+            codes.append(code)
+        return np.array(codes, dtype=np.int32)
+
+
+_BEST_DTYPE = np.dtype(SCORE_DTYPE.descr + [('rank', np.int64)])
+
+
+def _best_plays(scores: np.ndarray) -> np.ndarray:
+    """
+    Best play of every (player, song), ranked within each player
+
+    Matches B40Calculator: a song's best is its earliest play with the
+    highest rating, and equal ratings are ordered by when the player first
+    played the song.
+
+    Returns:
+        _BEST_DTYPE rows sorted by player, then rank
+    """
+    if not len(scores):
+        return np.zeros(0, dtype=_BEST_DTYPE)
+
+    player = np.ascontiguousarray(scores['player'], dtype=np.int64)
+    rating = np.ascontiguousarray(scores['rating'])
+    pair = player * (int(scores['song'].max()) + 1) + scores['song']
+
+    # Group plays by (player, song); group order within is irrelevant
+    pair_order = np.argsort(pair)
+    sorted_pair = pair[pair_order]
+    starts = np.flatnonzero(np.r_[True, sorted_pair[1:] != sorted_pair[:-1]])
+    sizes = np.diff(np.r_[starts, len(scores)])
+
+    # Earliest play with the group's highest rating, and the group's first play
+    sorted_rating = rating[pair_order]
+    top_rating = np.maximum.reduceat(sorted_rating, starts)
+    is_top = sorted_rating == np.repeat(top_rating, sizes)
+    best_rows = np.minimum.reduceat(np.where(is_top, pair_order, len(scores)), starts)
+    first_play = np.minimum.reduceat(pair_order, starts)
+
+    order = _player_rank_order(player[best_rows], rating[best_rows], first_play,
+                               len(scores))
+    best_rows = best_rows[order]
+    best_player = player[best_rows]
+
+    ranked = np.empty(len(best_rows), dtype=_BEST_DTYPE)
+    for name in SCORE_DTYPE.names:
+        ranked[name] = scores[name][best_rows]
+    group_starts = np.flatnonzero(np.r_[True, best_player[1:] != best_player[:-1]])
+    group_start = np.repeat(group_starts, np.diff(np.r_[group_starts, len(best_rows)]))
+    ranked['rank'] = np.arange(len(best_rows)) - group_start
+    return ranked
+
+
+def _player_rank_order(player: np.ndarray, rating: np.ndarray,
+                       first_play: np.ndarray, row_count: int) -> np.ndarray:
+    """Order by player, then rating (highest first), then first play"""
+    # Dense rating ranks let all three keys share one unstable int64 sort,
+    # which is several times faster than a three-key lexsort
+    _, rating_rank = np.unique(-rating, return_inverse=True)
+    rating_count = int(rating_rank.max()) + 1
+    if (int(player.max()) + 1) * rating_count * row_count < 2 ** 63:
+        return np.argsort((player * rating_count + rating_rank) * row_count + first_play)
+    return np.lexsort((first_play, -rating, player))
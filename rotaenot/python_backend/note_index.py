@@ -0,0 +1,219 @@
+"""
+Note Spatial Index for Rotaenot
+Time-bucketed, angle-sorted index answering "which notes are near (t, θ)"
+"""
+
+import math
+from typing import Tuple, Union
+
+import numpy as np
+
+from .chart_types import Chart, NoteArray
+
+
+class NoteIndex:
+    """
+    Index of a chart's notes by time and angular position
+
+    Notes are grouped into fixed-width time buckets and sorted by position
+    inside each bucket. Both levels are folded into one sorted integer key,
+    bucket * A + rank of the position among the A distinct positions, so a
+    query is a couple of binary searches per bucket the time window touches
+    (usually one or two) followed by a scan of the k matches: O(log n + k)
+    however dense the chart is. Integer keys keep bucket boundaries exact
+    at any chart length.
+
+    Positions are normalized to [0, 360), and angular ranges that cross 0°
+    are split in two, so wraparound is handled exactly. All results are
+    indices into the original note array, ordered by note time (then index).
+    """
+
+    def __init__(self, notes: Union[NoteArray, Chart], bucket_size: float = 0.5):
+        """
+        Args:
+            notes: Notes (or a chart) to index
+            bucket_size: Width of the time buckets in seconds; about the
+                size of the judgment window works best
+        """
+        if isinstance(notes, Chart):
+            notes = notes.note_array
+        if bucket_size <= 0:
+            raise ValueError("bucket_size must be positive")
+
+        self.bucket_size = bucket_size
+        time = np.asarray(notes.time, dtype=np.float64)
+        position = np.mod(notes.position, 360.0)
+        position[position >= 360.0] = 0.0  # mod of tiny negatives rounds up to 360
+
+        bucket = np.floor(time / bucket_size).astype(np.int64)
+        self.first_bucket = int(bucket.min()) if len(bucket) else 0
+        self.bucket_count = int(bucket.max()) - self.first_bucket + 1 if len(bucket) else 0
+        bucket -= self.first_bucket
+
+        order = np.lexsort((position, bucket))
+        self.note_indices = order
+        self.times = time[order]
+        self.positions = position[order]
+        self.angles = np.unique(position)  # Distinct positions, ascending
+        self.keys = bucket[order] * len(self.angles) + self.angles.searchsorted(self.positions)
+
+        # Plain time order for window queries that ignore angle
+        self._time_order = np.argsort(time, kind='stable')
+        self._sorted_times = time[self._time_order]
+
+    def __len__(self) -> int:
+        return len(self.note_indices)
+
+    def notes_in_window(self, time: float, window: float) -> np.ndarray:
+        """
+        Notes within window seconds of time, at any angle
+
+        Returns:
+            Note indices in time order
+        """
+        start = np.searchsorted(self._sorted_times, time - window, side='left')
+        end = np.searchsorted(self._sorted_times, time + window, side='right')
+        return self._time_order[start:end]
+
+    def query(self, time: float, angle: float, window: float,
+              tolerance: float) -> np.ndarray:
+        """
+        Notes within window seconds of time and tolerance degrees of angle
+
+        Args:
+            time: Query time in seconds
+            angle: Query angle in degrees (any value; wrapped to 0-360)
+            window: Half-width of the time window in seconds
+            tolerance: Half-width of the angular window in degrees
+
+        Returns:
+            Note indices in time order
+        """
+        if not self.bucket_count:
+            return np.zeros(0, dtype=np.int64)
+
+        first = max(math.floor((time - window) / self.bucket_size) - self.first_bucket, 0)
+        last = min(math.floor((time + window) / self.bucket_size) - self.first_bucket,
+                   self.bucket_count - 1)
+        # Angular ranges as [first rank, first rank past the range)
+        ranges = [(int(self.angles.searchsorted(low, side='left')),
+                   int(self.angles.searchsorted(high, side='right')))
+                  for low, high in _angle_ranges(angle, tolerance)]
+
+        slices = []
+        for bucket in range(first, last + 1):
+            base = bucket * len(self.angles)
+            for low, high in ranges:
+                start, end = self.keys.searchsorted((base + low, base + high))
+                if start < end:
+                    slices.append(np.arange(start, end))
+        if not slices:
+            return np.zeros(0, dtype=np.int64)
+
+        candidates = np.concatenate(slices)
+        times = self.times[candidates]
+        candidates = candidates[np.abs(times - time) <= window]
+        notes = self.note_indices[candidates]
+        return notes[np.lexsort((notes, self.times[candidates]))]
+
+    def query_batch(self, times: np.ndarray, angles: np.ndarray, window: float,
+                    tolerance: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Run many queries at once, fully vectorized
+
+        Args:
+            times: Query times in seconds
+            angles: Query angles in degrees
+            window: Half-width of the time window in seconds
+            tolerance: Half-width of the angular window in degrees
+
+        Returns:
+            (offsets, indices) in CSR layout: the notes of query i are
+            indices[offsets[i]:offsets[i + 1]], in time order
+        """
+        times = np.asarray(times, dtype=np.float64)
+        angles = np.asarray(angles, dtype=np.float64)
+        if times.shape != angles.shape or times.ndim != 1:
+            raise ValueError("times and angles must be 1-D and the same length")
+        query_count = len(times)
+        if not self.bucket_count or not query_count:
+            return np.zeros(query_count + 1, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        # One row per (query, bucket) pair the time window touches
+        first = np.floor((times - window) / self.bucket_size).astype(np.int64) - self.first_bucket
+        last = np.floor((times + window) / self.bucket_size).astype(np.int64) - self.first_bucket
+        first = np.maximum(first, 0)
+        last = np.minimum(last, self.bucket_count - 1)
+        spans = np.maximum(last - first + 1, 0)
+        query = np.repeat(np.arange(query_count), spans)
+        bucket = first[query] + _ramps(spans)
+
+        # Up to two angular ranges per row; empty ranges have high < low
+        low, high, wrap_high = _angle_ranges_batch(angles, tolerance)
+        # Angles become position ranks; a range's end is the first rank past it
+        low = self.angles.searchsorted(low, side='left')
+        high = self.angles.searchsorted(high, side='right')
+        wrap_end = self.angles.searchsorted(wrap_high, side='right')
+        base = bucket * len(self.angles)
+        starts = self.keys.searchsorted(np.concatenate((base + low[query], base)))
+        ends = self.keys.searchsorted(np.concatenate((base + high[query],
+                                                      base + wrap_end[query])))
+        owners = np.concatenate((query, query))
+        wraps = np.concatenate((np.zeros(len(query), dtype=bool), wrap_high[query] >= 0))
+        keep = wraps | (np.arange(len(owners)) < len(query))
+        starts, ends, owners = starts[keep], ends[keep], owners[keep]
+
+        lengths = np.maximum(ends - starts, 0)
+        candidates = np.repeat(starts, lengths) + _ramps(lengths)
+        owners = np.repeat(owners, lengths)
+
+        in_window = np.abs(self.times[candidates] - times[owners]) <= window
+        candidates, owners = candidates[in_window], owners[in_window]
+        notes = self.note_indices[candidates]
+        order = np.lexsort((notes, self.times[candidates], owners))
+
+        offsets = np.zeros(query_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(owners, minlength=query_count), out=offsets[1:])
+        return offsets, notes[order]
+
+
+def _angle_ranges(angle: float, tolerance: float):
+    """Inclusive [low, high] position ranges within tolerance of angle"""
+    if tolerance >= 180:
+        return ((0.0, 360.0),)
+    low = (angle - tolerance) % 360.0
+    if low >= 360.0:
+        low = 0.0
+    high = low + 2 * tolerance
+    if high < 360.0:
+        return ((low, high),)
+    return ((low, 360.0), (0.0, high - 360.0))
+
+
+def _angle_ranges_batch(angles: np.ndarray, tolerance: float):
+    """
+    Vectorized _angle_ranges
+
+    Returns:
+        (low, high, wrap_high): the main range [low, high] and the wrapped
+        range [0, wrap_high], where wrap_high is -1 if there is none
+    """
+    count = len(angles)
+    if tolerance >= 180:
+        return np.zeros(count), np.full(count, 360.0), np.full(count, -1.0)
+    low = np.mod(angles - tolerance, 360.0)
+    low[low >= 360.0] = 0.0
+    high = low + 2 * tolerance
+    wraps = high >= 360.0
+    wrap_high = np.where(wraps, high - 360.0, -1.0)
+    high = np.where(wraps, 360.0, high)
+    return low, high, wrap_high
+
+
+def _ramps(lengths: np.ndarray) -> np.ndarray:
+    """Concatenated aranges: 0..lengths[0]-1, 0..lengths[1]-1, ..."""
+    total = int(lengths.sum())
+    if not total:
+        return np.zeros(0, dtype=np.int64)
+    ends = np.cumsum(lengths)
+    return np.arange(total) - np.repeat(ends - lengths, lengths)
@@ -0,0 +1,263 @@
+"""
+Replays for Rotaenot
+Compact recordings of a play and a re-judging engine that scores them again
+
+Replay layout (little-endian):
+    header    40 bytes: magic, version, chart hash, input count,
+              gyro sample count, metadata size
+    metadata  UTF-8 JSON (player, timestamps, ...)
+    inputs    packed INPUT_DTYPE records
+    gyro      packed GYRO_DTYPE records
+"""
+
+import hashlib
+import json
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .chart_types import Chart, NoteType
+from .score_system import ScoreCalculator, ScoreData, JudgmentWindow
+
+REPLAY_MAGIC = b'RTNR'
+REPLAY_VERSION = 1
+REPLAY_EXTENSION = '.rtnr'
+
+# Input event kinds
+INPUT_TAP = 0
+INPUT_RELEASE = 1
+INPUT_FLICK = 2
+
+INPUT_DTYPE = np.dtype([('time', '<f8'), ('position', '<f4'), ('kind', 'u1')])
+GYRO_DTYPE = np.dtype([('time', '<f8'), ('angle', '<f4')])
+
+_HEADER = struct.Struct('<4sHH16sIII')
+
+
+@dataclass
+class Replay:
+    """A recorded play of one chart"""
+    chart_hash: bytes  # chart_hash() of the chart that was played
+    inputs: np.ndarray  # INPUT_DTYPE records sorted by time
+    gyro: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=GYRO_DTYPE))
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+def chart_hash(chart: Chart) -> bytes:
+    """
+    Fingerprint a chart's notes so replays can be matched to it
+
+    Returns:
+        16-byte digest of the time, position and type columns
+    """
+    notes = chart.note_array
+    digest = hashlib.blake2b(digest_size=16)
+    for column in (notes.time, notes.position, notes.type_code):
+        digest.update(np.ascontiguousarray(column).tobytes())
+    return digest.digest()
+
+
+def encode_replay(replay: Replay) -> bytes:
+    """Serialize a replay to bytes"""
+    metadata = json.dumps(replay.metadata).encode('utf-8')
+    header = _HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, 0, replay.chart_hash,
+                          len(replay.inputs), len(replay.gyro), len(metadata))
+    return b''.join((header, metadata,
+                     replay.inputs.astype(INPUT_DTYPE, copy=False).tobytes(),
+                     replay.gyro.astype(GYRO_DTYPE, copy=False).tobytes()))
+
+
+def decode_replay(data: bytes) -> Replay:
+    """
+    Deserialize a replay from bytes
+
+    The record arrays are read-only views into data.
+    """
+    if len(data) < _HEADER.size:
+        raise ValueError("Truncated replay")
+
+    magic, version, _, digest, input_count, gyro_count, metadata_size = \
+        _HEADER.unpack_from(data)
+    if magic != REPLAY_MAGIC:
+        raise ValueError("Not a replay file")
+    if version != REPLAY_VERSION:
+        raise ValueError(f"Unsupported replay version {version}")
+
+    offset = _HEADER.size
+    metadata = json.loads(data[offset:offset + metadata_size].decode('utf-8'))
+    offset += metadata_size
+    inputs = np.frombuffer(data, dtype=INPUT_DTYPE, count=input_count, offset=offset)
+    offset += inputs.nbytes
+    gyro = np.frombuffer(data, dtype=GYRO_DTYPE, count=gyro_count, offset=offset)
+
+    return Replay(digest, inputs, gyro, metadata)
+
+
+def write_replay(replay: Replay, file_path: str):
+    """Save a replay to a file"""
+    with open(file_path, 'wb') as f:
+        f.write(encode_replay(replay))
+
+
+def read_replay(file_path: str) -> Replay:
+    """Load a replay from a file"""
+    with open(file_path, 'rb') as f:
+        return decode_replay(f.read())
+
+
+class ReplayJudge:
+    """
+    Re-judge replays of one chart
+
+    Tap-style notes are matched one-to-one with input events by a two-pointer
+    sweep over time-sorted notes and inputs: each note takes the earliest
+    unused press inside the GOOD window whose angle is within the position
+    tolerance. Catch notes are judged from the recorded rotation angle at the
+    note time when the replay has gyro samples.
+    """
+
+    def __init__(self, chart: Chart, judgment_windows: Optional[JudgmentWindow] = None,
+                 position_tolerance: float = 30.0):
+        """
+        Args:
+            chart: Chart the replays were recorded on
+            judgment_windows: Timing windows (defaults to JudgmentWindow())
+            position_tolerance: Maximum angular distance of a hit (degrees)
+        """
+        notes = chart.note_array
+        order = np.argsort(notes.time, kind='stable')
+        self.note_times = notes.time[order]
+        self.note_positions = notes.position[order]
+        self.catch_mask = notes.type_mask(NoteType.CATCH)[order]
+        self.judgment_windows = judgment_windows or JudgmentWindow()
+        self.position_tolerance = position_tolerance
+        self.chart_hash = chart_hash(chart)
+
+    def judge(self, replay: Replay, verify: bool = True) -> ScoreData:
+        """
+        Score a replay
+
+        Args:
+            replay: Replay to judge
+            verify: Reject replays recorded on a different chart
+
+        Returns:
+            ScoreData as ScoreCalculator would have produced live
+        """
+        if verify and replay.chart_hash != self.chart_hash:
+            raise ValueError("Replay was recorded on a different chart")
+
+        differences = self.time_differences(replay)
+        calculator = ScoreCalculator()
+        calculator.judgment_windows = self.judgment_windows
+        return calculator.score_batch(differences)
+
+    def time_differences(self, replay: Replay) -> np.ndarray:
+        """
+        Timing difference in ms of each note's hit, in note time order
+
+        Returns:
+            Array of differences; NaN for notes that were not hit
+        """
+        differences = np.full(len(self.note_times), np.nan)
+        use_gyro = len(replay.gyro) > 0 and self.catch_mask.any()
+        tap_notes = np.flatnonzero(~self.catch_mask) if use_gyro \
+            else np.arange(len(self.note_times))
+
+        presses = replay.inputs[replay.inputs['kind'] != INPUT_RELEASE]
+        presses = presses[np.argsort(presses['time'], kind='stable')]
+        differences[tap_notes] = self._match_presses(tap_notes, presses)
+
+        if use_gyro:
+            catches = np.flatnonzero(self.catch_mask)
+            hit = self._angle_error(replay.gyro, catches) <= self.position_tolerance
+            differences[catches[hit]] = 0.0
+        return differences
+
+    def _match_presses(self, note_indices: np.ndarray, presses: np.ndarray) -> np.ndarray:
+        """Two-pointer matching of notes to presses; NaN where unmatched"""
+        window = self.judgment_windows.good / 1000
+        tolerance = self.position_tolerance
+        note_times = self.note_times[note_indices].tolist()
+        note_positions = self.note_positions[note_indices].tolist()
+        press_times = presses['time'].tolist()
+        press_positions = presses['position'].astype(np.float64).tolist()
+        used = [False] * len(press_times)
+
+        result = [np.nan] * len(note_times)
+        start = 0
+        for i, (note_time, note_position) in enumerate(zip(note_times, note_positions)):
+            # Presses before the window can never match a later note
+            while start < len(press_times) and press_times[start] < note_time - window:
+                start += 1
+
+            j = start
+            while j < len(press_times) and press_times[j] <= note_time + window:
+                if not used[j]:
+                    distance = abs(press_positions[j] - note_position) % 360
+                    if min(distance, 360 - distance) <= tolerance:
+                        used[j] = True
+                        result[i] = (press_times[j] - note_time) * 1000
+                        break
+                j += 1
+
+        return np.array(result, dtype=np.float64)
+
+    def _angle_error(self, gyro: np.ndarray, note_indices: np.ndarray) -> np.ndarray:
+        """Angular distance between the recorded rotation and the notes"""
+        order = np.argsort(gyro['time'], kind='stable')
+        unwrapped = np.unwrap(gyro['angle'][order].astype(np.float64), period=360)
+        angle = np.interp(self.note_times[note_indices], gyro['time'][order], unwrapped)
+        distance = np.abs(angle - self.note_positions[note_indices]) % 360
+        return np.minimum(distance, 360 - distance)
+
+
+# Chart shared by re-judging worker processes (set by the pool initializer)
+_worker_judge: Optional[ReplayJudge] = None
+
+
+def _init_worker(chart: Chart, judgment_windows: Optional[JudgmentWindow],
+                 position_tolerance: float):
+    global _worker_judge
+    _worker_judge = ReplayJudge(chart, judgment_windows, position_tolerance)
+
+
+def _judge_replay_file(file_path: str) -> ScoreData:
+    return _worker_judge.judge(read_replay(file_path))
+
+
+def rejudge_replays(chart: Chart, replay_paths: Iterable[str],
+                    workers: Optional[int] = None,
+                    judgment_windows: Optional[JudgmentWindow] = None,
+                    position_tolerance: float = 30.0,
+                    chunksize: int = 64) -> List[ScoreData]:
+    """
+    Re-judge many replay files of one chart over a process pool
+
+    The chart is sent to each worker once; replays are read and judged
+    inside the workers.
+
+    Args:
+        chart: Chart the replays were recorded on
+        replay_paths: Replay files to judge
+        workers: Number of worker processes (defaults to the CPU count;
+            1 runs everything in this process)
+        judgment_windows: Timing windows (defaults to JudgmentWindow())
+        position_tolerance: Maximum angular distance of a hit (degrees)
+        chunksize: Replays handed to a worker at a time
+
+    Returns:
+        ScoreData per replay, in input order
+    """
+    replay_paths = list(replay_paths)
+    if workers == 1:
+        judge = ReplayJudge(chart, judgment_windows, position_tolerance)
+        return [judge.judge(read_replay(path)) for path in replay_paths]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(chart, judgment_windows,
+                                       position_tolerance)) as pool:
+        return list(pool.map(_judge_replay_file, replay_paths, chunksize=chunksize))
@@ -5,9 +5,15 @@ Handles score calculation, combo tracking, and rating system
 
 from dataclasses import dataclass
 from enum import Enum
-from typing import List, Tuple, Optional
+from bisect import bisect_left
+from typing import TYPE_CHECKING, Dict, List, Tuple, Optional, Sequence, Union
 import math
 
+# NumPy is imported by the batch functions that use it, so scoring single
+# hits doesn't pay its import time
+if TYPE_CHECKING:
+    import numpy as np
+
 
 class JudgmentType(Enum):
     """Note judgment types based on timing accuracy"""
@@ -17,6 +23,23 @@ class JudgmentType(Enum):
     MISS = "miss"
 
 
+# Score multipliers based on judgment
+JUDGMENT_MULTIPLIERS = {
+    JudgmentType.PERFECT: 1.0,
+    JudgmentType.GREAT: 0.8,
+    JudgmentType.GOOD: 0.5,
+    JudgmentType.MISS: 0.0
+}
+
+# Judgment order used for the integer codes of batch scoring
+JUDGMENT_ORDER = (JudgmentType.PERFECT, JudgmentType.GREAT,
+                  JudgmentType.GOOD, JudgmentType.MISS)
+
+# Rating modifiers by minimum accuracy (highest first) and below the lowest
+RATING_MODIFIERS = ((100, 2.0), (98, 1.5), (95, 1.0), (90, 0.5), (80, 0.0))
+RATING_BASE_MODIFIER = -0.5
+
+
 @dataclass
 class JudgmentWindow:
     """Timing windows for note judgments (in milliseconds)"""
@@ -92,14 +115,6 @@ class ScoreCalculator:
         """
         self.total_notes += 1
 
-        # Score multipliers based on judgment
-        multipliers = {
-            JudgmentType.PERFECT: 1.0,
-            JudgmentType.GREAT: 0.8,
-            JudgmentType.GOOD: 0.5,
-            JudgmentType.MISS: 0.0
-        }
-
         # Update counts
         if judgment == JudgmentType.PERFECT:
             self.perfect_count += 1
@@ -118,11 +133,75 @@ class ScoreCalculator:
         self.max_combo = max(self.max_combo, self.current_combo)
 
         # Calculate score (Rotaeno doesn't use combo for score)
-        score_gained = int(base_note_score * multipliers[judgment])
+        score_gained = int(base_note_score * JUDGMENT_MULTIPLIERS[judgment])
         self.current_score += score_gained
 
         return score_gained
 
+    def judge_batch(self, time_differences_ms: Union[Sequence[float], 'np.ndarray']) -> 'np.ndarray':
+        """
+        Judge many hits at once
+
+        Args:
+            time_differences_ms: Timing differences in milliseconds
+
+        Returns:
+            Array of judgment codes (indices into JUDGMENT_ORDER)
+        """
+        import numpy as np
+
+        edges = np.array([self.judgment_windows.perfect,
+                          self.judgment_windows.great,
+                          self.judgment_windows.good])
+        abs_diff = np.abs(np.asarray(time_differences_ms, dtype=np.float64))
+        # Window edges are inclusive, like judge_note; NaN sorts last (a miss)
+        return np.searchsorted(edges, abs_diff, side='left')
+
+    def score_batch(self, time_differences_ms: Union[Sequence[float], 'np.ndarray'],
+                    base_note_score: int = 1000) -> ScoreData:
+        """
+        Judge and score a sequence of hits in one pass
+
+        Equivalent to calling judge_note and process_note_hit for each
+        difference in order: the session state is updated the same way and
+        the returned ScoreData is identical.
+
+        Args:
+            time_differences_ms: Timing differences in milliseconds, in hit order
+            base_note_score: Base score value for a perfect note
+
+        Returns:
+            ScoreData for the session after these hits
+        """
+        import numpy as np
+
+        codes = self.judge_batch(time_differences_ms)
+        counts = np.bincount(codes, minlength=len(JUDGMENT_ORDER)).tolist()
+        perfect, great, good, miss = counts
+
+        self.total_notes += len(codes)
+        self.perfect_count += perfect
+        self.great_count += great
+        self.good_count += good
+        self.miss_count += miss
+        self.current_score += sum(
+            count * int(base_note_score * JUDGMENT_MULTIPLIERS[judgment])
+            for judgment, count in zip(JUDGMENT_ORDER, counts))
+
+        # Combo runs are the gaps between misses; the first run continues
+        # the current combo and the last one becomes the new current combo
+        misses = np.flatnonzero(codes == JUDGMENT_ORDER.index(JudgmentType.MISS))
+        if len(misses):
+            runs = np.diff(np.concatenate(([-1], misses, [len(codes)]))) - 1
+            runs[0] += self.current_combo
+            self.max_combo = max(self.max_combo, int(runs.max()))
+            self.current_combo = int(runs[-1])
+        else:
+            self.current_combo += len(codes)
+            self.max_combo = max(self.max_combo, self.current_combo)
+
+        return self.get_final_score_data()
+
     def get_accuracy(self) -> float:
         """
         Calculate current accuracy percentage
@@ -180,18 +259,11 @@ class ScoreCalculator:
         base_rating = chart_difficulty
 
         # Accuracy modifier
-        if accuracy >= 100:
-            modifier = 2.0
-        elif accuracy >= 98:
-            modifier = 1.5
-        elif accuracy >= 95:
-            modifier = 1.0
-        elif accuracy >= 90:
-            modifier = 0.5
-        elif accuracy >= 80:
-            modifier = 0.0
-        else:
-            modifier = -0.5
+        modifier = RATING_BASE_MODIFIER
+        for threshold, step in RATING_MODIFIERS:
+            if accuracy >= threshold:
+                modifier = step
+                break
 
         rating = base_rating + modifier
         return max(0, rating)  # Ensure non-negative
@@ -229,42 +301,119 @@ class ScoreCalculator:
         return total_notes * base_note_score
 
 
+def calculate_ratings(chart_difficulties: Union[Sequence[int], 'np.ndarray'],
+                      accuracies: Union[Sequence[float], 'np.ndarray']) -> 'np.ndarray':
+    """
+    Vectorized ScoreCalculator.calculate_rating for many plays
+
+    Args:
+        chart_difficulties: Difficulty level of each play's chart
+        accuracies: Accuracy percentage of each play
+
+    Returns:
+        Array of ratings
+    """
+    import numpy as np
+
+    thresholds = np.array([threshold for threshold, _ in reversed(RATING_MODIFIERS)])
+    modifiers = np.array([RATING_BASE_MODIFIER]
+                         + [step for _, step in reversed(RATING_MODIFIERS)])
+    steps = np.searchsorted(thresholds, np.asarray(accuracies, dtype=np.float64),
+                            side='right')
+    ratings = np.asarray(chart_difficulties, dtype=np.float64) + modifiers[steps]
+    return np.maximum(ratings, 0.0)
+
+
+B40_SIZE = 40
+
+
+class ScoreRecord:
+    """A single play counted by B40Calculator"""
+
+    __slots__ = ('song_id', 'difficulty', 'rating', 'timestamp')
+
+    def __init__(self, song_id: str, difficulty: int, rating: float, timestamp: int):
+        self.song_id = song_id
+        self.difficulty = difficulty
+        self.rating = rating
+        self.timestamp = timestamp
+
+    def __getitem__(self, key: str):
+        """Dict-style field access (record['rating'])"""
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ScoreRecord):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return (f"ScoreRecord(song_id={self.song_id!r}, difficulty={self.difficulty}, "
+                f"rating={self.rating}, timestamp={self.timestamp})")
+
+
 class B40Calculator:
-    """Calculate B40 (Best 40) rating for player profile"""
+    """
+    Calculate B40 (Best 40) rating for player profile
+
+    Only the best play of each song is kept. The best 40 are held in a list
+    sorted by (-rating, first time the song was played), which is the order
+    a stable descending sort of every song's best play produces. A song's
+    best rating never goes down, so a song pushed out of the top 40 can
+    only come back through add_score and nothing outside the top 40 needs
+    to be ordered.
+    """
 
     def __init__(self):
-        self.scores = []
+        self.best_by_song: Dict[str, ScoreRecord] = {}
+        self._song_order: Dict[str, int] = {}
+        self._top_keys: List[Tuple[float, int]] = []
+        self._top: List[ScoreRecord] = []
+        self._total: Optional[float] = 0
 
     def add_score(self, song_id: str, difficulty: int,
                  rating: float, timestamp: int):
         """Add a score to the B40 calculation"""
-        self.scores.append({
-            'song_id': song_id,
-            'difficulty': difficulty,
-            'rating': rating,
-            'timestamp': timestamp
-        })
-
-    def calculate_b40(self) -> Tuple[float, List[dict]]:
+        best = self.best_by_song.get(song_id)
+        if best is not None and not rating > best.rating:
+            return
+
+        record = ScoreRecord(song_id, difficulty, rating, timestamp)
+        self.best_by_song[song_id] = record
+        order = self._song_order.setdefault(song_id, len(self._song_order))
+
+        if best is not None:
+            old_key = (-best.rating, order)
+            index = bisect_left(self._top_keys, old_key)
+            if index < len(self._top_keys) and self._top_keys[index] == old_key:
+                del self._top_keys[index]
+                del self._top[index]
+
+        key = (-rating, order)
+        if len(self._top_keys) >= B40_SIZE and key > self._top_keys[-1]:
+            return  # Not better than the current 40th best
+
+        index = bisect_left(self._top_keys, key)
+        self._top_keys.insert(index, key)
+        self._top.insert(index, record)
+        if len(self._top_keys) > B40_SIZE:
+            self._top_keys.pop()
+            self._top.pop()
+        self._total = None
+
+    def calculate_b40(self) -> Tuple[float, List[ScoreRecord]]:
         """
         Calculate B40 rating
 
         Returns:
             Tuple of (total B40 rating, list of best 40 scores)
         """
-        # Group by song and keep only best score per song
-        best_by_song = {}
-        for score in self.scores:
-            key = score['song_id']
-            if key not in best_by_song or score['rating'] > best_by_song[key]['rating']:
-                best_by_song[key] = score
-
-        # Sort by rating and take top 40
-        sorted_scores = sorted(best_by_song.values(),
-                              key=lambda x: x['rating'],
-                              reverse=True)[:40]
-
-        # Calculate total B40
-        total_rating = sum(score['rating'] for score in sorted_scores)
-
-        return total_rating, sorted_scores
\ No newline at end of file
+        if self._total is None:
+            # Summed in rank order so the total matches a full recomputation
+            self._total = sum(record.rating for record in self._top)
+        return self._total, list(self._top)
@@ -0,0 +1,564 @@
+"""
+Scoring Server for Rotaenot
+asyncio judgment/scoring service with a length-prefixed binary protocol
+
+One long-lived process owns the ScoreCalculator of every play session,
+each player's B40Calculator and the parsed charts. Game clients connect
+over TCP or a Unix socket and exchange frames:
+
+    header   <IBI   payload length, message type, request id
+    payload         message-specific, little-endian
+
+Requests on a connection are handled strictly in order and answered with
+the same request id and the request type | RESPONSE_FLAG (or ERROR), so a
+client may pipeline any number of requests without waiting for replies.
+
+Run a server, or the loopback harness, from the repository root:
+
+    python -m rotaenot.python_backend.scoring_server serve --charts path/to/charts
+    python -m rotaenot.python_backend.scoring_server loopback --clients 16
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import struct
+import sys
+import time
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Dict, List, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
+
+from .chart_cache import ChartCache
+from .chart_parser import ChartParser
+from .chart_types import Chart
+from .score_system import B40Calculator, ScoreCalculator, ScoreData
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 7341
+
+HEADER = struct.Struct('<IBI')  # Payload length, message type, request id
+MAX_PAYLOAD = 16 * 1024 * 1024  # Larger frames close the connection
+
+RESPONSE_FLAG = 0x80
+
+_U16 = struct.Struct('<H')
+_U32 = struct.Struct('<I')
+_SESSION_OPENED = struct.Struct('<II')  # Session id, chart note count
+# total_score, accuracy, max_combo, perfect, great, good, miss, full_combo
+_SCORE = struct.Struct('<qdIIIIIB')
+_CLOSE_RESULT = struct.Struct('<dd')  # Rating, player's B40 total after the play
+_B40 = struct.Struct('<dI')  # B40 total, number of songs counted
+_HIT_DTYPE = np.dtype('<f8')  # Hit timing offsets in milliseconds
+
+
+class MessageType(IntEnum):
+    """Frame types; responses carry the request type | RESPONSE_FLAG"""
+    OPEN_SESSION = 1  # <H player <H chart key -> _SESSION_OPENED
+    SUBMIT_HITS = 2  # <I session, then float64 offsets -> _SCORE
+    CLOSE_SESSION = 3  # <I session -> _SCORE + _CLOSE_RESULT
+    GET_B40 = 4  # <H player -> _B40
+    ERROR = 0xFF  # UTF-8 message
+
+
+@dataclass
+class SessionResult:
+    """Outcome of a closed session"""
+    score: ScoreData
+    rating: float
+    b40_total: float
+
+
+@dataclass
+class _Session:
+    player: str
+    chart_key: str
+    difficulty: int
+    note_count: int
+    calculator: ScoreCalculator = field(default_factory=ScoreCalculator)
+
+
+def _pack_text(text: str) -> bytes:
+    data = text.encode('utf-8')
+    if len(data) > 0xFFFF:
+        raise ValueError("Text field longer than 65535 bytes")
+    return _U16.pack(len(data)) + data
+
+
+def _unpack_text(payload: bytes, offset: int = 0) -> Tuple[str, int]:
+    (length,) = _U16.unpack_from(payload, offset)
+    start = offset + _U16.size
+    if start + length > len(payload):
+        raise ValueError("Truncated text field")
+    return payload[start:start + length].decode('utf-8'), start + length
+
+
+def _pack_score(score: ScoreData) -> bytes:
+    return _SCORE.pack(score.total_score, score.accuracy, score.max_combo,
+                       score.perfect_count, score.great_count, score.good_count,
+                       score.miss_count, score.full_combo)
+
+
+def _unpack_score(payload: bytes, offset: int = 0) -> ScoreData:
+    (total_score, accuracy, max_combo, perfect, great, good, miss,
+     full_combo) = _SCORE.unpack_from(payload, offset)
+    return ScoreData(total_score, accuracy, max_combo, perfect, great, good, miss,
+                     bool(full_combo))
+
+
+def encode_frame(message_type: int, request_id: int, payload: bytes = b'') -> bytes:
+    """Header plus payload of one frame"""
+    return HEADER.pack(len(payload), message_type, request_id) + payload
+
+
+class ScoringServer:
+    """
+    Sessions, B40 tables and charts shared by every connected client
+
+    Charts are registered with add_chart, or loaded on first use from
+    chart_dir by file name (paths are never taken from clients). A session
+    belongs to the connection that opened it and is discarded unscored if
+    that connection drops before closing it.
+    """
+
+    def __init__(self, charts: Optional[Dict[str, Chart]] = None,
+                 chart_dir: Optional[str] = None):
+        """
+        Args:
+            charts: Charts to serve, by the key clients open them with
+            chart_dir: Directory of chart files clients may open by file name
+        """
+        self.charts: Dict[str, Chart] = dict(charts or {})
+        self.chart_dir = chart_dir
+        self.parser = ChartParser(cache=ChartCache())
+        self.players: Dict[str, B40Calculator] = {}
+        self.requests_served = 0
+        self._sessions: Dict[int, _Session] = {}
+        self._session_ids = itertools.count(1)
+        self._servers: List[asyncio.AbstractServer] = []
+        self._connections: Dict[asyncio.Task, asyncio.StreamWriter] = {}
+
+    def add_chart(self, key: str, chart: Chart):
+        """Make a chart available under key"""
+        self.charts[key] = chart
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT
+                    ) -> asyncio.AbstractServer:
+        """Listen on TCP (port 0 picks a free port)"""
+        server = await asyncio.start_server(self._handle_connection, host, port)
+        self._servers.append(server)
+        return server
+
+    async def start_unix(self, path: str) -> asyncio.AbstractServer:
+        """Listen on a Unix socket"""
+        server = await asyncio.start_unix_server(self._handle_connection, path)
+        self._servers.append(server)
+        return server
+
+    async def close(self):
+        """Stop listening, drop every connection and wait for both to finish"""
+        for server in self._servers:
+            server.close()
+        for writer in self._connections.values():
+            writer.close()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        for server in self._servers:
+            await server.wait_closed()
+        self._servers.clear()
+
+    @property
+    def session_count(self) -> int:
+        return len(self._sessions)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader,
+                                 writer: asyncio.StreamWriter):
+        owned: Set[int] = set()
+        task = asyncio.current_task()
+        self._connections[task] = writer
+        try:
+            while True:
+                header = await reader.readexactly(HEADER.size)
+                length, message_type, request_id = HEADER.unpack(header)
+                if length > MAX_PAYLOAD:
+                    writer.write(encode_frame(MessageType.ERROR, request_id,
+                                              b'Frame too large'))
+                    break
+                payload = await reader.readexactly(length) if length else b''
+                writer.write(self.handle_request(message_type, request_id, payload, owned))
+                # Only waits when the client stops reading (transport buffer full)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            for session_id in owned:
+                self._sessions.pop(session_id, None)
+            del self._connections[task]
+            writer.close()
+
+    def handle_request(self, message_type: int, request_id: int, payload: bytes,
+                       owned: Set[int]) -> bytes:
+        """
+        Answer one request frame
+
+        Args:
+            message_type: Request type
+            request_id: Echoed in the response
+            payload: Request payload
+            owned: Sessions of the requesting connection (updated in place)
+
+        Returns:
+            Encoded response frame
+        """
+        self.requests_served += 1
+        try:
+            if message_type == MessageType.OPEN_SESSION:
+                response = self._open_session(payload, owned)
+            elif message_type == MessageType.SUBMIT_HITS:
+                response = self._submit_hits(payload, owned)
+            elif message_type == MessageType.CLOSE_SESSION:
+                response = self._close_session(payload, owned)
+            elif message_type == MessageType.GET_B40:
+                response = self._get_b40(payload)
+            else:
+                raise ValueError(f"Unknown message type: {message_type}")
+        except (ValueError, KeyError, struct.error) as e:
+            message = str(e.args[0]) if isinstance(e, KeyError) else str(e)
+            return encode_frame(MessageType.ERROR, request_id, message.encode('utf-8'))
+        return encode_frame(message_type | RESPONSE_FLAG, request_id, response)
+
+    def _open_session(self, payload: bytes, owned: Set[int]) -> bytes:
+        player, offset = _unpack_text(payload)
+        chart_key, _ = _unpack_text(payload, offset)
+        chart = self._get_chart(chart_key)
+
+        session_id = next(self._session_ids)
+        note_count = len(chart.notes)
+        self._sessions[session_id] = _Session(player, chart_key, chart.difficulty, note_count)
+        owned.add(session_id)
+        return _SESSION_OPENED.pack(session_id, note_count)
+
+    def _submit_hits(self, payload: bytes, owned: Set[int]) -> bytes:
+        session = self._get_session(payload, owned)
+        hits = np.frombuffer(payload, dtype=_HIT_DTYPE, offset=_U32.size)
+        calculator = session.calculator
+        if calculator.total_notes + len(hits) > session.note_count:
+            raise ValueError(f"More hits than the chart's {session.note_count} notes")
+        return _pack_score(calculator.score_batch(hits))
+
+    def _close_session(self, payload: bytes, owned: Set[int]) -> bytes:
+        session = self._get_session(payload, owned)
+        (session_id,) = _U32.unpack_from(payload)
+        del self._sessions[session_id]
+        owned.discard(session_id)
+
+        # Notes never reported count as misses (NaN offsets judge as MISS)
+        calculator = session.calculator
+        remaining = session.note_count - calculator.total_notes
+        score = calculator.score_batch(np.full(remaining, np.nan)) if remaining else \
+            calculator.get_final_score_data()
+        rating = calculator.calculate_rating(session.difficulty)
+
+        b40 = self.players.setdefault(session.player, B40Calculator())
+        b40.add_score(session.chart_key, session.difficulty, rating, int(time.time()))
+        total, _ = b40.calculate_b40()
+        return _pack_score(score) + _CLOSE_RESULT.pack(rating, total)
+
+    def _get_b40(self, payload: bytes) -> bytes:
+        player, _ = _unpack_text(payload)
+        b40 = self.players.get(player)
+        if b40 is None:
+            return _B40.pack(0.0, 0)
+        total, best = b40.calculate_b40()
+        return _B40.pack(total, len(best))
+
+    def _get_session(self, payload: bytes, owned: Set[int]) -> _Session:
+        (session_id,) = _U32.unpack_from(payload)
+        if session_id not in owned:
+            raise ValueError(f"Unknown session: {session_id}")
+        return self._sessions[session_id]
+
+    def _get_chart(self, key: str) -> Chart:
+        chart = self.charts.get(key)
+        if chart is not None:
+            return chart
+        if (self.chart_dir is None or not key or os.path.basename(key) != key
+                or key.startswith('.')):
+            raise ValueError(f"Unknown chart: {key}")
+        path = os.path.join(self.chart_dir, key)
+        if not os.path.isfile(path):
+            raise ValueError(f"Unknown chart: {key}")
+        try:
+            return self.parser.parse_chart(path, columnar=True)
+        except Exception as e:
+            # Reported to the client as an ERROR frame, not a dropped connection
+            raise ValueError(f"Cannot load chart {key}: {e!r}") from e
+
+
+class ScoringClient:
+    """
+    Client for ScoringServer
+
+    Every request method may be awaited concurrently: requests are written
+    as soon as they are made and matched to responses by request id, so
+    concurrent calls are pipelined over the one connection.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+        self._request_ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._read_task = asyncio.get_running_loop().create_task(self._read_responses())
+
+    @classmethod
+    async def connect(cls, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT
+                      ) -> 'ScoringClient':
+        """Connect over TCP"""
+        return cls(*await asyncio.open_connection(host, port))
+
+    @classmethod
+    async def connect_unix(cls, path: str) -> 'ScoringClient':
+        """Connect over a Unix socket"""
+        return cls(*await asyncio.open_unix_connection(path))
+
+    async def open_session(self, player: str, chart: str) -> Tuple[int, int]:
+        """
+        Start playing a chart
+
+        Returns:
+            (session id, number of notes in the chart)
+        """
+        payload = await self._request(MessageType.OPEN_SESSION,
+                                      _pack_text(player) + _pack_text(chart))
+        return _SESSION_OPENED.unpack(payload)
+
+    async def submit_hits(self, session_id: int,
+                          offsets_ms: Union[Sequence[float], np.ndarray]) -> ScoreData:
+        """
+        Judge and score the next hits of a session
+
+        Args:
+            session_id: Session from open_session
+            offsets_ms: Hit timing offsets in milliseconds, in note order
+
+        Returns:
+            ScoreData of the session so far
+        """
+        hits = np.ascontiguousarray(offsets_ms, dtype=_HIT_DTYPE)
+        payload = await self._request(MessageType.SUBMIT_HITS,
+                                      _U32.pack(session_id) + hits.tobytes())
+        return _unpack_score(payload)
+
+    async def close_session(self, session_id: int) -> SessionResult:
+        """Finish a session; unreported notes count as misses"""
+        payload = await self._request(MessageType.CLOSE_SESSION, _U32.pack(session_id))
+        rating, total = _CLOSE_RESULT.unpack_from(payload, _SCORE.size)
+        return SessionResult(_unpack_score(payload), rating, total)
+
+    async def get_b40(self, player: str) -> Tuple[float, int]:
+        """(B40 total, number of songs counted) of a player"""
+        return _B40.unpack(await self._request(MessageType.GET_B40, _pack_text(player)))
+
+    async def close(self):
+        """Close the connection"""
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except ConnectionError:
+            pass
+        self._read_task.cancel()
+        try:
+            await self._read_task
+        except asyncio.CancelledError:
+            pass
+
+    async def _request(self, message_type: int, payload: bytes) -> bytes:
+        if self._read_task.done():
+            raise ConnectionError("Connection closed")
+        request_id = next(self._request_ids) & 0xFFFFFFFF
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        self._writer.write(encode_frame(message_type, request_id, payload))
+        await self._writer.drain()
+        return await future
+
+    async def _read_responses(self):
+        error: Exception = ConnectionError("Connection closed by the server")
+        try:
+            while True:
+                length, message_type, request_id = HEADER.unpack(
+                    await self._reader.readexactly(HEADER.size))
+                payload = await self._reader.readexactly(length) if length else b''
+                future = self._pending.pop(request_id, None)
+                if future is None or future.done():
+                    continue
+                if message_type == MessageType.ERROR:
+                    future.set_exception(ValueError(payload.decode('utf-8', 'replace')))
+                else:
+                    future.set_result(payload)
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            if isinstance(e, ConnectionError):
+                error = e
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            self._pending.clear()
+
+
+@dataclass
+class LoopbackReport:
+    """Outcome of run_loopback"""
+    clients: int
+    sessions: int
+    requests: int
+    hits: int
+    seconds: float
+    mismatches: List[str] = field(default_factory=list)  # Differences from local scoring
+
+    @property
+    def requests_per_second(self) -> float:
+        return self.requests / self.seconds if self.seconds else 0.0
+
+    @property
+    def hits_per_second(self) -> float:
+        return self.hits / self.seconds if self.seconds else 0.0
+
+
+async def run_loopback(clients: int = 8, sessions_per_client: int = 4,
+                       batch_size: int = 16, unix_path: Optional[str] = None,
+                       seed: int = 0) -> LoopbackReport:
+    """
+    Start a server, drive it with local clients and check every result
+
+    Each client opens its sessions on generated charts and pipelines all of
+    its requests at once. Every session's final score and rating is
+    compared with a local ScoreCalculator fed the same hits.
+
+    Args:
+        clients: Concurrent client connections
+        sessions_per_client: Play sessions per client (run concurrently)
+        batch_size: Hits per SUBMIT_HITS request
+        unix_path: Serve on this Unix socket instead of loopback TCP
+        seed: Seed for the charts and hit offsets
+
+    Returns:
+        LoopbackReport with throughput and any mismatches
+    """
+    from .chart_generator import ChartGenerator
+
+    server = ScoringServer()
+    charts = list(ChartGenerator().generate_many(4, 60, 8, seed=seed))
+    for index, chart in enumerate(charts):
+        server.add_chart(f'generated_{index}', chart)
+    if unix_path:
+        await server.start_unix(unix_path)
+    else:
+        listener = await server.start(DEFAULT_HOST, 0)
+        port = listener.sockets[0].getsockname()[1]
+
+    rng = np.random.default_rng(seed)
+    plays = [[(index % len(charts), rng.normal(0, 60, len(charts[index % len(charts)].notes)))
+              for index in range(client * sessions_per_client,
+                                 (client + 1) * sessions_per_client)]
+             for client in range(clients)]
+    mismatches: List[str] = []
+
+    async def play(client: ScoringClient, player: str, chart_index: int,
+                   offsets: np.ndarray) -> int:
+        session_id, _ = await client.open_session(player, f'generated_{chart_index}')
+        batches = [offsets[start:start + batch_size]
+                   for start in range(0, len(offsets), batch_size)]
+        await asyncio.gather(*(client.submit_hits(session_id, batch) for batch in batches))
+        result = await client.close_session(session_id)
+
+        local = ScoreCalculator()
+        for offset in offsets.tolist():
+            local.process_note_hit(local.judge_note(offset))
+        expected = local.get_final_score_data()
+        rating = local.calculate_rating(charts[chart_index].difficulty)
+        if result.score != expected or result.rating != rating:
+            mismatches.append(f"{player} chart {chart_index}: {result} != {expected}, {rating}")
+        return len(batches) + 2
+
+    async def run_client(index: int) -> int:
+        if unix_path:
+            client = await ScoringClient.connect_unix(unix_path)
+        else:
+            client = await ScoringClient.connect(DEFAULT_HOST, port)
+        try:
+            counts = await asyncio.gather(*(play(client, f'player_{index}', chart, offsets)
+                                            for chart, offsets in plays[index]))
+            return sum(counts)
+        finally:
+            await client.close()
+
+    start = time.perf_counter()
+    try:
+        requests = sum(await asyncio.gather(*(run_client(index) for index in range(clients))))
+    finally:
+        await server.close()
+    seconds = time.perf_counter() - start
+
+    return LoopbackReport(
+        clients=clients,
+        sessions=clients * sessions_per_client,
+        requests=requests,
+        hits=sum(len(offsets) for client in plays for _, offsets in client),
+        seconds=seconds,
+        mismatches=mismatches
+    )
+
+
+async def serve(server: ScoringServer, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                unix_path: Optional[str] = None):
+    """Run a server until cancelled"""
+    listener = await (server.start_unix(unix_path) if unix_path else server.start(host, port))
+    async with listener:
+        await listener.serve_forever()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Command line entry point"""
+    arguments = argparse.ArgumentParser(description=__doc__.split('\n')[2])
+    commands = arguments.add_subparsers(dest='command', required=True)
+
+    serve_command = commands.add_parser('serve', help="Run a scoring server")
+    serve_command.add_argument('--host', default=DEFAULT_HOST)
+    serve_command.add_argument('--port', type=int, default=DEFAULT_PORT)
+    serve_command.add_argument('--unix', help="Listen on this Unix socket instead")
+    serve_command.add_argument('--charts', help="Directory of charts clients may open")
+
+    loopback_command = commands.add_parser('loopback', help="Run the loopback harness")
+    loopback_command.add_argument('--clients', type=int, default=8)
+    loopback_command.add_argument('--sessions', type=int, default=4,
+                                  help="Sessions per client")
+    loopback_command.add_argument('--batch-size', type=int, default=16)
+    loopback_command.add_argument('--unix', help="Use this Unix socket instead of TCP")
+    loopback_command.add_argument('--seed', type=int, default=0)
+    options = arguments.parse_args(argv)
+
+    if options.command == 'serve':
+        try:
+            asyncio.run(serve(ScoringServer(chart_dir=options.charts), options.host,
+                              options.port, options.unix))
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    report = asyncio.run(run_loopback(options.clients, options.sessions,
+                                      options.batch_size, options.unix, options.seed))
+    print(f"{report.clients} clients, {report.sessions} sessions, "
+          f"{report.requests} requests, {report.hits} hits in {report.seconds:.3f} s")
+    print(f"{report.requests_per_second:,.0f} requests/s, "
+          f"{report.hits_per_second:,.0f} hits/s")
+    for mismatch in report.mismatches:
+        print(f"MISMATCH {mismatch}")
+    return 1 if report.mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
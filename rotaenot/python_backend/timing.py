@@ -0,0 +1,165 @@
+"""
+Chart Timing for Rotaenot
+Tempo maps with BPM/offset change points and vectorized beat conversion
+"""
+
+from dataclasses import dataclass
+from typing import Sequence, Union
+
+import numpy as np
+
+from .chart_types import Chart
+
+ArrayLike = Union[float, Sequence[float], np.ndarray]
+
+
+@dataclass(frozen=True)
+class TimingPoint:
+    """Start of a constant-tempo section"""
+    time: float  # Seconds; the section's beat grid is anchored here
+    bpm: float
+
+
+class TimingMap:
+    """
+    Piecewise-constant tempo map
+
+    Each timing point starts a section whose beat grid is anchored at the
+    point's time, so a point can change the BPM, shift the beat phase
+    (an offset change), or both. Beats are counted continuously across
+    sections; a section may start on a fractional beat after a phase
+    shift. Times before the first point use the first section's tempo.
+
+    Section start times and cumulative beats are precomputed once, so
+    conversions in either direction are one np.searchsorted over the
+    section starts plus a multiply-add.
+    """
+
+    def __init__(self, points: Sequence[TimingPoint]):
+        """
+        Args:
+            points: Timing points (any order; at least one)
+        """
+        if not points:
+            raise ValueError("A timing map needs at least one timing point")
+        points = sorted(points, key=lambda point: point.time)
+        if any(point.bpm <= 0 for point in points):
+            raise ValueError("BPM must be positive")
+        times = np.array([point.time for point in points], dtype=np.float64)
+        if np.any(np.diff(times) == 0):
+            raise ValueError("Timing points must have distinct times")
+
+        self.points = list(points)
+        self.start_times = times
+        self.bpms = np.array([point.bpm for point in points], dtype=np.float64)
+        self.seconds_per_beat = 60.0 / self.bpms
+
+        # Beat number at the start of each section
+        section_beats = np.diff(times) / self.seconds_per_beat[:-1]
+        self.start_beats = np.concatenate(([0.0], np.cumsum(section_beats)))
+
+    @classmethod
+    def constant(cls, bpm: float, offset: float = 0.0) -> 'TimingMap':
+        """Single-tempo map with beat 0 at offset seconds"""
+        return cls([TimingPoint(offset, bpm)])
+
+    @classmethod
+    def from_chart(cls, chart: Chart) -> 'TimingMap':
+        """Map for a chart's bpm and offset (the offset is in ms)"""
+        return cls.constant(chart.bpm, chart.offset / 1000)
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def section_at_time(self, times: ArrayLike) -> np.ndarray:
+        """Index of the section containing each time"""
+        sections = np.searchsorted(self.start_times, times, side='right') - 1
+        return np.maximum(sections, 0)
+
+    def section_at_beat(self, beats: ArrayLike) -> np.ndarray:
+        """Index of the section containing each beat"""
+        sections = np.searchsorted(self.start_beats, beats, side='right') - 1
+        return np.maximum(sections, 0)
+
+    def seconds_to_beats(self, times: ArrayLike) -> np.ndarray:
+        """
+        Convert times to (fractional) beat numbers
+
+        Args:
+            times: Times in seconds
+
+        Returns:
+            Beat numbers, counted from the first timing point
+        """
+        times = np.asarray(times, dtype=np.float64)
+        sections = self.section_at_time(times)
+        return (self.start_beats[sections]
+                + (times - self.start_times[sections]) / self.seconds_per_beat[sections])
+
+    def beats_to_seconds(self, beats: ArrayLike) -> np.ndarray:
+        """
+        Convert beat numbers to times
+
+        Args:
+            beats: Beat numbers, counted from the first timing point
+
+        Returns:
+            Times in seconds
+        """
+        beats = np.asarray(beats, dtype=np.float64)
+        sections = self.section_at_beat(beats)
+        return (self.start_times[sections]
+                + (beats - self.start_beats[sections]) * self.seconds_per_beat[sections])
+
+    def bpm_at(self, times: ArrayLike) -> np.ndarray:
+        """Tempo in effect at each time"""
+        return self.bpms[self.section_at_time(times)]
+
+    def snap(self, times: ArrayLike, divisor: int = 4) -> np.ndarray:
+        """
+        Move times to the nearest 1/divisor beat of their section's grid
+
+        Args:
+            times: Times in seconds
+            divisor: Grid subdivisions per beat (4 for sixteenth notes in 4/4)
+
+        Returns:
+            Snapped times in seconds
+        """
+        times = np.asarray(times, dtype=np.float64)
+        sections = self.section_at_time(times)
+        step = self.seconds_per_beat[sections] / divisor
+        start = self.start_times[sections]
+        return start + np.round((times - start) / step) * step
+
+    def snap_error(self, times: ArrayLike, divisor: int = 4) -> np.ndarray:
+        """Distance in seconds from each time to its snapped time"""
+        times = np.asarray(times, dtype=np.float64)
+        return np.abs(times - self.snap(times, divisor))
+
+    def grid(self, start: float, end: float, divisor: int = 1) -> np.ndarray:
+        """
+        Times of every 1/divisor beat between start and end (inclusive)
+
+        Args:
+            start: First time in seconds
+            end: Last time in seconds
+            divisor: Grid subdivisions per beat
+
+        Returns:
+            Grid times in seconds, each section's grid anchored at its start
+        """
+        first, last = self.section_at_time([start, end]).tolist()
+        blocks = []
+        for section in range(first, last + 1):
+            origin = self.start_times[section]
+            step = self.seconds_per_beat[section] / divisor
+            low = max(start, origin) if section > 0 else start
+            ticks = np.arange(np.ceil((low - origin) / step - 1e-9),
+                              np.floor((end - origin) / step + 1e-9) + 1)
+            if section + 1 < len(self.points):
+                # The next section's grid takes over at its start
+                section_ticks = (self.start_times[section + 1] - origin) / step
+                ticks = ticks[ticks < section_ticks - 1e-9]
+            blocks.append(origin + ticks * step)
+        return np.concatenate(blocks)
@@ -0,0 +1,124 @@
+import os
+
+import pytest
+
+from rotaenot.python_backend.chart_binary import BINARY_EXTENSION
+from rotaenot.python_backend.chart_cache import CacheStats, ChartCache
+from rotaenot.python_backend.chart_parser import ChartParser
+from rotaenot.python_backend.chart_types import Chart, Note, NoteArray, NoteType
+
+
+def _write_chart(path, note_count, title='Cached'):
+    notes = [Note(time=i * 0.25, position=(i * 37) % 360, note_type=NoteType.TAP)
+             for i in range(note_count)]
+    chart = Chart(title=title, artist='Tester', bpm=120, difficulty=5, notes=notes,
+                  audio_file='song.ogg')
+    ChartParser().save_chart(chart, str(path))
+    return str(path)
+
+
+def _touch(path, seconds_later):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + seconds_later * 10**9))
+
+
+def test_hits_touches_and_rewrites_are_counted(tmp_path):
+    path = _write_chart(tmp_path / 'chart.json', 8)
+    parser = ChartParser(cache=ChartCache())
+
+    assert len(parser.parse_chart(path, columnar=True).notes) == 8
+    assert parser.cache.stats == CacheStats(misses=1)
+
+    parser.parse_chart(path, columnar=True)
+    assert parser.cache.stats == CacheStats(hits=1, misses=1)
+
+    # New mtime, same content: the hash matches and the chart is kept
+    _touch(path, 5)
+    parser.parse_chart(path, columnar=True)
+    assert parser.cache.stats == CacheStats(hits=2, misses=1)
+    parser.parse_chart(path, columnar=True)
+    assert parser.cache.stats == CacheStats(hits=3, misses=1)
+
+    # New content is parsed again
+    _write_chart(path, 12)
+    _touch(path, 10)
+    assert len(parser.parse_chart(path, columnar=True).notes) == 12
+    assert parser.cache.stats == CacheStats(hits=3, misses=2)
+    assert len(parser.cache) == 1
+
+
+def test_disk_layer_serves_a_fresh_cache(tmp_path):
+    path = _write_chart(tmp_path / 'chart.json', 8)
+    disk_dir = tmp_path / 'disk'
+
+    first = ChartParser(cache=ChartCache(disk_dir=str(disk_dir)))
+    expected = first.parse_chart(path, columnar=True)
+    assert first.cache.stats == CacheStats(misses=1)
+    assert [name.endswith(BINARY_EXTENSION) for name in os.listdir(disk_dir)] == [True]
+
+    second = ChartParser(cache=ChartCache(disk_dir=str(disk_dir)))
+    chart = second.parse_chart(path, columnar=True)
+    assert second.cache.stats == CacheStats(disk_hits=1)
+    assert chart.title == expected.title
+    assert chart.notes.to_notes() == expected.notes.to_notes()
+
+    second.parse_chart(path, columnar=True)
+    assert second.cache.stats == CacheStats(hits=1, disk_hits=1)
+
+
+def test_least_recently_used_chart_is_evicted(tmp_path):
+    paths = [_write_chart(tmp_path / f'chart{i}.json', 100) for i in range(3)]
+    cache = ChartCache()
+    parser = ChartParser(cache=cache)
+    parser.parse_chart(paths[0], columnar=True)
+    cache.max_bytes = cache.current_bytes * 2  # Room for two charts
+
+    parser.parse_chart(paths[1], columnar=True)
+    parser.parse_chart(paths[0], columnar=True)  # Now chart1 is least recent
+    parser.parse_chart(paths[2], columnar=True)
+
+    assert cache.stats == CacheStats(hits=1, misses=3, evictions=1)
+    assert paths[0] in cache and paths[2] in cache and paths[1] not in cache
+    assert cache.current_bytes <= cache.max_bytes
+
+    parser.parse_chart(paths[1], columnar=True)
+    assert cache.stats == CacheStats(hits=1, misses=4, evictions=2)
+
+
+def test_repeat_default_load_does_no_per_note_work(tmp_path, monkeypatch):
+    path = _write_chart(tmp_path / 'chart.json', 50)
+    parser = ChartParser(cache=ChartCache())
+    first = parser.parse_chart(path)
+    assert isinstance(first.notes, list) and len(first.notes) == 50
+
+    def fail(self):
+        raise AssertionError("notes rebuilt on a cache hit")
+    monkeypatch.setattr(NoteArray, 'to_notes', fail)
+    monkeypatch.setattr(NoteArray, '__iter__', fail)
+    monkeypatch.setattr(NoteArray, '__getitem__', fail)
+
+    second = parser.parse_chart(path)
+    assert parser.cache.stats == CacheStats(hits=1, misses=1)
+    assert second.notes == first.notes
+    assert second.notes is not first.notes  # Each caller gets its own list
+    assert all(a is b for a, b in zip(second.notes, first.notes))
+
+
+def test_materialized_notes_count_towards_the_budget(tmp_path):
+    path = _write_chart(tmp_path / 'chart.json', 50)
+    cache = ChartCache()
+    parser = ChartParser(cache=cache)
+    parser.parse_chart(path, columnar=True)
+    columnar_bytes = cache.current_bytes
+
+    parser.parse_chart(path)
+    assert cache.current_bytes > columnar_bytes
+    _touch(path, 5)  # Re-stored entries keep the materialized notes
+    parser.parse_chart(path)
+    assert cache.current_bytes > columnar_bytes
+    assert cache.stats == CacheStats(hits=2, misses=1)
+
+
+def test_missing_file_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        ChartParser(cache=ChartCache()).parse_chart(str(tmp_path / 'missing.json'))
@@ -0,0 +1,51 @@
+import pytest
+
+from rotaenot.python_backend.chart_hitobjects import read_osu_chart
+
+OSU_CHART = """osu file format v14
+
+[General]
+AudioFilename: song.mp3
+
+[Metadata]
+Title:Comment Test
+Artist:Tester
+
+[Difficulty]
+OverallDifficulty:6
+
+[TimingPoints]
+{timing_points}
+
+[HitObjects]
+256,192,1000,1,0,0:0:0:0:
+0,192,1500,128,0,2000:0:0:0:0:
+"""
+
+
+def _write_chart(tmp_path, timing_points):
+    path = tmp_path / 'chart.osu'
+    path.write_text(OSU_CHART.format(timing_points=timing_points), encoding='utf-8')
+    return str(path)
+
+
+def test_timing_point_comments_and_junk_are_skipped(tmp_path):
+    chart = read_osu_chart(_write_chart(tmp_path, '\n'.join([
+        '// offset,beatLength,meter',
+        '',
+        '   // indented, with a comma',
+        'not,a,timing,point',
+        '500,-50,4,2,0,100,0,0',  # Inherited point: negative beat length
+        '500,400,4,2,0,100,1,0',
+    ])))
+
+    assert chart.bpm == pytest.approx(150.0)
+    assert chart.title == 'Comment Test'
+    assert chart.difficulty == 6
+    assert len(chart.notes) == 2
+
+
+def test_unparseable_timing_points_fall_back_to_120_bpm(tmp_path):
+    chart = read_osu_chart(_write_chart(tmp_path, '// only, comments\nbroken'))
+
+    assert chart.bpm == 120
@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+from rotaenot.python_backend.chart_parser import ChartParser
+from rotaenot.python_backend.chart_types import (
+    Chart, NOTE_TYPE_CODES, Note, NoteArray, NoteType)
+from rotaenot.python_backend.chart_validation import (
+    ChartValidator, ValidationRule, default_rules, hold_overlap_rule)
+
+HOLD = NOTE_TYPE_CODES[NoteType.HOLD]
+TAP = NOTE_TYPE_CODES[NoteType.TAP]
+
+
+def _random_notes(rng, count):
+    """Small charts with plenty of shared times, positions and overlapping holds"""
+    time = np.round(np.sort(rng.uniform(0, 2, count)) / 0.02) * 0.02
+    time[rng.random(count) < 0.1] -= 0.5  # Some out of order
+    position = rng.choice([0.0, 10.0, 90.0, 359.5, 360.0, -5.0], count)
+    type_code = np.where(rng.random(count) < 0.5, HOLD, TAP)
+    duration = rng.choice([np.nan, 0.0, -1.0, 0.03, 0.2, 1.5], count)
+    return NoteArray.from_columns(time=time, position=position, type_code=type_code,
+                                  duration=duration)
+
+
+def _brute_force(notes):
+    time = notes.time.tolist()
+    position = notes.position.tolist()
+    duration = notes.duration.tolist()
+    hold = (notes.type_code == HOLD).tolist()
+    count = len(time)
+    proper = [hold[i] and duration[i] > 0 for i in range(count)]
+    return {
+        'min_gap': [i for i in range(1, count) if time[i] - time[i - 1] < 0.05],
+        'position_range': [i for i in range(count) if not 0 <= position[i] < 360],
+        'unsorted': [i for i in range(1, count) if time[i] < time[i - 1]],
+        'duplicate': [i for i in range(count)
+                      if any(time[j] == time[i] and position[j] == position[i]
+                             for j in range(i))],
+        'hold_duration': [i for i in range(count) if hold[i] and not duration[i] > 0],
+        'hold_overlap': [i for i in range(count) if proper[i] and any(
+            proper[j] and position[j] == position[i]
+            and (time[j], j) < (time[i], i) and time[i] < time[j] + duration[j]
+            for j in range(count))],
+    }
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_default_rules_match_brute_force(seed):
+    notes = _random_notes(np.random.default_rng(seed), 60)
+    report = ChartValidator().validate(notes)
+
+    for name, expected in _brute_force(notes).items():
+        assert report.indices(name).tolist() == expected, name
+
+
+def test_hold_overlap_checks_every_earlier_hold():
+    notes = NoteArray.from_columns(time=[0.0, 1.0, 3.0, 12.0], position=[10.0] * 4,
+                                   type_code=[HOLD] * 4, duration=[10.0, 0.5, 0.5, 0.5])
+
+    assert ChartValidator([hold_overlap_rule()]).validate(notes).indices(
+        'hold_overlap').tolist() == [1, 2]
+
+
+def test_register_and_unregister():
+    validator = ChartValidator()
+    names = [rule.name for rule in default_rules()]
+    notes = NoteArray.from_columns(time=[0.0, 1.0, 2.0], position=[0.0, 45.0, 90.0],
+                                   type_code=[TAP] * 3)
+
+    validator.register(ValidationRule('late', lambda n: np.flatnonzero(n.time > 1.5),
+                                      "Late note at {time}s"))
+    assert [rule.name for rule in validator.rules] == names + ['late']
+    report = validator.validate(notes)
+    assert report.counts()['late'] == 1
+    assert report.messages() == ["Late note at 2.0s"]
+
+    # Same name replaces the old rule
+    validator.register(ValidationRule('late', lambda n: np.flatnonzero(n.time > 0.5),
+                                      "Late note {index}"))
+    assert [rule.name for rule in validator.rules] == names + ['late']
+    assert validator.validate(notes).messages() == ["Late note 1", "Late note 2"]
+
+    validator.unregister('late')
+    validator.unregister('min_gap')
+    validator.unregister('missing')  # No-op
+    assert [rule.name for rule in validator.rules] == names[1:]
+    assert not validator.validate(notes)
+    with pytest.raises(KeyError):
+        validator.validate(notes).indices('late')
+
+
+def test_validate_chart_messages():
+    chart = Chart(title='Bad', artist='Tester', bpm=120, difficulty=1, audio_file='', notes=[
+        Note(time=0.0, position=10.0, note_type=NoteType.TAP),
+        Note(time=0.01, position=400.0, note_type=NoteType.TAP),
+    ])
+
+    assert ChartParser().validate_chart(chart) == [
+        "Notes too close at 0.01s",
+        "Invalid position 400.0 at 0.01s",
+    ]
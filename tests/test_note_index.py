@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from rotaenot.python_backend.chart_types import NoteArray
+from rotaenot.python_backend.note_index import NoteIndex
+
+
+def _notes(times, positions):
+    return NoteArray.from_columns(time=times, position=positions,
+                                  type_code=np.zeros(len(times), dtype=np.int8))
+
+
+def _brute_force(notes, time, angle, window, tolerance):
+    offset = np.mod(notes.position - angle, 360.0)
+    near = np.minimum(offset, 360.0 - offset) <= tolerance
+    hits = np.flatnonzero((np.abs(notes.time - time) <= window) & near)
+    return hits[np.argsort(notes.time[hits], kind='stable')]
+
+
+@pytest.mark.parametrize('base', [1.4, 37.25, 180.4, 2999.9])
+def test_query_does_not_leak_into_next_bucket(base):
+    notes = _notes([0.0, base, base + 0.2], [90.0, 0.0, 0.0])
+    index = NoteIndex(notes)
+
+    np.testing.assert_array_equal(index.query(base + 0.1, 350.0, 0.3, 20.0), [1, 2])
+    offsets, indices = index.query_batch(np.array([base + 0.1]), np.array([350.0]), 0.3, 20.0)
+    np.testing.assert_array_equal(offsets, [0, 2])
+    np.testing.assert_array_equal(indices, [1, 2])
+
+
+@pytest.mark.parametrize('tolerance', [5.0, 30.0, 179.0, 200.0])
+def test_random_queries_match_brute_force(tolerance):
+    rng = np.random.default_rng(18)
+    count = 20_000
+    times = np.sort(rng.uniform(0.0, 3000.0, count))
+    # Many notes sit exactly on bucket boundaries and at 0/360 degrees
+    times[::7] = np.round(times[::7] * 2) / 2
+    positions = rng.uniform(-360.0, 720.0, count)
+    positions[::5] = rng.choice([0.0, 360.0, -0.0, 359.9999999999999], count // 5)
+    notes = _notes(times, positions)
+    index = NoteIndex(notes, bucket_size=0.5)
+
+    query_times = rng.uniform(-1.0, 3001.0, 500)
+    query_times[::3] = np.round(query_times[::3] * 2) / 2  # Windows centred on boundaries
+    query_angles = rng.uniform(-720.0, 720.0, 500)
+    window = 0.6
+    expected = [_brute_force(notes, t, a, window, tolerance)
+                for t, a in zip(query_times, query_angles)]
+
+    for t, a, hits in zip(query_times, query_angles, expected):
+        np.testing.assert_array_equal(index.query(t, a, window, tolerance), hits)
+    offsets, indices = index.query_batch(query_times, query_angles, window, tolerance)
+    for i, hits in enumerate(expected):
+        np.testing.assert_array_equal(indices[offsets[i]:offsets[i + 1]], hits)
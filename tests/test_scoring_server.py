@@ -0,0 +1,39 @@
+import os
+
+from rotaenot.python_backend.scoring_server import (
+    HEADER, MessageType, ScoringServer, _SESSION_OPENED, _pack_text)
+
+SHIPPED_CHARTS = os.path.join(os.path.dirname(__file__), os.pardir, 'rotaenot', 'charts')
+
+
+def _open(server, chart_key):
+    frame = server.handle_request(MessageType.OPEN_SESSION, 7,
+                                  _pack_text('player') + _pack_text(chart_key), set())
+    length, message_type, request_id = HEADER.unpack_from(frame)
+    assert request_id == 7
+    return message_type, frame[HEADER.size:HEADER.size + length]
+
+
+def test_open_parseable_chart():
+    message_type, payload = _open(ScoringServer(chart_dir=SHIPPED_CHARTS),
+                                  'tutorial_friend.chart')
+
+    assert message_type == MessageType.OPEN_SESSION | 0x80
+    _, note_count = _SESSION_OPENED.unpack(payload)
+    assert note_count > 0
+
+
+def test_chart_parse_failure_is_an_error_frame():
+    message_type, payload = _open(ScoringServer(chart_dir=SHIPPED_CHARTS), 'demo_chart.json')
+
+    assert message_type == MessageType.ERROR
+    assert payload.decode('utf-8').startswith('Cannot load chart demo_chart.json: KeyError(')
+
+
+def test_unexpected_parser_exception_is_an_error_frame(tmp_path):
+    (tmp_path / 'broken.json').write_text('{"notes": 5}', encoding='utf-8')
+
+    message_type, payload = _open(ScoringServer(chart_dir=str(tmp_path)), 'broken.json')
+
+    assert message_type == MessageType.ERROR
+    assert payload.decode('utf-8').startswith('Cannot load chart broken.json: ')